@@ -1,13 +1,39 @@
 import streamlit as st
 import os
-import tempfile
-from typing import TypedDict, Annotated, Literal, Optional, List
+from typing import TypedDict, Annotated, Literal
 from pydantic import Field, BaseModel
 from langgraph.graph import StateGraph, START, END
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph.message import add_messages
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.constants import TAG_NOSTREAM
 from langchain_core.messages import *
+from langchain_core.runnables import RunnableLambda, ensure_config
+from llm_cache import enable_llm_cache
+from artifacts import ArtifactStore, artifact_files
+from blob_store import BlobStore, BlobView, find_refs, with_blobs
+from history import HistoryStore, MAX_DIFF_LINES, diff_versions
+from sandbox import SandboxPool, format_report, run_decision, tests_ran
+from static_analysis import analyze_project, create_pool, format_findings
+from fake_llm import fake_backend_enabled
+from metrics import RunMetrics
+from rate_limiter import rate_limiters, with_backoff
+from model_routing import API_KEY_ENV, MODEL_PROFILES, create_chat_model, node_model, node_rate_limiter, profile_providers
+from code_blocks import CodeBlockParser, parse_code_blocks
+from code_patches import EDIT_FORMAT_INSTRUCTIONS, apply_edits, parse_edits, render_code_files
+import aiosqlite
+import asyncio
+import difflib
+import functools
+import hashlib
+import inspect
+import json
+import queue
+import threading
 import time
+import urllib.request
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
 
 st.set_page_config(
     page_title="LangGraph Development Assistant",
@@ -56,16 +82,26 @@ def load_css():
     """, unsafe_allow_html=True)
 
 
-def setup_api_key():
-    """Setup API key from environment or user input."""
-    api_key = os.environ.get("GOOGLE_API_KEY", "")
-    
-    if not api_key:
-        api_key = st.sidebar.text_input("Enter GOOGLE API Key:", type="password")
-        if api_key:
-            os.environ["GOOGLE_API_KEY"] = api_key
-    
-    return api_key
+def setup_api_key(profile=None):
+    """Return the API keys the model profile needs, from the environment or user input, as (provider, key) pairs."""
+    if API_URL:
+        st.sidebar.caption(f"Running jobs on the API at {API_URL}")
+        return "remote"
+
+    if fake_backend_enabled():
+        st.sidebar.caption("Using the offline fake LLM backend")
+        return "offline"
+
+    api_keys = []
+    for provider in profile_providers(profile or DEFAULT_PROFILE):
+        api_key = os.environ.get(API_KEY_ENV[provider], "")
+        if not api_key:
+            api_key = st.sidebar.text_input(f"Enter {provider.upper()} API Key:", type="password")
+            if api_key:
+                os.environ[API_KEY_ENV[provider]] = api_key
+        api_keys.append((provider, api_key))
+
+    return tuple(api_keys) if all(key for _, key in api_keys) else None
 
 
 def initialize_state():
@@ -130,75 +166,585 @@ def initialize_state():
         st.session_state.qa_final_feedback = ""
     if "security_review_response" not in st.session_state:
         st.session_state.security_review_response = ""
+    if "review_feedback" not in st.session_state:
+        st.session_state.review_feedback = ""
+    if "qa_test_results" not in st.session_state:
+        st.session_state.qa_test_results = {}
 
     
     if "workflow_complete" not in st.session_state:
         st.session_state.workflow_complete = False
+    if "context_savings" not in st.session_state:
+        st.session_state.context_savings = {}
+    if "loop_stops" not in st.session_state:
+        st.session_state.loop_stops = {}
+    if "speculation_stats" not in st.session_state:
+        st.session_state.speculation_stats = {}
+    if "static_analysis_stats" not in st.session_state:
+        st.session_state.static_analysis_stats = {}
+    if "run_id" not in st.session_state:
+        # The run ID is kept in the URL so a refreshed page reopens the same run
+        st.session_state.run_id = st.query_params.get("run_id", "")
     
 
 
-def save_to_file(content, filename):
-    """Save content to a temporary file and create a download link."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}") as tmp:
-        tmp.write(content.encode())
-        return tmp.name
+def create_download_link(content, filename, button_text):
+    """Create a download button for the given content or blob reference, resolved only when it is clicked."""
+    # Deferred data costs nothing per rerun and is released with the session's widgets
+    st.download_button(
+        label=button_text,
+        data=lambda: get_blob_store().unpack(content).encode(),
+        file_name=filename,
+        mime="text/markdown" if filename.endswith('.md') else "text/plain",
+        on_click="ignore"
+    )
 
 
-def create_download_link(content, filename, button_text):
-    """Create a download button for the given content."""
-    temp_path = save_to_file(content, filename)
-    with open(temp_path, 'rb') as file:
-        st.download_button(
-            label=button_text,
-            data=file,
-            file_name=filename,
-            mime="text/markdown" if filename.endswith('.md') else "text/plain"
+@st.cache_resource
+def get_artifact_store():
+    """Return the content-addressed artifact store shared by all sessions."""
+    return ArtifactStore()
+
+
+@st.cache_resource
+def get_blob_store():
+    """Return the blob store holding the long texts that state and session state reference."""
+    return BlobStore()
+
+
+@st.cache_resource
+def get_sandbox_pool():
+    """Return the pool of sandboxed test runners shared by all sessions."""
+    return SandboxPool()
+
+
+@st.cache_resource
+def get_analysis_pool():
+    """Return the process pool that runs static analysis for all sessions."""
+    return create_pool()
+
+
+@st.cache_resource
+def get_history_store():
+    """Return the store of every run's artifact versions."""
+    return HistoryStore()
+
+
+def create_bundle_download(files, filename, button_text):
+    """Offer a {name: text or blob reference} map as a ZIP, built in the artifact store the first time it is clicked."""
+    st.download_button(
+        label=button_text,
+        data=lambda: get_artifact_store().bundle_bytes(get_blob_store().unpack(files)),
+        file_name=filename,
+        mime="application/zip",
+        on_click="ignore"
+    )
+
+
+def current_code(state):
+    """Return the code as the file map fix nodes edit, falling back to the raw generated code."""
+    if state.get("code_files"):
+        return render_code_files(state["code_files"])
+    return state["generated_code"]
+
+
+def code_under_review(state):
+    """Return only the files changed by the last fix, or all the code after a full generation."""
+    if state.get("changed_files"):
+        return render_code_files(state["code_files"], state["changed_files"])
+    return state["generated_code"]
+
+
+def apply_code_fix(state, response_text):
+    """Apply a fix node's search/replace edits to the parsed code files.
+
+    Returns the state update; if any edit does not apply, the code is left alone and
+    the workflow falls back to regenerating it.
+    """
+    edits = parse_edits(response_text)
+    code_files, changed, failed = apply_edits(state.get("code_files") or {}, edits)
+    if not edits or failed:
+        print(f"Could not apply {len(failed)} of {len(edits)} edits; falling back to full regeneration")
+        return {"code_patch_applied": False}
+    print(f"Applied {len(edits)} edits to {', '.join(changed)}")
+    return {
+        "code_files": code_files,
+        "changed_files": changed,
+        "generated_code": render_code_files(code_files),
+        "code_patch_applied": True,
+    }
+
+
+# Maps graph state keys to the session state keys the UI renders from
+SESSION_STATE_KEYS = {
+    "user_stories": "user_stories",
+    "product_feedback": "product_feedback",
+    "final_product_feedback": "revised_user_stories",
+    "technical_documentation": "technical_documentation",
+    "functional_documentation": "functional_documentation",
+    "combined_documentation": "combined_documentation",
+    "feedback_design": "design_feedback",
+    "generated_code": "generated_code",
+    "code_files": "code_files",
+    "code_quality_score": "code_feedback",
+    "security_feedback": "security_feedback",
+    "security_review_response": "security_review_response",
+    "review_feedback": "review_feedback",
+    "write_test_cases_response": "write_test_cases_response",
+    "test_cases_response": "test_cases_response",
+    "test_cases_feedback": "test_cases_feedback",
+    "qa_testing_feedback": "qa_testing_feedback",
+    "qa_final_feedback": "qa_final_feedback",
+    "qa_test_results": "qa_test_results",
+}
+
+
+def restore_session_state(snapshot):
+    """Reload the UI session state from a run's last checkpoint."""
+    values = snapshot.values
+    st.session_state.project_name = values.get("project_name", "")
+    st.session_state.project_description = values.get("project_description", "")
+    st.session_state.features = values.get("features", [])
+    sync_session_state(snapshot.next[0] if snapshot.next else "", values)
+    st.session_state.workflow_started = True
+    st.session_state.workflow_complete = not snapshot.next
+
+
+def sync_session_state(node, update):
+    """Copy a node's state update into the session state used by the UI.
+
+    Nodes may run concurrently on worker threads, where Streamlit's session
+    state is not available, so the UI is updated from the streamed events instead.
+    Long texts are kept as blob references and resolved when they are rendered.
+    """
+    st.session_state.current_step = node
+    for state_key, session_key in SESSION_STATE_KEYS.items():
+        if update and state_key in update:
+            st.session_state[session_key] = get_blob_store().pack(update[state_key])
+    if update and "context_savings" in update:
+        st.session_state.context_savings = add_counts(st.session_state.context_savings, update["context_savings"])
+    if update and "speculation_stats" in update:
+        st.session_state.speculation_stats = add_counts(st.session_state.speculation_stats, update["speculation_stats"])
+    if update and "static_analysis_stats" in update:
+        st.session_state.static_analysis_stats = add_counts(st.session_state.static_analysis_stats, update["static_analysis_stats"])
+    if update and "review_loops" in update:
+        for reviewer, loop in update["review_loops"].items():
+            if loop.get("stopped"):
+                st.session_state.loop_stops[reviewer] = loop["stopped"]
+
+
+@st.cache_resource
+def get_event_loop():
+    """Return the event loop shared by every workflow run in this process."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="workflow-event-loop", daemon=True).start()
+    return loop
+
+
+# SDLC_CHECKPOINT_DB overrides it when the checkpointer is first created
+CHECKPOINT_DB = "checkpoints.sqlite"
+
+
+@st.cache_resource
+def get_checkpointer():
+    """Return the SQLite checkpointer that persists every run's progress to local disk."""
+    async def connect():
+        return AsyncSqliteSaver(await aiosqlite.connect(os.environ.get("SDLC_CHECKPOINT_DB", CHECKPOINT_DB)))
+
+    return asyncio.run_coroutine_threadsafe(connect(), get_event_loop()).result()
+
+
+# Runs whose last checkpoint is older than this are deleted, with their history; 0 keeps them
+RUN_MAX_AGE = float(os.environ.get("SDLC_RUN_MAX_AGE_DAYS", "30")) * 24 * 60 * 60
+CLEANUP_INTERVAL = 60 * 60
+
+
+async def cleanup_runs(checkpointer, blobs, history):
+    """Delete expired runs, then the blobs that no remaining checkpoint references."""
+    await checkpointer.setup()
+    async with checkpointer.lock, checkpointer.conn.execute("SELECT DISTINCT thread_id FROM checkpoints") as cursor:
+        threads = [row[0] async for row in cursor]
+    expired = 0
+    for thread_id in threads if RUN_MAX_AGE else []:
+        latest = await checkpointer.aget_tuple(run_config(thread_id))
+        if latest and datetime.fromisoformat(latest.checkpoint["ts"]).timestamp() < time.time() - RUN_MAX_AGE:
+            await checkpointer.adelete_thread(thread_id)
+            await asyncio.to_thread(history.delete_run, thread_id)
+            expired += 1
+    # References are stored verbatim in the serialized checkpoints and pending writes
+    referenced = set()
+    for query in ("SELECT checkpoint FROM checkpoints", "SELECT value FROM writes"):
+        async with checkpointer.lock, checkpointer.conn.execute(query) as cursor:
+            async for (data,) in cursor:
+                referenced |= find_refs(data or b"")
+    collected = await asyncio.to_thread(blobs.collect, referenced)
+    print(f"[cleanup] {expired} expired runs deleted, {collected} blobs collected, {len(referenced)} referenced")
+
+
+@st.cache_resource
+def start_cleanup():
+    """Run cleanup_runs every CLEANUP_INTERVAL on the shared event loop, once per process."""
+    # Resolved here: creating the checkpointer blocks on the event loop the cleanup runs on
+    stores = get_checkpointer(), get_blob_store(), get_history_store()
+
+    async def run_periodically():
+        while True:
+            try:
+                await cleanup_runs(*stores)
+            except Exception as e:
+                print(f"[cleanup] failed: {e!r}")
+            await asyncio.sleep(CLEANUP_INTERVAL)
+
+    return asyncio.run_coroutine_threadsafe(run_periodically(), get_event_loop())
+
+
+def run_config(run_id):
+    """Return the graph config for a run; the run ID selects its checkpoint thread."""
+    # Only a backstop: every review loop is bounded by its LOOP_POLICIES entry
+    return {"recursion_limit": 100, "configurable": {"thread_id": run_id}}
+
+
+def get_run_snapshot(workflow, run_id):
+    """Return the last checkpointed state of a run, or None if it has not started."""
+    future = asyncio.run_coroutine_threadsafe(workflow.aget_state(run_config(run_id)), get_event_loop())
+    snapshot = future.result()
+    return snapshot if snapshot.values else None
+
+
+def stream_workflow(workflow, inputs, config, stream_mode="updates"):
+    """Run the workflow on the shared event loop and yield its events in the calling thread."""
+    events = queue.Queue()
+
+    async def produce():
+        try:
+            async for event in workflow.astream(inputs, config=config, stream_mode=stream_mode):
+                events.put(event)
+        finally:
+            events.put(None)
+
+    future = asyncio.run_coroutine_threadsafe(produce(), get_event_loop())
+    try:
+        while (event := events.get()) is not None:
+            yield event
+        # Re-raise any error from the run
+        future.result()
+    finally:
+        future.cancel()
+
+
+# When set, runs are submitted to the job API (server.py) and this app only renders their progress
+API_URL = os.environ.get("SDLC_API_URL", "").rstrip("/")
+
+
+def get_remote_snapshot(api_url, run_id):
+    """Return a job's last checkpointed state from the job API, or None if it has not started."""
+    with urllib.request.urlopen(f"{api_url}/jobs/{run_id}/state") as response:
+        state = json.load(response)
+    return SimpleNamespace(values=state["values"], next=tuple(state["next"])) if state["values"] else None
+
+
+def stream_job(api_url, run_id, inputs):
+    """Submit a run to the job API and yield its progress events like stream_workflow does."""
+    spec = {key: inputs[key] for key in ("project_name", "project_description", "features")}
+    request = urllib.request.Request(
+        f"{api_url}/jobs", data=json.dumps({**spec, "job_id": run_id}).encode(),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    urllib.request.urlopen(request).close()
+    with urllib.request.urlopen(f"{api_url}/jobs/{run_id}/events") as response:
+        kind = ""
+        for line in response:
+            line = line.decode().rstrip("\n")
+            if line.startswith("event: "):
+                kind = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if kind == "token":
+                    yield "messages", (AIMessageChunk(content=data["text"]), {"langgraph_node": data["node"]})
+                elif kind == "node":
+                    yield "updates", {data["node"]: data["update"]}
+                elif kind == "end" and data["status"] == "failed":
+                    raise RuntimeError(data["error"])
+
+
+# How much of the accumulated message history each node sends after its prompt.
+#   "full"    - every prior message (the original behaviour)
+#   "last_n"  - only the last n messages
+#   "summary" - a rolling digest: the opening lines of each earlier message
+#   "fields"  - no history; the prompt already embeds the state fields it needs
+DEFAULT_CONTEXT_POLICY = {"mode": "fields"}
+CONTEXT_POLICIES = {
+    # Sees its previous stories and the reviewer's suggestions on a revision loop
+    "Auto Generate User Stories": {"mode": "last_n", "n": 2},
+    # Sees the previous code and the review that sent it back
+    "Generate Code": {"mode": "last_n", "n": 2},
+    # QA feedback alone lacks the code and tests it refers to
+    "Fix Code After QA": {"mode": "summary", "lines": 8, "max_chars": 6000},
+}
+
+
+def approx_tokens(messages):
+    """Roughly estimate the token count of a message list (about 4 characters per token)."""
+    return sum(len(m.content if isinstance(m, BaseMessage) else str(m)) for m in messages) // 4
+
+
+def summarize_history(messages, lines, max_chars):
+    """Build a digest of the history from the first lines of each message, newest first."""
+    digest = []
+    budget = max_chars
+    for message in reversed(messages):
+        content = message.content if isinstance(message, BaseMessage) else str(message)
+        head = "\n".join(content.strip().split("\n")[:lines])
+        if len(head) > budget:
+            break
+        digest.insert(0, head)
+        budget -= len(head)
+    return "**Summary of earlier steps:**\n\n" + "\n\n---\n\n".join(digest)
+
+
+def context_window(node, state):
+    """Apply the node's context policy to the message history.
+
+    Returns the messages to send and a state update recording the tokens saved.
+    """
+    messages = state["messages"]
+    policy = CONTEXT_POLICIES.get(node, DEFAULT_CONTEXT_POLICY)
+    if policy["mode"] == "full":
+        history = messages
+    elif policy["mode"] == "last_n":
+        history = messages[-policy["n"]:] if policy["n"] else []
+    elif policy["mode"] == "summary":
+        history = [summarize_history(messages, policy["lines"], policy["max_chars"])] if messages else []
+    else:
+        history = []
+    saved = approx_tokens(messages) - approx_tokens(history)
+    print(f"[context] {node}: sending ~{approx_tokens(history)} history tokens, saved ~{saved}")
+    return history, {"context_savings": {node: saved}}
+
+
+# Bounds on each review loop, keyed by the reviewer node that closes it.
+#   max_iterations - review rounds after which the current version is accepted
+#   min_change     - fraction of lines that must change between rounds to keep looping
+# Counts are per run, so a QA failure re-entering code review uses up its remaining rounds.
+DEFAULT_LOOP_POLICY = {"max_iterations": 3, "min_change": 0.02}
+LOOP_POLICIES = {
+    # Fixes for machine findings; once they stop converging, the reviewers see what remains
+    "Static Analysis": {"max_iterations": 3, "min_change": 0.002},
+    # Code fixes are small patches to a large file set, so only near-identical rounds count as converged
+    "Code Review": {"max_iterations": 3, "min_change": 0.002},
+    "Security Review": {"max_iterations": 3, "min_change": 0.002},
+    "QA Testing": {"max_iterations": 2, "min_change": 0.002},
+}
+
+
+def changed_fraction(old, new):
+    """Return the fraction of lines that differ between two versions (0.0 when identical)."""
+    matcher = difflib.SequenceMatcher(None, old.splitlines(), new.splitlines(), autojunk=False)
+    return 1.0 - matcher.ratio()
+
+
+def review_round(node, state, version, step, retry_step="Feedback", accept_step="Approved"):
+    """Record one round of a review loop and decide whether it may loop again.
+
+    A retry_step decision is turned into accept_step when the loop has used up its
+    rounds, the version barely changed since the last round, or it matches an older
+    version (the fixes are oscillating), so the run goes on with the current version
+    instead of looping until the recursion limit. Returns the step and a state update.
+    """
+    policy = LOOP_POLICIES.get(node, DEFAULT_LOOP_POLICY)
+    loop = state.get("review_loops", {}).get(node, {})
+    iterations = loop.get("iterations", 0) + 1
+    digest = hashlib.sha256(version.encode()).hexdigest()[:16]
+    hashes = loop.get("hashes", [])
+    stopped = ""
+    if step == retry_step:
+        if digest in hashes[:-1]:
+            stopped = "oscillating between earlier versions"
+        elif "version" in loop and changed_fraction(loop["version"], version) < policy["min_change"]:
+            stopped = f"converged (less than {policy['min_change']:.1%} of lines changed)"
+        elif iterations >= policy["max_iterations"]:
+            stopped = f"reached the limit of {policy['max_iterations']} rounds"
+    if stopped:
+        print(f"[loops] {node}: {stopped}; accepting the current version")
+        step = accept_step
+    update = {"iterations": iterations, "hashes": hashes + [digest], "version": version, "stopped": stopped}
+    return step, {"review_loops": {node: update}}
+
+
+# Most reviews approve, so a review gate can start the nodes its "Approved" route leads
+# to while the review is still running, and hand their results over if it approves.
+# Enable with SDLC_SPECULATIVE=1; the cost is the discarded work when a review sends feedback.
+SPECULATIVE = os.environ.get("SDLC_SPECULATIVE", "") == "1"
+#   decision - state key holding the gate's routed decision
+#   targets  - the nodes its "Approved" route runs
+SPECULATION_GATES = {
+    "Product Owner Review": {"decision": "product_decision", "targets": ["Generate Functional Documentation", "Generate Technical Documentation"]},
+    "Design Review": {"decision": "design_decision", "targets": ["Generate Code"]},
+    # Security Review runs concurrently and is joined in Merge Reviews, so this covers both
+    "Code Review": {"decision": "code_decision", "targets": ["Write Test Cases"]},
+    "Test Cases Review": {"decision": "test_cases_decision", "targets": ["QA Testing"]},
+}
+SPECULATION_TARGETS = {target for gate in SPECULATION_GATES.values() for target in gate["targets"]}
+
+
+def start_speculation(nodes, gate, state):
+    """Start the gate's approved successors on the current state; call from inside the gate node.
+
+    They run under their own node name, so their LLM calls are attributed to them, and
+    tagged nostream so a discarded result never reaches the live output.
+    """
+    metadata = ensure_config().get("metadata", {})
+    speculation = {"started": time.perf_counter(), "finished": {}, "tasks": {}}
+
+    async def run(target):
+        update = await RunnableLambda(nodes[target], name=f"{target} (speculative)").ainvoke(
+            dict(state), {"metadata": {**metadata, "langgraph_node": target}, "tags": [TAG_NOSTREAM]}
         )
+        speculation["finished"][target] = time.perf_counter()
+        return update
 
+    for target in SPECULATION_GATES[gate]["targets"]:
+        speculation["tasks"][target] = asyncio.create_task(run(target))
+    return speculation
+
+
+async def finish_speculation(speculation, approved):
+    """Keep the speculative results if the review approved, otherwise cancel them.
+
+    Returns the state update: kept results go into `speculation` for the successors to
+    pick up, and the time that overlapped the review is recorded as saved or wasted.
+    """
+    decided = time.perf_counter()
+    tasks = speculation["tasks"]
+    if not approved:
+        for task in tasks.values():
+            task.cancel()
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    stash, stats = {}, {"started": len(tasks)}
+    for target, result in zip(tasks, results):
+        overlap = min(speculation["finished"].get(target, decided), decided) - speculation["started"]
+        if approved and not isinstance(result, BaseException):
+            stash[target] = {"update": result, "saved": overlap}
+            continue
+        if approved:
+            print(f"[speculation] {target} failed: {result!r}; it will run normally")
+        stash[target] = None
+        stats["misses"] = stats.get("misses", 0) + 1
+        stats["time_wasted"] = stats.get("time_wasted", 0.0) + overlap
+    return {"speculation": stash, "speculation_stats": stats}
+
+
+def discard_speculation(state, targets):
+    """Drop kept speculative results whose gate was overruled, e.g. by the other reviewer."""
+    stale = [target for target in targets if (state.get("speculation") or {}).get(target)]
+    if not stale:
+        return {}
+    print(f"[speculation] discarding {', '.join(stale)}")
+    return {
+        "speculation": {target: None for target in stale},
+        "speculation_stats": {"misses": len(stale), "time_wasted": sum(state["speculation"][t]["saved"] for t in stale)},
+    }
+
+
+def speculative_gate(gate, node, nodes):
+    """Wrap a review gate node to run its approved successors while the review is in flight."""
+
+    @functools.wraps(node)
+    async def run(state):
+        speculation = start_speculation(nodes, gate, state)
+        try:
+            update = await node(state)
+        except BaseException:
+            await finish_speculation(speculation, approved=False)
+            raise
+        approved = update[SPECULATION_GATES[gate]["decision"]] == "Approved"
+        return {**update, **await finish_speculation(speculation, approved)}
+    return run
+
+
+def speculation_summary(stats):
+    """One-line hit rate and time saved of a run's speculation."""
+    started = stats.get("started", 0)
+    return (
+        f"Speculation: {stats.get('hits', 0)}/{started} hits ({stats.get('hits', 0) / started if started else 0:.0%}), "
+        f"{stats.get('time_saved', 0.0):.1f}s saved, {stats.get('time_wasted', 0.0):.1f}s of discarded work"
+    )
+
+
+def static_analysis_summary(stats):
+    """One-line count of the static analysis runs and the review calls they saved."""
+    return (
+        f"Static analysis: {stats.get('failed', 0)}/{stats.get('runs', 0)} runs sent the code back for fixes, "
+        f"saving {stats.get('review_calls_saved', 0)} LLM review calls"
+    )
 
-def parse_code_blocks(code_content):
-    """Parse code content to extract multiple code files."""
-    code_files = {}
-    current_file = None
-    current_content = []
-    lines = code_content.split('\n')
-    
-    for line in lines:
-        if line.startswith("```") and "```" in line[:4]:
-            # Check if we're closing a code block
-            if current_file:
-                code_files[current_file] = '\n'.join(current_content)
-                current_file = None
-                current_content = []
-            # Check if we're opening a new code block with a filename
-            elif len(line) > 3:
-                lang_or_filename = line[3:].strip()
-                # If it has an extension, treat as filename
-                if "." in lang_or_filename and not lang_or_filename.startswith("json") and not lang_or_filename.startswith("xml"):
-                    current_file = lang_or_filename
-                    current_content = []
-        elif current_file:
-            current_content.append(line)
-    
-    # Handle case where no explicit filenames were found
-    if not code_files and code_content:
-        # Try to identify language-specific code blocks
-        import re
-        code_blocks = re.findall(r"```(\w+)(.*?)```", code_content, re.DOTALL)
-        
-        for idx, (lang, code) in enumerate(code_blocks):
-            if lang in ["python", "py"]:
-                code_files[f"main_{idx}.py"] = code.strip()
-            elif lang in ["javascript", "js"]:
-                code_files[f"script_{idx}.js"] = code.strip()
-            elif lang in ["html"]:
-                code_files[f"index_{idx}.html"] = code.strip()
-            elif lang in ["css"]:
-                code_files[f"style_{idx}.css"] = code.strip()
-            else:
-                code_files[f"file_{idx}.{lang}"] = code.strip()
-    
-    return code_files
+
+def use_speculation(name, node):
+    """Wrap a successor node to return the result its gate computed speculatively, if any."""
+
+    @functools.wraps(node)
+    async def run(state):
+        kept = (state.get("speculation") or {}).get(name)
+        if not kept:
+            return await node(state)
+        print(f"[speculation] {name}: using the result computed during the review ({kept['saved']:.2f}s saved)")
+        return {**kept["update"], "speculation": {name: None}, "speculation_stats": {"hits": 1, "time_saved": kept["saved"]}}
+    return run
+
+
+def history_entries(update):
+    """Return the {artifact: text} versions a node's update writes; each code file is its own artifact."""
+    entries = {
+        key: update[key] for key in SESSION_STATE_KEYS
+        if key != "code_files" and isinstance(update.get(key), str) and update[key]
+    }
+    if update.get("code_files"):
+        # generated_code is only the files rendered together
+        entries.pop("generated_code", None)
+        entries.update({f"code/{path}": content for path, content in update["code_files"].items()})
+    return entries
+
+
+def record_history(name, update):
+    """Record the artifacts in a node's update as new versions in its run's history."""
+    run_id = ensure_config().get("configurable", {}).get("thread_id")
+    if not run_id or not update:
+        return
+    history = get_history_store()
+    for key, text in get_blob_store().unpack(history_entries(update)).items():
+        history.record(run_id, key, name, text)
+
+
+def with_history(name, node):
+    """Wrap a node so the artifacts it writes are kept as versions; speculative results count once applied."""
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def run(state):
+            update = await node(state)
+            # Diffing a long document takes a while; keep it off the shared event loop
+            await asyncio.to_thread(record_history, name, update)
+            return update
+        return run
+
+    @functools.wraps(node)
+    def run(state):
+        update = node(state)
+        record_history(name, update)
+        return update
+    return run
+
+
+def merge_dicts(left, right):
+    """Reducer that merges per-key updates, the right side winning."""
+    return {**(left or {}), **(right or {})}
+
+
+def add_counts(left, right):
+    """Reducer that sums per-key counters across node updates."""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
 
 
 # Define the State class for LangGraph
@@ -217,12 +763,17 @@ class State (TypedDict):
   feedback_design:str
   design_decision:str
   generated_code:str
+  code_files: dict
+  changed_files: list[str]
+  code_patch_applied: bool
   code_decision:str
   code_feedback:str
   code_quality_score: str
   security_decision: str
   security_feedback: str
   security_review_response:str
+  review_decision: str
+  review_feedback: str
   fix_security_response:str
   test_cases_decision:str
   test_cases_feedback:str
@@ -231,6 +782,14 @@ class State (TypedDict):
   qa_testing_decision:str
   qa_testing_feedback:str
   qa_final_feedback:str
+  qa_test_results: dict
+  context_savings: Annotated[dict, add_counts]
+  review_loops: Annotated[dict, merge_dicts]
+  speculation: Annotated[dict, merge_dicts]
+  speculation_stats: Annotated[dict, add_counts]
+  static_decision: str
+  static_findings: str
+  static_analysis_stats: Annotated[dict, add_counts]
 
 
 # Define the structured output for product owner routing
@@ -270,24 +829,56 @@ class TestCasesReviewRoute(BaseModel):
 
 
 
-def create_langgraph_workflow(api_key):
+# Reviewers run on a cheaper model than generators; see model_routing.MODEL_PROFILES
+DEFAULT_PROFILE = os.environ.get("SDLC_MODEL_PROFILE", "gemini")
+
+
+@st.cache_resource
+def get_llm_cache():
+    """Return the on-disk LLM response cache, registered once for every model call."""
+    return enable_llm_cache()
+
+
+@st.cache_resource
+def get_llm(model, api_keys):
+    """Return the chat model client shared by all sessions for a "provider:model" and credentials.
+
+    api_keys is a tuple of (provider, key) pairs; anything else (such as "offline") leaves the keys to the environment.
+    """
+    get_llm_cache()
+    # Every session's calls to this model share one requests/tokens per minute budget
+    return create_chat_model(model, dict(api_keys) if isinstance(api_keys, tuple) else {})
+
+
+def create_langgraph_workflow(api_keys, profile=DEFAULT_PROFILE, speculative=SPECULATIVE):
     """Create and return the LangGraph workflow."""
-    if not api_key:
-        st.error("Please provide an OpenAI API key to continue.")
+    if not api_keys:
+        st.error(f"Please provide the {' and '.join(p.upper() for p in profile_providers(profile))} API key to continue.")
         return None
-    
-    # Initialize LLM instance
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
-    router_product_owner_route = llm.with_structured_output(ProductOwnerRoute)
-    router_design_route = llm.with_structured_output(DesignRoute)
-    router_code_review_route = llm.with_structured_output(CodeReviewRoute)
-    router_security_review_route = llm.with_structured_output(SecurityReviewRoute)
-    router_test_cases_review_route = llm.with_structured_output(TestCasesReviewRoute)
+
+    return build_workflow(profile, api_keys, speculative)
+
+
+@st.cache_resource
+def build_workflow(profile, api_keys, speculative=SPECULATIVE):
+    """Build and compile the workflow graph once per model profile, credentials and speculation mode.
+
+    The compiled graph holds no per-session data, so every session shares it.
+    """
+    def llm_for(node):
+        return get_llm(node_model(node, profile), api_keys)
+
+    blobs = get_blob_store()
+
+    router_product_owner_route = llm_for("Product Owner Review").with_structured_output(ProductOwnerRoute)
+    router_design_route = llm_for("Design Review").with_structured_output(DesignRoute)
+    router_code_review_route = llm_for("Code Review").with_structured_output(CodeReviewRoute)
+    router_security_review_route = llm_for("Security Review").with_structured_output(SecurityReviewRoute)
+    router_test_cases_review_route = llm_for("Test Cases Review").with_structured_output(TestCasesReviewRoute)
 
 
     
-    def generate_user_stories(state:State):
-        st.session_state.current_step = "Generating User Stories"
+    async def generate_user_stories(state:State):
         user_story_prompt = f"""
         You are an expert Agile product owner specializing in user story generation. Your goal is to create well-structured user stories
         that align with Agile best practices and ensure clarity for development teams. Each user story must adhere to the following:
@@ -321,16 +912,15 @@ def create_langgraph_workflow(api_key):
         Please generate the structured user stories below:
         """
 
-        response = llm.invoke([user_story_prompt] + state["messages"])
-        st.session_state.user_stories = response.content
-        return {"messages":response.content,"user_stories":response.content}
+        history, savings = context_window("Auto Generate User Stories", state)
+        response = await llm_for("Auto Generate User Stories").ainvoke([user_story_prompt] + history)
+        return {"messages":response.content,"user_stories":response.content, **savings}
             
     
-    def product_owner_review(state:State):
-        st.session_state.current_step = "Product Owner Review"
+    async def product_owner_review(state:State):
         message_content = state["messages"][-1].content
 
-        decision = router_product_owner_route.invoke(
+        decision = await router_product_owner_route.ainvoke(
             [
                 SystemMessage(content="""Route the input to Approved or Feedback based on user stories quality.
                     If 'Approved', leave feedback empty or provide positive reinforcement.
@@ -340,18 +930,18 @@ def create_langgraph_workflow(api_key):
         )
         print(f"Decision Step: {decision.step}")
         print(f"Feedback: {decision.feedback}")
-        st.session_state.product_feedback = decision.feedback
-        return {"product_decision":decision.step,"product_feedback":decision.feedback}
+        step, loop = review_round("Product Owner Review", state, state["user_stories"], decision.step)
+        return {"product_decision":step,"product_feedback":decision.feedback, **loop}
     
     def route_product_decision(state:State):
         """Routes the workflow based on product owner decision."""
         if state["product_decision"] == "Feedback":
             return "Feedback"
         else:
-            return "Approved"
+            # Fan out: both documents only need the user stories, so they run concurrently
+            return ["Functional", "Technical"]
     
-    def revise_user_stories(state:State):
-        st.session_state.current_step = "Revising User Stories"
+    async def revise_user_stories(state:State):
         revise_prompt = f"""
         You are an expert Agile product owner evaluating and refining user stories based on stakeholder feedback. Your goal is to analyze the provided user stories and suggest general areas for improvement to ensure they are production-ready and align with Agile best practices.
 
@@ -382,13 +972,12 @@ Provide **general recommendations** rather than rewriting individual user storie
 
 Return your feedback in a **concise and actionable** format, ensuring it is applicable across multiple stories without listing each one separately.
         """
-        revised_response = llm.invoke([revise_prompt] + state["messages"])
-        st.session_state.revised_user_stories = revised_response.content
-        return {"messages":revised_response.content,"final_product_feedback":revised_response.content}
+        history, savings = context_window("Revise User Stories", state)
+        revised_response = await llm_for("Revise User Stories").ainvoke([revise_prompt] + history)
+        return {"messages":revised_response.content,"final_product_feedback":revised_response.content, **savings}
 
 
-    def generate_technical_documents(state:State):
-        st.session_state.current_step = "Generating Technical Documentation"
+    async def generate_technical_documents(state:State):
         technical_documentation_prompt = f"""
         ## **Technical Documentation Generation Prompt**
 
@@ -478,14 +1067,13 @@ Return your feedback in a **concise and actionable** format, ensuring it is appl
         """
 
 
-        technical_response = llm.invoke([technical_documentation_prompt] + state["messages"])
+        history, savings = context_window("Generate Technical Documentation", state)
+        technical_response = await llm_for("Generate Technical Documentation").ainvoke([technical_documentation_prompt] + history)
         print("Technical Response:")
-        st.session_state.technical_documentation = technical_response.content
-        return {"messages":technical_response.content,"technical_documentation":technical_response.content}
+        return {"messages":technical_response.content,"technical_documentation":technical_response.content, **savings}
 
     
-    def generate_functional_documents(state:State):
-        st.session_state.current_step = "Generating Functional Documentation"
+    async def generate_functional_documents(state:State):
         functional_documentation_prompt = f"""
         ## **Functional Specification Document (FSD) Prompt**
 
@@ -568,14 +1156,13 @@ Return your feedback in a **concise and actionable** format, ensuring it is appl
         - Maintain **technical accuracy and consistency** throughout the document.
         """
 
-        functional_response = llm.invoke([functional_documentation_prompt] + state["messages"])
+        history, savings = context_window("Generate Functional Documentation", state)
+        functional_response = await llm_for("Generate Functional Documentation").ainvoke([functional_documentation_prompt] + history)
         print("Functional Response:")
-        st.session_state.functional_documentation = functional_response.content
-        return {"messages":functional_response.content,"functional_documentation":functional_response.content}
+        return {"messages":functional_response.content,"functional_documentation":functional_response.content, **savings}
 
     
-    def generate_combined_documentation(state: State):
-        st.session_state.current_step = "Generating Combined Documentation"
+    async def generate_combined_documentation(state: State):
         feedback_design = state.get("feedback_design", "")
         improved_combine_doc = f"""
 # Comprehensive Project Documentation  
@@ -602,16 +1189,15 @@ Return your feedback in a **concise and actionable** format, ensuring it is appl
 Ensure that the output **strictly follows Markdown syntax** for proper rendering.
 """
 
-        combine_message = llm.invoke([improved_combine_doc] + state["messages"])
-        st.session_state.combined_documentation = combine_message.content
-        return {"messages":combine_message.content,"combined_documentation": combine_message.content}
+        history, savings = context_window("Generate Combined Documentation", state)
+        combine_message = await llm_for("Generate Combined Documentation").ainvoke([improved_combine_doc] + history)
+        return {"messages":combine_message.content,"combined_documentation": combine_message.content, **savings}
 
     
-    def design_review(state: State):
-        st.session_state.current_step = "Design Review"
+    async def design_review(state: State):
         """Routes the user stories for approval or revision."""
         message_content = state["combined_documentation"]  # Extract content from last message
-        decision = router_design_route.invoke(
+        decision = await router_design_route.ainvoke(
             [
                 SystemMessage(content="""Route the input to Approved or Feedback based on technical and functional document quality.
                 If 'Approved', leave feedback as "" or provide positive reinforcement.
@@ -619,12 +1205,9 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
                 HumanMessage(content=message_content),
             ]
         )
-        
-        # Store in session state for UI
-        
-        st.session_state.design_feedback = decision.feedback
-        
-        return {"design_decision": decision.step, "feedback_design": decision.feedback}
+
+        step, loop = review_round("Design Review", state, state["combined_documentation"], decision.step)
+        return {"design_decision": step, "feedback_design": decision.feedback, **loop}
     
     def route_design_decision(state: State):
         """Routes the workflow based on product owner decision."""
@@ -633,12 +1216,13 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
         else:  # "Approved"
             return "Approved"
         
-    def code_review(state:State):
-        st.session_state.current_step = "Code Review"
+    async def code_review(state:State):
         """Routes the user stories for approval or revision."""
-        message_content = state["generated_code"]  # Extract content from last message
+        message_content = code_under_review(state)  # Only the files touched by the last fix
+        if state.get("static_findings"):
+            message_content += f"\n\n## Static analysis findings\n{state['static_findings']}"
         # Use router_code_review_route instead of CodeReviewRoute
-        decision = router_code_review_route.invoke(
+        decision = await router_code_review_route.ainvoke(
                 [
                     SystemMessage(content="""Route the code to Approved or Feedback based on quality.
                     If 'Approved', you can still provide minor suggestions for improvement.
@@ -649,22 +1233,16 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
 
         print(f"Decision Step: {decision.step}")
         print(f"Feedback: {decision.feedback}")
-        return {"code_decision": decision.step, "code_feedback": decision.feedback}
-    
-    def route_code_review_decision(state: State):
-        """Routes the workflow based on code review decision."""
-        if state["code_decision"] == "Feedback":
-            return "Feedback"
-        else:  # "Approved"
-            return "Approved"  # Move to the next step in your workflow
-        
-    
-    def security_review(state:State):
-        st.session_state.current_step = "Security Review"
+        step, loop = review_round("Code Review", state, current_code(state), decision.step)
+        return {"code_decision": step, "code_feedback": decision.feedback, **loop}
+
+    async def security_review(state:State):
         """Routes the user stories for approval or revision."""
-        message_content = state["generated_code"]  # Extract content from last message
+        message_content = code_under_review(state)  # Only the files touched by the last fix
+        if state.get("static_findings"):
+            message_content += f"\n\n## Static analysis findings\n{state['static_findings']}"
         # Use router_code_review_route instead of CodeReviewRoute
-        decision = router_security_review_route.invoke(
+        decision = await router_security_review_route.ainvoke(
                 [
                     SystemMessage(content="""Route the code to Approved or Feedback based on security issues.
                     If 'Approved', you can still provide minor suggestions for improvement.
@@ -675,19 +1253,10 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
 
         print(f"Decision Step: {decision.step}")
         print(f"Feedback: {decision.feedback}")
-        st.session_state.security_feedback = decision.feedback
-        return {"security_decision": decision.step, "security_feedback": decision.feedback}
-    
+        step, loop = review_round("Security Review", state, current_code(state), decision.step)
+        return {"security_decision": step, "security_feedback": decision.feedback, **loop}
 
-    def route_security_review_decision(state: State):
-        """Routes the workflow based on security review decision."""
-        if state["security_decision"] == "Feedback":
-            return "Feedback"
-        else:  # "Approved"
-            return "Approved"  # Move to the next step in your workflow
-        
-    def test_cases_review(state: State):
-        st.session_state.current_step = "Test Cases Review"
+    async def test_cases_review(state: State):
         """Reviews test cases for approval or revision."""
         # Construct a prompt to review the test cases
         test_review_prompt = f"""
@@ -711,7 +1280,7 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
         """
 
         # Use the structured output router
-        decision = router_test_cases_review_route.invoke(
+        decision = await router_test_cases_review_route.ainvoke(
             [
                 SystemMessage(content="""Review the test cases and determine if they provide adequate coverage.
                 If coverage is below 80% or missing critical test scenarios, the decision must be 'Feedback'."""),
@@ -720,8 +1289,8 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
         )
         print(f"Decision Step: {decision.step}")
         print(f"Feedback: {decision.feedback}")
-        st.session_state.test_cases_feedback = decision.feedback
-        return {"test_cases_decision": decision.step, "test_cases_feedback": decision.feedback}
+        step, loop = review_round("Test Cases Review", state, state["write_test_cases_response"], decision.step)
+        return {"test_cases_decision": step, "test_cases_feedback": decision.feedback, **loop}
 
     def route_test_cases_decision(state: State):
         """Routes the workflow based on test cases decision."""
@@ -730,9 +1299,8 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
         else:  # "Approved"
             return "Approved"
         
-    def qa_testing(state: State):
-        st.session_state.current_step = "QA Testing"
-        """Performs QA testing on the code and determines if it passes or fails."""
+    async def simulated_qa_testing(state: State):
+        """Asks the model to assess the code against the test cases; returns (decision, feedback)."""
         qa_testing_prompt = f"""
         You are an expert QA tester tasked with executing test cases and reporting results.
 
@@ -770,9 +1338,9 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
                 description="Detailed feedback including test results, issues found, and recommendations for improvement"
             )
 
-        router_qa_testing = llm.with_structured_output(QATestingResult)
+        router_qa_testing = llm_for("QA Testing").with_structured_output(QATestingResult)
 
-        test_results = router_qa_testing.invoke(
+        test_results = await router_qa_testing.ainvoke(
             [
                 SystemMessage(content="""Execute a thorough QA testing simulation and provide detailed results.
                 If any critical tests fail or if overall pass rate is below 90%, the decision must be 'Failed'."""),
@@ -780,16 +1348,86 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
             ]
         )
 
-        print(f"QA Testing Decision: {test_results.decision}")
-        print(f"QA Testing Feedback: {test_results.feedback}")
+        return test_results.decision, test_results.feedback
+
+    async def qa_testing(state: State):
+        """Runs the generated tests against the generated code in the sandbox and determines if it passes or fails."""
+        code_files = state.get("code_files") or parse_code_blocks(state["generated_code"])
+        result = await get_sandbox_pool().arun(code_files, parse_code_blocks(state["write_test_cases_response"]))
+        if tests_ran(result):
+            decision, feedback = run_decision(result), format_report(result)
+            summary = {key: result[key] for key in ("passed", "failed", "errors", "skipped", "unavailable", "duration")}
+        else:
+            # Tests in another language, or needing packages that are not installed here
+            print("[qa] none of the generated tests could run here; falling back to the model's assessment")
+            decision, feedback = await simulated_qa_testing(state)
+            summary = {"simulated": 1, "unavailable": result["unavailable"] if result else 0}
 
-        st.session_state.qa_testing_feedback = test_results.feedback
+        print(f"QA Testing Decision: {decision}")
+        print(f"QA Testing Feedback: {feedback}")
 
+
+        step, loop = review_round("QA Testing", state, current_code(state), decision,
+                                  retry_step="Failed", accept_step="Passed")
         return {
-            "qa_testing_decision": test_results.decision,
-            "qa_testing_feedback": test_results.feedback
+            "qa_testing_decision": step,
+            "qa_testing_feedback": feedback,
+            "qa_test_results": summary,
+            **loop
         }
 
+    async def static_analysis(state: State):
+        """Checks the code locally; code with errors goes back to the fixer without spending the LLM reviews."""
+        code_files = state.get("code_files") or parse_code_blocks(state["generated_code"])
+        report = await analyze_project(code_files, get_analysis_pool())
+        print(f"[static analysis] {report['files']} files: {report['errors']} errors, {report['warnings']} warnings")
+        step, loop = review_round("Static Analysis", state, current_code(state),
+                                  "Feedback" if report["errors"] else "Approved")
+        findings = format_findings(report) if report["findings"] else ""
+        if step == "Feedback":
+            # Skips the concurrent Code Review and Security Review calls for this round
+            return {
+                "static_decision": step,
+                "static_findings": findings,
+                "review_decision": "Feedback",
+                "review_feedback": f"### Static Analysis\n{findings}",
+                "static_analysis_stats": {"runs": 1, "failed": 1, "review_calls_saved": 2},
+                **loop
+            }
+        return {"static_decision": step, "static_findings": findings, "static_analysis_stats": {"runs": 1}, **loop}
+
+    def route_static_analysis(state: State):
+        """Sends code with errors straight to the fixer, and the rest to both reviews."""
+        if state["static_decision"] == "Feedback":
+            return "Fix Code After Review"
+        else:  # "Approved"
+            return ["Code Review", "Security Review"]
+
+    def merge_reviews(state: State):
+        """Joins the concurrent code and security reviews into one verdict and one list of feedback."""
+        feedback = []
+        if state["code_decision"] == "Feedback":
+            feedback.append(f"### Code Review\n{state['code_feedback']}")
+        if state["security_decision"] == "Feedback":
+            feedback.append(f"### Security Review\n{state['security_feedback']}")
+        # Code Review may have kept test cases written for code that Security Review rejected
+        discarded = discard_speculation(state, SPECULATION_GATES["Code Review"]["targets"]) if feedback else {}
+        return {"review_decision": "Feedback" if feedback else "Approved", "review_feedback": "\n\n".join(feedback), **discarded}
+
+    def route_review_decision(state: State):
+        """Routes the workflow based on the merged review verdict."""
+        if state["review_decision"] == "Feedback":
+            return "Feedback"
+        else:  # "Approved"
+            return "Approved"
+
+    def route_code_fix(state: State):
+        """Re-check patched code, or regenerate it when the edits could not be applied."""
+        if state["code_patch_applied"]:
+            return "Static Analysis"
+        else:
+            return "Generate Code"
+
     def route_qa_testing_decision(state: State):
         """Routes the workflow based on QA testing results."""
         if state["qa_testing_decision"] == "Failed":
@@ -798,8 +1436,7 @@ Ensure that the output **strictly follows Markdown syntax** for proper rendering
             return "Passed"
 
     
-    def generate_code_from_documentation(state: State):
-        st.session_state.current_step = "Generating Code"
+    async def generate_code_from_documentation(state: State):
         
         code_generation_prompt = f"""
 🔹 **Software Implementation Request** 🔹
@@ -817,12 +1454,9 @@ You are a highly skilled **software engineer** specializing in **building scalab
 ## **📖 Refined Technical & Functional Documentation**
 {state["combined_documentation"]}
 
-## **Code Feedback**
+## **Code and Security Review Fixes**
 {state.get("code_quality_score", "")}
 
-## **Security Review Feedback**
-{state.get("security_review_response", "")}
-
 ## **QA Testing Feedback**
 {state.get("qa_final_feedback", "")}
 ---
@@ -875,27 +1509,29 @@ You are a highly skilled **software engineer** specializing in **building scalab
 🚀 **Deliver the code in a well-structured format.**
 """
 
-        code_response = llm.invoke([code_generation_prompt] + state["messages"])
+        history, savings = context_window("Generate Code", state)
+        code_response = await llm_for("Generate Code").ainvoke([code_generation_prompt] + history)
 
         generated_code = code_response.content  # Store the generated code separately
 
         print(generated_code)
-        
-        # Parse code files and store in session state
-        code_files = parse_code_blocks(generated_code)
-        st.session_state.code_files = code_files
-        st.session_state.generated_code = generated_code
-        st.session_state.workflow_complete = True
 
-        return {"messages": code_response.content, "generated_code": code_response.content}
+        return {
+            "messages": code_response.content,
+            "generated_code": code_response.content,
+            "code_files": parse_code_blocks(code_response.content),
+            "changed_files": [],
+            **savings
+        }
     
-    def fix_code_after_code_review(state:State):
-        st.session_state.current_step = "Fix Code After Code Review"
+    async def fix_code_after_review(state: State):
+        """Fixes the code review and security review findings in one pass."""
         code_review_prompt = f"""
         🔍 **Comprehensive Code Review Request** 🔍
 
         You are an **expert software engineer and code reviewer** with deep expertise in **clean code, performance optimization, and security best practices**.
-        Your task is to **critically evaluate** the following code and provide **a detailed, structured review**.
+        Your task is to **critically evaluate** the following code and **fix the issues you find** with targeted edits,
+        addressing the code quality and security feedback below together.
 
         ---
 
@@ -906,10 +1542,10 @@ You are a highly skilled **software engineer** specializing in **building scalab
         ---
 
         ## **📖 Generated Code for Review**
-        {state["generated_code"]}
+        {current_code(state)}
 
-        ## **Feedback for code**
-        {state.get("code_feedback", "")}
+        ## **Code Review and Security Review Feedback**
+        {state["review_feedback"]}
 
         ---
 
@@ -947,62 +1583,19 @@ You are a highly skilled **software engineer** specializing in **building scalab
         ---
 
         ## **📌 Expected Output**
-        Provide a **structured review** with the following details:
         1.  **List of identified issues** categorized by severity (Critical, Major, Minor).
-        2. **Suggested improvements** for each issue.
-        3. **Approval Status**:
-        - ✅ **Approved**: If the code is production-ready.
-        - 📝 **Needs Revisions**: If improvements are necessary before approval.
-
-        🚀 **Your insights will help ensure high-quality, secure, and maintainable software.**
+        2. **The fixes** for those issues as search/replace edits.
+        {EDIT_FORMAT_INSTRUCTIONS}
         """
 
-        code_review_response = llm.invoke([code_review_prompt] + state["messages"])
-        st.session_state.code_feedback = code_review_response.content
+        history, savings = context_window("Fix Code After Review", state)
+        code_review_response = await llm_for("Fix Code After Review").ainvoke([code_review_prompt] + history)
         print(code_review_response.content)
-        return {"messages":code_review_response.content,"code_quality_score":code_review_response.content}
-    
-
-    def fix_code_after_security(state: State):
-        st.session_state.current_step = "Fix Code After Security Review"
-        """Fixes the code based on security review feedback."""
-        fix_security_prompt = f"""
-        You are an expert security engineer conducting a security assessment of the provided code.  
-
-        ### **Project Context:**  
-        - **Project Name:** {state["project_name"]}  
-        - **Project Description:** {state["project_description"]}  
-
-        ### **Code Under Review:** 
-        {state["generated_code"]}
-
-        ### **Identified Security Issues:**  
-        {state["security_feedback"]}  
-
-    ### **Your Task:**  
-    Analyze the provided code and offer **general security improvement suggestions**, focusing on:  
+        patch = apply_code_fix(state, code_review_response.content)
+        return {"messages":code_review_response.content,"code_quality_score":code_review_response.content, **patch, **savings}
 
-    1. **Vulnerability Assessment:** Confirm whether all identified issues are valid and if any additional risks exist.  
-    2. **Secure Coding Best Practices:** Suggest industry-standard security improvements (e.g., input validation, encryption, least privilege, secure dependencies).  
-    3. **Code Maintainability & Performance:** Ensure security fixes do not introduce unnecessary complexity or performance overhead.  
-    4. **Common Attack Vectors:** Highlight potential risks such as **SQL injection, XSS, CSRF, authentication flaws, and insecure dependencies**.  
-    5. **General Security Guidelines:** Provide recommendations for improving the overall security posture of the project.  
 
-    ### **Expected Output:**  
-    Instead of fixing the code, provide **actionable insights** on improving security. Your response should include:  
-    - **Key areas of concern** in the code.  
-    - **Best practices** for addressing vulnerabilities.  
-    - **General security principles** applicable to the project.  
-
-    Ensure that your recommendations are clear, concise, and follow **secure coding principles**.
-    """
-        fix_security_response = llm.invoke([fix_security_prompt] + state["messages"])
-        st.session_state.security_review_response = fix_security_response.content
-        return {"messages":fix_security_response.content,"security_review_response":fix_security_response.content}
-
-
-    def write_test_cases(state: State):
-        st.session_state.current_step = "Write Test Cases"
+    async def write_test_cases(state: State):
         """Generates comprehensive test cases for the code."""
         test_cases_prompt = f"""
         You are an expert QA engineer specializing in test case development. Your goal is to generate **comprehensive, high-quality test cases** that ensure full code coverage and reliability.
@@ -1034,13 +1627,12 @@ You are a highly skilled **software engineer** specializing in **building scalab
         Please provide **structured test cases** in the most appropriate testing framework based on the code language.
 """
 
-        write_test_cases_response = llm.invoke([test_cases_prompt] + state["messages"])
-        st.session_state.write_test_cases_response = write_test_cases_response.content
-        return {"messages": write_test_cases_response.content, "write_test_cases_response": write_test_cases_response.content}
+        history, savings = context_window("Write Test Cases", state)
+        write_test_cases_response = await llm_for("Write Test Cases").ainvoke([test_cases_prompt] + history)
+        return {"messages": write_test_cases_response.content, "write_test_cases_response": write_test_cases_response.content, **savings}
 
 
-    def fix_test_cases_after_review(state: State):
-        st.session_state.current_step = "Fix Test Cases After Review"
+    async def fix_test_cases_after_review(state: State):
         """Fixes test cases based on review feedback."""
         fix_test_cases_prompt = f"""
         You are an expert QA engineer conducting a review of test cases to improve their effectiveness and alignment with best practices.
@@ -1074,61 +1666,79 @@ You are a highly skilled **software engineer** specializing in **building scalab
         Ensure that your suggestions are **clear, actionable, and aligned with software testing standards**.
         """
 
-        fix_test_cases_response = llm.invoke([fix_test_cases_prompt] + state["messages"])
-        st.session_state.test_cases_response = fix_test_cases_response.content
-        return {"messages": fix_test_cases_response.content, "test_cases_response": fix_test_cases_response.content}
+        history, savings = context_window("Fix Test Cases After Review", state)
+        fix_test_cases_response = await llm_for("Fix Test Cases After Review").ainvoke([fix_test_cases_prompt] + history)
+        return {"messages": fix_test_cases_response.content, "test_cases_response": fix_test_cases_response.content, **savings}
 
 
-    def fix_code_after_qa_feedback(state: State):
-        st.session_state.current_step = "Fix Code After QA Feedback"
+    async def fix_code_after_qa_feedback(state: State):
         """Fixes code based on QA testing feedback."""
         qa_fix_prompt = f"""
-        You are an expert software engineer tasked with reviewing QA feedback and providing improvement suggestions.
+        You are an expert software engineer tasked with reviewing QA feedback and fixing the reported issues.
 
         **Project Name**: {state["project_name"]}
         **Project Description**: {state["project_description"]}
 
+        **Code**:
+        {current_code(state)}
+
         **QA Testing Feedback**:
         {state["qa_testing_feedback"]}
 
         **Your Task**:
         - Analyze the QA feedback and identify key issues
-        - Provide specific recommendations for fixing functional defects
-        - Suggest improvements for error handling and exception management
-        - Highlight potential optimizations for performance-related concerns
-        - Ensure recommendations align with best coding practices
-        - Identify any gaps in existing test coverage and suggest additional tests
+        - Fix the functional defects
+        - Improve error handling and exception management where the feedback requires it
+        - Address performance-related concerns
+        - Ensure the fixes align with best coding practices
 
-        Your output should contain **detailed suggestions** for each issue reported, ensuring the development team can make precise improvements without ambiguity.
+        Start with a short list of the issues you are fixing, then give the fixes as search/replace edits.
+        {EDIT_FORMAT_INSTRUCTIONS}
 """
 
 
-        fix_qa_response = llm.invoke([qa_fix_prompt] + state["messages"])
-        st.session_state.qa_final_feedback = fix_qa_response.content
-        return {"messages": fix_qa_response.content, "qa_final_feedback": fix_qa_response.content}
+        history, savings = context_window("Fix Code After QA", state)
+        fix_qa_response = await llm_for("Fix Code After QA").ainvoke([qa_fix_prompt] + history)
+        patch = apply_code_fix(state, fix_qa_response.content)
+        return {"messages": fix_qa_response.content, "qa_final_feedback": fix_qa_response.content, **patch, **savings}
                 
     
     # Create the graph
     builder = StateGraph(State)
+    # Node functions by name, for starting a gate's successors speculatively
+    nodes = {}
+
+    def add_node(name, node):
+        # Nodes read the texts behind the state's blob references and write references back
+        node = with_blobs(node, blobs)
+        nodes[name] = node
+        if speculative and name in SPECULATION_GATES:
+            node = speculative_gate(name, node, nodes)
+        elif speculative and name in SPECULATION_TARGETS:
+            node = use_speculation(name, node)
+        node = with_history(name, node)
+        # A node whose LLM call is rate limited reruns after a backoff shared by its model's callers
+        builder.add_node(name, with_backoff(node, node_rate_limiter(name, profile)))
 
     # Add nodes
-    builder.add_node("Auto Generate User Stories", generate_user_stories)
-    builder.add_node("Product Owner Review", product_owner_review)
-    builder.add_node("Revise User Stories", revise_user_stories)
-    builder.add_node("Generate Functional Documentation", generate_functional_documents)
-    builder.add_node("Generate Technical Documentation", generate_technical_documents)
-    builder.add_node("Generate Combined Documentation", generate_combined_documentation)
-    builder.add_node("Design Review", design_review)
-    builder.add_node("Generate Code", generate_code_from_documentation)
-    builder.add_node("Code Review",code_review)
-    builder.add_node("Fix Code After Code Review", fix_code_after_code_review)
-    builder.add_node("Security Review",security_review)
-    builder.add_node("Fix Code After Security Review", fix_code_after_security)
-    builder.add_node("Write Test Cases", write_test_cases)
-    builder.add_node("Test Cases Review", test_cases_review)
-    builder.add_node("Fix Test Cases After Review", fix_test_cases_after_review)
-    builder.add_node("QA Testing", qa_testing)
-    builder.add_node("Fix Code After QA", fix_code_after_qa_feedback)
+    add_node("Auto Generate User Stories", generate_user_stories)
+    add_node("Product Owner Review", product_owner_review)
+    add_node("Revise User Stories", revise_user_stories)
+    add_node("Generate Functional Documentation", generate_functional_documents)
+    add_node("Generate Technical Documentation", generate_technical_documents)
+    add_node("Generate Combined Documentation", generate_combined_documentation)
+    add_node("Design Review", design_review)
+    add_node("Generate Code", generate_code_from_documentation)
+    builder.add_node("Static Analysis", with_history("Static Analysis", with_blobs(static_analysis, blobs)))
+    add_node("Code Review",code_review)
+    add_node("Security Review",security_review)
+    builder.add_node("Merge Reviews", with_history("Merge Reviews", with_blobs(merge_reviews, blobs)))
+    add_node("Fix Code After Review", fix_code_after_review)
+    add_node("Write Test Cases", write_test_cases)
+    add_node("Test Cases Review", test_cases_review)
+    add_node("Fix Test Cases After Review", fix_test_cases_after_review)
+    add_node("QA Testing", qa_testing)
+    add_node("Fix Code After QA", fix_code_after_qa_feedback)
 
     # Add edges
     builder.add_edge(START, "Auto Generate User Stories")
@@ -1138,16 +1748,19 @@ You are a highly skilled **software engineer** specializing in **building scalab
         "Product Owner Review",
         route_product_decision,
         {
-            "Approved": "Generate Functional Documentation",
+            "Functional": "Generate Functional Documentation",
+            "Technical": "Generate Technical Documentation",
             "Feedback": "Revise User Stories"
         }
     )
 
 
     builder.add_edge("Revise User Stories","Auto Generate User Stories")
-    builder.add_edge("Product Owner Review", "Generate Technical Documentation")
-    builder.add_edge("Generate Technical Documentation", "Generate Combined Documentation")
-    builder.add_edge("Generate Functional Documentation", "Generate Combined Documentation")
+    # Join: combined documentation waits for both documentation branches
+    builder.add_edge(
+        ["Generate Functional Documentation", "Generate Technical Documentation"],
+        "Generate Combined Documentation"
+    )
     builder.add_edge("Generate Combined Documentation", "Design Review")
 
     builder.add_conditional_edges(
@@ -1159,30 +1772,33 @@ You are a highly skilled **software engineer** specializing in **building scalab
         }
     )
 
-    builder.add_edge("Generate Code", "Code Review")
-
+    # Code that fails the local checks is fixed before any LLM reviews it. Both
+    # reviews only read the code, so they run concurrently and are joined into
+    # one verdict; their feedback is then fixed together in a single pass
+    builder.add_edge("Generate Code", "Static Analysis")
     builder.add_conditional_edges(
-        "Code Review",
-        route_code_review_decision,
-        {
-            "Approved": "Security Review",
-            "Feedback": "Fix Code After Code Review"
-        }
+        "Static Analysis",
+        route_static_analysis,
+        ["Code Review", "Security Review", "Fix Code After Review"]
     )
-
-    builder.add_edge("Fix Code After Code Review", "Generate Code")
-
+    builder.add_edge(["Code Review", "Security Review"], "Merge Reviews")
 
     builder.add_conditional_edges(
-        "Security Review",
-        route_security_review_decision,
+        "Merge Reviews",
+        route_review_decision,
         {
             "Approved": "Write Test Cases",
-            "Feedback": "Fix Code After Security Review"
+            "Feedback": "Fix Code After Review"
         }
     )
 
-    builder.add_edge("Fix Code After Security Review", "Security Review")
+    # Fixes are applied as patches; only a fix that cannot be applied regenerates the code
+    builder.add_conditional_edges(
+        "Fix Code After Review",
+        route_code_fix,
+        ["Static Analysis", "Generate Code"]
+    )
+
     builder.add_edge("Write Test Cases", "Test Cases Review")
 
     builder.add_conditional_edges(
@@ -1209,9 +1825,14 @@ You are a highly skilled **software engineer** specializing in **building scalab
     )
 
 
-    builder.add_edge("Fix Code After QA", "Generate Code")
+    builder.add_conditional_edges(
+        "Fix Code After QA",
+        route_code_fix,
+        ["Static Analysis", "Generate Code"]
+    )
 
-    graph = builder.compile()
+    # Checkpoint after every step so an interrupted run resumes where it stopped
+    graph = builder.compile(checkpointer=get_checkpointer())
     return graph
 
 
@@ -1228,15 +1849,15 @@ def display_progress_tracker():
         "Generate Combined Documentation",
         "Design Review",
         "Generate Code",
+        "Static Analysis",
         "Code Review",
-        "Fix Code After Code Review",
         "Security Review",
-        "Fix Code After Security Review",
+        "Fix Code After Review",
         "Write Test Cases",
         "Test Cases Review",
         "Fix Test Cases After Review",
         "QA Testing",
-        "Fix Code After QA Feedback"
+        "Fix Code After QA"
     ]
     
     current_step = st.session_state.current_step
@@ -1250,17 +1871,167 @@ def display_progress_tracker():
             st.sidebar.markdown(f"- <span class='step-complete'>✅ {step}</span>", unsafe_allow_html=True)
 
 
+def display_rate_limit_stats():
+    """Display each shared rate limiter's queueing delay and 429 counters in the sidebar."""
+    st.sidebar.markdown("### Rate Limiter")
+    for limiter in rate_limiters():
+        stats = limiter.stats()
+        st.sidebar.caption(
+            f"**{limiter.provider}:{limiter.model}** · {stats['requests']} requests · {stats['queued']} queued "
+            f"(avg {stats['avg_queue_time']:.2f}s, max {stats['max_queue_time']:.2f}s) · "
+            f"{stats['rate_limit_errors']} 429s ({stats['backoff_time']:.1f}s backoff)"
+        )
+
+
+def display_model_routing(profile=DEFAULT_PROFILE):
+    """Show which models the generator and reviewer nodes run on."""
+    models = MODEL_PROFILES[profile]
+    st.sidebar.caption(f"Generators: {models['generator']} · Reviewers: {models['reviewer']}")
+
+
+def display_cache_stats():
+    """Display LLM response cache hit/miss counters in the sidebar."""
+    stats = get_llm_cache().stats()
+    st.sidebar.markdown("### LLM Cache")
+    st.sidebar.caption(
+        f"{stats['hits']} hits / {stats['misses']} misses · "
+        f"{stats['entries']} entries ({stats['bytes'] / 1024:.0f} KiB)"
+    )
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def version_diff(run_id, key, old, new):
+    """Unified diff between two versions of an artifact; cached, since versions never change."""
+    history = get_history_store()
+    return diff_versions(history.text(run_id, key, old), history.text(run_id, key, new), f"{key} v{old}", f"{key} v{new}")
+
+
+def display_version_history(run_id):
+    """Let the user pick an artifact and two of its versions, and show only the lines that changed."""
+    versions = get_history_store().versions(run_id)
+    if not versions:
+        st.info("No versions recorded for this run yet.")
+        return
+    stats = get_history_store().stats(run_id)
+    st.caption(
+        f"{stats['versions']} versions of {len(versions)} artifacts · "
+        f"{stats['text_bytes'] / 1024:.0f} KiB of text stored as {stats['stored_bytes'] / 1024:.0f} KiB of deltas"
+    )
+    # Artifacts that were revised come first
+    keys = sorted(versions, key=lambda key: (len(versions[key]) == 1, key))
+    key = st.selectbox("Artifact", keys, format_func=lambda key: f"{key} ({len(versions[key])} version{'s' if len(versions[key]) > 1 else ''})", key="history_artifact")
+    labels = {v["version"]: f"v{v['version']} · {v['node']} · {v['size'] / 1024:.1f} KiB" for v in versions[key]}
+    if len(labels) < 2:
+        st.info(f"{key} has a single version, written by {versions[key][0]['node']}.")
+        return
+    numbers = list(labels)
+    old_column, new_column = st.columns(2)
+    old = old_column.selectbox("From", numbers, index=len(numbers) - 2, format_func=labels.get, key="history_from")
+    new = new_column.selectbox("To", numbers, index=len(numbers) - 1, format_func=labels.get, key="history_to")
+    diff, truncated = version_diff(run_id, key, old, new)
+    st.code(diff or "No changes.", language="diff")
+    if truncated:
+        st.caption(f"Showing the first {MAX_DIFF_LINES} lines of the diff.")
+
+
+def message_text(message):
+    """Return the text of a message or chunk, whose content may be a list of parts."""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in message.content)
+
+
+class LiveOutput:
+    """Render streamed tokens into one placeholder per running node."""
+
+    # Re-rendering markdown on every token is costly for long outputs
+    RENDER_INTERVAL = 0.1
+    # Nodes whose code files are listed as soon as their fences close
+    CODE_NODES = {"Generate Code"}
+
+    def __init__(self, container):
+        self.container = container
+        self.streams = {}
+
+    def add_token(self, node, text):
+        if not text:
+            return
+        if node not in self.streams:
+            with self.container:
+                self.streams[node] = {"placeholder": st.empty(), "text": "", "rendered": 0.0,
+                                      "parser": CodeBlockParser() if node in self.CODE_NODES else None, "files": []}
+        stream = self.streams[node]
+        stream["text"] += text
+        if stream["parser"]:
+            stream["files"] += [path for path, _ in stream["parser"].feed(text)]
+        if time.monotonic() - stream["rendered"] >= self.RENDER_INTERVAL:
+            self._render(node, stream)
+
+    def _render(self, node, stream):
+        files = f" · {len(stream['files'])} files ready: {', '.join(stream['files'])}" if stream["files"] else ""
+        stream["placeholder"].markdown(f"**⏳ {node}**{files}\n\n{stream['text']}")
+        stream["rendered"] = time.monotonic()
+
+    def finish(self, node):
+        """Clear a node's live output once its final result is in the session state."""
+        stream = self.streams.pop(node, None)
+        if stream:
+            stream["placeholder"].empty()
+
+
+def display_run_metrics(placeholder, metrics):
+    """Render live per-node token, latency and cost totals into a sidebar placeholder."""
+    totals = metrics.totals()
+    with placeholder.container():
+        st.markdown("### Run Metrics")
+        st.caption(
+            f"{totals['calls']} LLM calls · {totals['prompt_tokens']} in / {totals['completion_tokens']} out tokens · "
+            f"{totals['llm_time']:.1f}s LLM time · {totals['retries']} retries · ${totals['cost']:.4f}"
+        )
+        rows = [
+            {
+                "node": node,
+                "calls": n["calls"],
+                "iterations": n["iterations"],
+                "tokens in": n["prompt_tokens"],
+                "tokens out": n["completion_tokens"],
+                "time (s)": round(n["wall_time"], 2),
+                "TTFT (s)": round(n["time_to_first_token"], 2) if n["time_to_first_token"] is not None else None,
+                "retries": n["retries"],
+                "cost ($)": round(n["cost"], 5),
+            }
+            for node, n in sorted(metrics.by_node().items(), key=lambda item: -item[1]["wall_time"])
+        ]
+        if rows:
+            st.dataframe(rows, hide_index=True)
+
+
 def main():
     """Main function to run the Streamlit app."""
     load_css()
     initialize_state()
-    api_key = setup_api_key()
+    api_keys = setup_api_key()
+    if not API_URL:
+        # With a job API the server owns the runs and their blobs, and cleans them up
+        start_cleanup()
     
     st.title("🚀 LangGraph Development Assistant")
     st.markdown("Generate user stories, technical documentation, and implementation code from project details.")
     
+    # Reopen an interrupted or finished run after a browser refresh
+    if st.session_state.run_id and not st.session_state.workflow_started and api_keys:
+        if API_URL:
+            snapshot = get_remote_snapshot(API_URL, st.session_state.run_id)
+        else:
+            snapshot = get_run_snapshot(create_langgraph_workflow(api_keys), st.session_state.run_id)
+        if snapshot:
+            restore_session_state(snapshot)
+
     # Display progress tracker in sidebar
     display_progress_tracker()
+    display_model_routing()
+    display_cache_stats()
+    display_rate_limit_stats()
     
     # Project Details Input
     st.header("Project Details")
@@ -1286,12 +2057,18 @@ def main():
                 st.session_state.project_description = project_description
                 st.session_state.features = [f for f in features_input.split("\n") if f.strip()]
                 st.session_state.workflow_started = True
+                st.session_state.workflow_complete = False
+                st.session_state.run_id = uuid.uuid4().hex
+                st.session_state.loop_stops = {}
+                st.session_state.speculation_stats = {}
+                st.session_state.static_analysis_stats = {}
+                st.query_params["run_id"] = st.session_state.run_id
     
     # Start workflow if all inputs are provided
     if st.session_state.workflow_started:
-        workflow = create_langgraph_workflow(api_key)
+        workflow = None if API_URL else create_langgraph_workflow(api_keys)
         
-        if workflow and not st.session_state.workflow_complete:
+        if (workflow or API_URL) and not st.session_state.workflow_complete:
             with st.spinner("Running development workflow... This may take a few minutes..."):
                 # Create inputs dictionary for workflow
                 inputs = {
@@ -1300,26 +2077,71 @@ def main():
                     "features": st.session_state.features,
                     "messages": []
                 }
-                
-                # Run the workflow
-                for event in workflow.stream(inputs,config={"recursion_limit": 50}):
-                    # Debug output if needed
-                    # st.write(event)
-                    pass
-                
-                st.success("Workflow completed successfully!")
-                st.session_state.workflow_complete = True
+
+                # Record per-node tokens, latency and cost for every LLM call
+                metrics = RunMetrics(st.session_state.run_id)
+                metrics_placeholder = st.sidebar.empty()
+
+                if API_URL:
+                    # The job API queues the run (or resumes its checkpoint) and records its metrics
+                    events = stream_job(API_URL, st.session_state.run_id, inputs)
+                else:
+                    # A checkpointed run continues from its last completed node
+                    if get_run_snapshot(workflow, st.session_state.run_id):
+                        inputs = None
+                    config = run_config(st.session_state.run_id)
+                    config["callbacks"] = [metrics]
+                    events = stream_workflow(workflow, inputs, config, stream_mode=["updates", "messages"])
+
+                # Run the workflow, rendering each node's output as its tokens arrive
+                live_output = LiveOutput(st.container())
+                try:
+                    for mode, event in events:
+                        if mode == "messages":
+                            chunk, chunk_metadata = event
+                            live_output.add_token(chunk_metadata.get("langgraph_node", ""), message_text(chunk))
+                            continue
+                        for node, update in event.items():
+                            sync_session_state(node, update)
+                            live_output.finish(node)
+                        if not API_URL:
+                            display_run_metrics(metrics_placeholder, metrics)
+                except Exception as e:
+                    st.error(f"Workflow stopped after '{st.session_state.current_step}': {e}")
+                    st.button("Resume Workflow")
+                else:
+                    st.success("Workflow completed successfully!")
+                    st.session_state.workflow_complete = True
+                    for reviewer, reason in st.session_state.loop_stops.items():
+                        st.info(f"{reviewer} loop stopped early: {reason}. Its latest feedback was not applied.")
+                    if st.session_state.context_savings:
+                        st.caption(f"Context policies saved ~{sum(st.session_state.context_savings.values())} prompt tokens: {st.session_state.context_savings}")
+                    if st.session_state.speculation_stats:
+                        st.caption(speculation_summary(st.session_state.speculation_stats))
+                    if st.session_state.static_analysis_stats:
+                        st.caption(static_analysis_summary(st.session_state.static_analysis_stats))
+                finally:
+                    if not API_URL:
+                        print(f"Run metrics written to {metrics.write_json()}")
                 
         # Display results in tabs
         if st.session_state.user_stories:
-            tabs = st.tabs(["User Stories", "Documentation", "Generated Code","Fix Code After Code Review","Fix Code After Security","Fix Test Cases After Review","Fix Code After QA Feedback"])
+            # Session state holds blob references; texts resolves them as they are rendered
+            texts = BlobView({key: st.session_state[key] for key in SESSION_STATE_KEYS.values()}, get_blob_store())
+            if st.session_state.workflow_complete:
+                create_bundle_download(
+                    artifact_files({key: st.session_state[session_key] for key, session_key in SESSION_STATE_KEYS.items()}),
+                    f"{st.session_state.project_name.lower().replace(' ', '_')}_project.zip",
+                    "Download Project Bundle (docs, code and tests)"
+                )
+            tabs = st.tabs(["User Stories", "Documentation", "Generated Code","Fix Code After Review","Fix Test Cases After Review","Fix Code After QA Feedback","Version History"])
             
             # User Stories Tab
             with tabs[0]:
                 st.header("User Story Generation")
                 
                 with st.expander("📝 Initial User Stories", expanded=True):
-                    st.markdown(st.session_state.user_stories)
+                    st.markdown(texts["user_stories"])
                     create_download_link(
                         st.session_state.user_stories,
                         "initial_user_stories.md",
@@ -1328,11 +2150,11 @@ def main():
                 
                 if st.session_state.product_feedback:
                     with st.expander("💬 Product Owner Feedback", expanded=True):
-                        st.info(st.session_state.product_feedback)
+                        st.info(texts["product_feedback"])
                 
                 if st.session_state.revised_user_stories:
                     with st.expander("✅ Revised User Stories", expanded=True):
-                        st.markdown(st.session_state.revised_user_stories)
+                        st.markdown(texts["revised_user_stories"])
                         create_download_link(
                             st.session_state.revised_user_stories,
                             "revised_user_stories.md",
@@ -1345,8 +2167,8 @@ def main():
                 
                 if st.session_state.technical_documentation:
                     with st.expander("📊 Technical Documentation", expanded=True):
-                        print(st.session_state.technical_documentation)
-                        st.markdown(st.session_state.technical_documentation)
+                        print(texts["technical_documentation"])
+                        st.markdown(texts["technical_documentation"])
                         create_download_link(
                             st.session_state.technical_documentation,
                             f"{st.session_state.project_name.lower().replace(' ', '_')}_technical_documentation.md",
@@ -1355,8 +2177,8 @@ def main():
                 
                 if st.session_state.functional_documentation:
                     with st.expander("📋 Functional Documentation", expanded=True):
-                        print(st.session_state.functional_documentation)
-                        st.markdown(st.session_state.functional_documentation)
+                        print(texts["functional_documentation"])
+                        st.markdown(texts["functional_documentation"])
                         create_download_link(
                             st.session_state.functional_documentation,
                             f"{st.session_state.project_name.lower().replace(' ', '_')}_functional_documentation.md",
@@ -1365,7 +2187,7 @@ def main():
                 
                 if st.session_state.combined_documentation:
                     with st.expander("📚 Combined Documentation", expanded=True):
-                        st.markdown(st.session_state.combined_documentation)
+                        st.markdown(texts["combined_documentation"])
                         create_download_link(
                             st.session_state.combined_documentation,
                             f"{st.session_state.project_name.lower().replace(' ', '_')}_combined_documentation.md",
@@ -1374,7 +2196,7 @@ def main():
                 
                 if st.session_state.design_feedback:
                     with st.expander("💬 Design Review Feedback", expanded=False):
-                        st.info(st.session_state.design_feedback)
+                        st.info(texts["design_feedback"])
             
             # Generated Code Tab
             with tabs[2]:
@@ -1386,7 +2208,7 @@ def main():
                     # Display each code file in an expander
                     for filename, content in st.session_state.code_files.items():
                         with st.expander(f"📄 {filename}", expanded=False):
-                            st.code(content, language=filename.split('.')[-1])
+                            st.code(get_blob_store().unpack(content), language=filename.split('.')[-1])
                             create_download_link(
                                 content,
                                 filename,
@@ -1395,81 +2217,55 @@ def main():
                     
                     # Option to download all files as a zip
                     if st.session_state.code_files:
-                        import zipfile
-                        import io
-                        
-                        zip_buffer = io.BytesIO()
-                        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                            for filename, content in st.session_state.code_files.items():
-                                zip_file.writestr(filename, content)
-                        
-                        st.download_button(
-                            label="Download All Code Files (ZIP)",
-                            data=zip_buffer.getvalue(),
-                            file_name=f"{st.session_state.project_name.lower().replace(' ', '_')}_code.zip",
-                            mime="application/zip"
+                        create_bundle_download(
+                            st.session_state.code_files,
+                            f"{st.session_state.project_name.lower().replace(' ', '_')}_code.zip",
+                            "Download All Code Files (ZIP)"
                         )
                 elif st.session_state.generated_code:
                     st.markdown("### Raw Generated Code")
-                    st.code(st.session_state.generated_code)
+                    st.code(texts["generated_code"])
                     create_download_link(
                         st.session_state.generated_code,
                         "generated_code.md",
                         "Download Generated Code"
                     )
 
-            # Fix Code After Code Review Tab
+            # Fix Code After Review Tab
             with tabs[3]:
-                st.header("Fix Code After Code Review")
+                st.header("Fix Code After Code and Security Review")
+
+                if st.session_state.review_feedback:
+                    with st.expander("Code and Security Review Feedback", expanded=True):
+                        st.info(texts["review_feedback"])
 
                 if st.session_state.code_feedback:
-                    with st.expander("Code Review Feedback", expanded=True):
+                    with st.expander("Fixes Applied", expanded=True):
                         print("\n")
-                        print(st.session_state.code_feedback)
-                        st.info(st.session_state.code_feedback)
+                        print(texts["code_feedback"])
+                        st.info(texts["code_feedback"])
                 
                 if st.session_state.generated_code:
                     with st.expander("Fixed Code After Review", expanded=True):
-                        st.code(st.session_state.generated_code)
-                        create_download_link(
-                            st.session_state.fixed_code_after_code_review,
-                            "fixed_code_after_review.py",
-                            "Download Fixed Code"
-                        )
-
-            # Fix Code After Security Review Tab
-            with tabs[4]:
-                st.header("Fix Code After Security Review")
-                
-                if st.session_state.security_review_response:
-                    with st.expander("Security Review Feedback", expanded=True):
-                        print("\n")
-                        print(st.session_state.security_review_response)
-                        st.info(st.session_state.security_review_response)
-                
-                if st.session_state.generated_code:
-                    with st.expander("Fixed Code After Security Review", expanded=True):
-                        print("\n")
-                        print(st.session_state.generated_code)
-                        st.code(st.session_state.generated_code)
+                        st.code(texts["generated_code"])
                         create_download_link(
                             st.session_state.generated_code,
-                            "fixed_code_after_security.py",
+                            "fixed_code_after_review.py",
                             "Download Fixed Code"
                         )
 
             # Fix Test Cases After Review Tab
-            with tabs[5]:
+            with tabs[4]:
                 st.header("Fix Test Cases After Review")
                 
                 if st.session_state.write_test_cases_response:
                     with st.expander("Test Cases to Review", expanded=True):
-                        st.markdown(st.session_state.write_test_cases_response)
+                        st.markdown(texts["write_test_cases_response"])
                 
                 
                 if st.session_state.test_cases_response:
                     with st.expander("Fixed Test Cases After Review", expanded=True):
-                        st.markdown(st.session_state.test_cases_response)
+                        st.markdown(texts["test_cases_response"])
                         create_download_link(
                             st.session_state.test_cases_response,
                             "fixed_test_cases_after_review.md",
@@ -1478,26 +2274,34 @@ def main():
                 
                 if st.session_state.test_cases_feedback:
                     with st.expander("Test Cases Review Feedback", expanded=True):
-                        st.info(st.session_state.test_cases_feedback)
+                        st.info(texts["test_cases_feedback"])
         
             # Fix Code After QA Feedback Tab
-            with tabs[6]:
+            with tabs[5]:
                 st.header("Fix Code After QA Feedback")
                 
                 if st.session_state.qa_testing_feedback:
                     with st.expander("QA Testing Feedback", expanded=True):
-                        print(st.session_state.qa_testing_feedback)
-                        st.info(st.session_state.qa_final_feedback)
+                        print(texts["qa_testing_feedback"])
+                        if st.session_state.qa_test_results.get("simulated"):
+                            st.caption("No generated test could run locally; this is the model's assessment.")
+                        st.markdown(texts["qa_testing_feedback"])
+                        st.info(texts["qa_final_feedback"])
                 
                 if st.session_state.generated_code:
                     with st.expander("Fixed Code After QA Feedback", expanded=True):
-                        st.code(st.session_state.generated_code)
+                        st.code(texts["generated_code"])
                         create_download_link(
                             st.session_state.generated_code,
                             "fixed_code_after_qa.py",
                             "Download Fixed Code"
                         )
 
+            # Version History Tab
+            with tabs[6]:
+                st.header("Version History")
+                display_version_history(st.session_state.run_id)
+
             
 
 
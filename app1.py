@@ -4,12 +4,13 @@ import os
 from typing import TypedDict, Annotated, Literal, Optional, List
 from pydantic import Field, BaseModel
 from langgraph.graph import StateGraph, START, END
-from langchain_openai import ChatOpenAI
 from langgraph.graph.message import add_messages
 from langchain_core.messages import *
-import tempfile
-import base64
+import functools
 from dotenv import load_dotenv
+from llm_cache import enable_llm_cache
+from rate_limiter import with_backoff
+from model_routing import create_chat_model, node_model, node_rate_limiter
 
 load_dotenv()
 
@@ -38,13 +39,25 @@ class ProductOwnerRoute(BaseModel):
     step: Literal["Approved", "Feedback"] = Field(description="The next step in routing process")
     feedback: str = Field(description="If the user stories are not good, provide feedback on how to improve them.")
 
-# Initialize LLM instance
+# Reviewers run on a cheaper model than generators; see model_routing.MODEL_PROFILES
+MODEL_PROFILE = os.environ.get("SDLC_MODEL_PROFILE", "openai")
+
+# On-disk LLM response cache, registered once for every model call
+@st.cache_resource
+def get_llm_cache():
+    return enable_llm_cache()
+
+# Initialize LLM instance, shared by all sessions for a model and credential
 @st.cache_resource
-def get_llm():
-    return ChatOpenAI(model="gpt-4o")
+def get_llm(model, api_key):
+    get_llm_cache()
+    return create_chat_model(model, {"openai": api_key})
+
+def llm_for(node):
+    """Return the shared client of the model the node runs on."""
+    return get_llm(node_model(node, MODEL_PROFILE), os.environ.get("OPENAI_API_KEY"))
 
-llm = get_llm()
-router_product_owner_route = llm.with_structured_output(ProductOwnerRoute)
+router_product_owner_route = llm_for("Product Owner Review").with_structured_output(ProductOwnerRoute)
 
 # Functions from your original code
 def generate_user_stories(state: State):
@@ -68,7 +81,7 @@ def generate_user_stories(state: State):
     """
 
     messages = state.get("messages", [])
-    response = llm.invoke([user_story_prompt] + messages)
+    response = llm_for("Generate User Stories").invoke([user_story_prompt] + messages)
     messages.append(response)
 
     return {"messages": messages}
@@ -120,7 +133,7 @@ def revise_user_stories(state: State):
     """
 
     messages = state.get("messages", [])
-    revised_response = llm.invoke([revise_prompt] + messages)
+    revised_response = llm_for("Revise User Stories").invoke([revise_prompt] + messages)
     messages.append(revised_response)
 
     return {"messages": messages}
@@ -180,7 +193,7 @@ def generate_technical_documentation(state: State):
     '''
     
     messages = state.get("messages", [])
-    response = llm.invoke([technical_documentation_prompt] + messages)
+    response = llm_for("Generate Technical Documentation").invoke([technical_documentation_prompt] + messages)
     messages.append(response)
     
     technical_documentation = response.content  # Store the response separately
@@ -255,169 +268,185 @@ def generate_functional_documentation(state: State):
     '''
     
     messages = state.get("messages", [])
-    response = llm.invoke([functional_documentation_prompt] + messages)
+    response = llm_for("Generate Functional Documentation").invoke([functional_documentation_prompt] + messages)
     messages.append(response)
     
     functional_documentation = response.content  # Store the response separately
     
     return {"messages": messages, "functional_documentation": functional_documentation}
 
-def get_download_link(content, filename):
-    """Generate a download link for a text file."""
-    b64 = base64.b64encode(content.encode()).decode()
-    href = f'<a href="data:file/txt;base64,{b64}" download="{filename}">Download {filename}</a>'
-    return href
+def create_download_button(content, filename):
+    """Create a download button for a text file, encoded only when it is clicked."""
+    st.download_button(
+        label=f"Download {filename}",
+        data=functools.partial(str.encode, content),
+        file_name=filename,
+        mime="text/markdown",
+        on_click="ignore"
+    )
+
+@st.cache_resource
+def get_graph():
+    """Build and compile the documentation graph once, shared by all sessions."""
+    builder = StateGraph(State)
+
+    def add_node(name, node):
+        # Rerun the node after a shared backoff when its LLM call is rate limited
+        builder.add_node(name, with_backoff(node, node_rate_limiter(name, MODEL_PROFILE)))
+
+    # Add nodes
+    add_node("Generate User Stories", generate_user_stories)
+    add_node("Product Owner Review", product_owner_review)
+    add_node("Revise User Stories", revise_user_stories)
+    add_node("Generate Technical Documentation", generate_technical_documentation)
+    add_node("Generate Functional Documentation", generate_functional_documentation)
+
+    # Add edges
+    builder.add_edge(START, "Generate User Stories")
+    builder.add_edge("Generate User Stories", "Product Owner Review")
+    builder.add_edge("Revise User Stories", "Product Owner Review")
+    builder.add_edge("Product Owner Review", "Generate Technical Documentation")
+    builder.add_edge("Generate Technical Documentation", "Generate Functional Documentation")
+    builder.add_edge("Generate Functional Documentation", END)
+
+    # Add conditional edges
+    builder.add_conditional_edges(
+        "Product Owner Review",
+        route_product_decision,
+        {
+            "Revise User Stories": "Revise User Stories",
+            "Generate Technical Documentation": "Generate Technical Documentation"
+        }
+    )
+
+    return builder.compile()
 
-# Streamlit app UI
-st.title("Documentation Generator")
-st.subheader("Generate User Stories and Documentation from Project Details")
+def main():
+    """Render the Streamlit UI."""
+    st.title("Documentation Generator")
+    st.subheader("Generate User Stories and Documentation from Project Details")
 
-# Sidebar for project input
-with st.sidebar:
-    st.header("Project Details")
+    # Sidebar for project input
+    with st.sidebar:
+        st.header("Project Details")
     
-    project_name = st.text_input("Project Name", key="project_name")
-    project_description = st.text_area("Project Description", height=150, key="project_description")
+        project_name = st.text_input("Project Name", key="project_name")
+        project_description = st.text_area("Project Description", height=150, key="project_description")
     
-    features_input = st.text_area("Features (One per line)", height=150, 
-                                  help="Enter one feature per line", key="features_input")
+        features_input = st.text_area("Features (One per line)", height=150, 
+                                      help="Enter one feature per line", key="features_input")
     
-    if features_input:
-        features_list = [f.strip() for f in features_input.split("\n") if f.strip()]
-    else:
-        features_list = []
+        if features_input:
+            features_list = [f.strip() for f in features_input.split("\n") if f.strip()]
+        else:
+            features_list = []
     
-    # Display features count
-    st.caption(f"Number of features: {len(features_list)}")
+        # Display features count
+        st.caption(f"Number of features: {len(features_list)}")
     
-    generate_button = st.button("Generate Documentation", type="primary", 
-                               disabled=not (project_name and project_description and features_list))
-
-# Main content area
-if 'results' not in st.session_state:
-    st.session_state.results = None
-
-if generate_button:
-    with st.spinner("Generating documentation... This may take a few minutes."):
-        # Build the graph
-        builder = StateGraph(State)
-
-        # Add nodes
-        builder.add_node("Generate User Stories", generate_user_stories)
-        builder.add_node("Product Owner Review", product_owner_review)
-        builder.add_node("Revise User Stories", revise_user_stories)
-        builder.add_node("Generate Technical Documentation", generate_technical_documentation)
-        builder.add_node("Generate Functional Documentation", generate_functional_documentation)
-
-        # Add edges
-        builder.add_edge(START, "Generate User Stories")
-        builder.add_edge("Generate User Stories", "Product Owner Review")
-        builder.add_edge("Revise User Stories", "Product Owner Review")
-        builder.add_edge("Product Owner Review", "Generate Technical Documentation")
-        builder.add_edge("Generate Technical Documentation", "Generate Functional Documentation")
-        builder.add_edge("Generate Functional Documentation", END)
-
-        # Add conditional edges
-        builder.add_conditional_edges(
-            "Product Owner Review",
-            route_product_decision,
-            {
-                "Revise User Stories": "Revise User Stories",
-                "Generate Technical Documentation": "Generate Technical Documentation"
+        generate_button = st.button("Generate Documentation", type="primary", 
+                                   disabled=not (project_name and project_description and features_list))
+
+    # Main content area
+    if 'results' not in st.session_state:
+        st.session_state.results = None
+
+    if generate_button:
+        with st.spinner("Generating documentation... This may take a few minutes."):
+            graph = get_graph()
+
+            # Initialize state
+            initial_state = {
+                "project_name": project_name,
+                "project_description": project_description,
+                "features": features_list,
+                "messages": []
             }
-        )
-
-        # Compile graph
-        graph = builder.compile()
 
-        # Initialize state
-        initial_state = {
-            "project_name": project_name,
-            "project_description": project_description,
-            "features": features_list,
-            "messages": []
-        }
-
-        # Execute the graph and get results
-        results = graph.invoke(initial_state)
+            # Execute the graph and get results
+            results = graph.invoke(initial_state)
         
-        # Store results in session state
-        st.session_state.results = results
+            # Store results in session state
+            st.session_state.results = results
         
-        st.success("Documentation generated successfully!")
+            st.success("Documentation generated successfully!")
 
-# Display results if available
-if st.session_state.results:
-    results = st.session_state.results
+    # Display results if available
+    if st.session_state.results:
+        results = st.session_state.results
     
-    # Get the relevant data from the results
-    messages = results.get("messages", [])
+        # Get the relevant data from the results
+        messages = results.get("messages", [])
     
-    # Find initial user stories, feedback, and final user stories
-    initial_user_stories = None
-    feedback = results.get("feedback", "No feedback provided.")
-    final_user_stories = None
+        # Find initial user stories, feedback, and final user stories
+        initial_user_stories = None
+        feedback = results.get("feedback", "No feedback provided.")
+        final_user_stories = None
     
-    if len(messages) >= 1:
-        initial_user_stories = messages[0].content
+        if len(messages) >= 1:
+            initial_user_stories = messages[0].content
     
-    if results.get("product_decision") == "Feedback" and len(messages) >= 2:
-        final_user_stories = messages[-3].content  # Adjust based on your workflow
-    else:
-        final_user_stories = initial_user_stories
+        if results.get("product_decision") == "Feedback" and len(messages) >= 2:
+            final_user_stories = messages[-3].content  # Adjust based on your workflow
+        else:
+            final_user_stories = initial_user_stories
     
-    # User Stories Section
-    st.header("User Stories")
+        # User Stories Section
+        st.header("User Stories")
     
-    with st.expander("Initial User Stories", expanded=True):
-        st.markdown(initial_user_stories)
+        with st.expander("Initial User Stories", expanded=True):
+            st.markdown(initial_user_stories)
     
-    feedback_status = "✅ Approved" if results.get("product_decision") == "Approved" else "🔄 Needs Revision"
-    with st.expander(f"Feedback ({feedback_status})"):
-        st.markdown(feedback)
+        feedback_status = "✅ Approved" if results.get("product_decision") == "Approved" else "🔄 Needs Revision"
+        with st.expander(f"Feedback ({feedback_status})"):
+            st.markdown(feedback)
     
-    if results.get("product_decision") == "Feedback":
-        with st.expander("Revised User Stories", expanded=True):
-            st.markdown(final_user_stories)
+        if results.get("product_decision") == "Feedback":
+            with st.expander("Revised User Stories", expanded=True):
+                st.markdown(final_user_stories)
     
-    # Documentation Section
-    st.header("Documentation")
+        # Documentation Section
+        st.header("Documentation")
     
-    # Technical Documentation
-    tech_doc = results.get("technical_documentation", "")
-    with st.expander("Technical Documentation", expanded=True):
-        st.markdown(tech_doc)
+        # Technical Documentation
+        tech_doc = results.get("technical_documentation", "")
+        with st.expander("Technical Documentation", expanded=True):
+            st.markdown(tech_doc)
     
-    st.markdown(get_download_link(tech_doc, "technical_documentation.md"), unsafe_allow_html=True)
+        create_download_button(tech_doc, "technical_documentation.md")
     
-    # Functional Documentation
-    func_doc = results.get("functional_documentation", "")
-    with st.expander("Functional Documentation", expanded=True):
-        st.markdown(func_doc)
+        # Functional Documentation
+        func_doc = results.get("functional_documentation", "")
+        with st.expander("Functional Documentation", expanded=True):
+            st.markdown(func_doc)
     
-    st.markdown(get_download_link(func_doc, "functional_documentation.md"), unsafe_allow_html=True)
+        create_download_button(func_doc, "functional_documentation.md")
 
-else:
-    # Display instructions
-    st.info("👈 Fill in the project details in the sidebar and click 'Generate Documentation' to get started.")
+    else:
+        # Display instructions
+        st.info("👈 Fill in the project details in the sidebar and click 'Generate Documentation' to get started.")
     
-    col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
     
-    with col1:
-        st.subheader("What you'll get:")
-        st.markdown("""
-        - User stories based on your features
-        - Expert review and feedback
-        - Technical documentation
-        - Functional documentation
-        - Downloadable markdown files
-        """)
+        with col1:
+            st.subheader("What you'll get:")
+            st.markdown("""
+            - User stories based on your features
+            - Expert review and feedback
+            - Technical documentation
+            - Functional documentation
+            - Downloadable markdown files
+            """)
     
-    with col2:
-        st.subheader("Tips for best results:")
-        st.markdown("""
-        - Provide a clear project description
-        - List features one per line
-        - Be specific about project requirements
-        - Include user roles if possible
-        """)
\ No newline at end of file
+        with col2:
+            st.subheader("Tips for best results:")
+            st.markdown("""
+            - Provide a clear project description
+            - List features one per line
+            - Be specific about project requirements
+            - Include user roles if possible
+            """)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,34 @@
 import streamlit as st
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel, Field
 from typing import List, Literal, Optional, TypedDict, Annotated
 from langgraph.graph.message import add_messages
 from langchain_core.messages import SystemMessage, HumanMessage
 from dotenv import load_dotenv
+from llm_cache import enable_llm_cache
+from rate_limiter import with_backoff
+from model_routing import create_chat_model, node_model, node_rate_limiter
+import os
 
 load_dotenv()
 
-# Initialize OpenAI LLM
-llm = ChatOpenAI(model="gpt-4o")
+# Reviewers run on a cheaper model than generators; see model_routing.MODEL_PROFILES
+MODEL_PROFILE = os.environ.get("SDLC_MODEL_PROFILE", "openai")
+
+# On-disk LLM response cache, registered once for every model call
+@st.cache_resource
+def get_llm_cache():
+    return enable_llm_cache()
+
+# Initialize OpenAI LLM, shared by all sessions for a model and credential
+@st.cache_resource
+def get_llm(model, api_key):
+    get_llm_cache()
+    return create_chat_model(model, {"openai": api_key})
+
+def llm_for(node):
+    """Return the shared client of the model the node runs on."""
+    return get_llm(node_model(node, MODEL_PROFILE), os.environ.get("OPENAI_API_KEY"))
 
 # Define State
 class State(TypedDict):
@@ -26,7 +44,7 @@ class ProductOwnerRoute(BaseModel):
     step: Literal["Approved", "Feedback"] = Field(description="Routing Decision")
     feedback: str = Field(description="Feedback if required")
 
-router_product_owner_route = llm.with_structured_output(ProductOwnerRoute)
+router_product_owner_route = llm_for("Product Owner Review").with_structured_output(ProductOwnerRoute)
 
 def generate_user_stories(state: State):
     user_story_prompt = f"""
@@ -45,7 +63,7 @@ def generate_user_stories(state: State):
     """
     
     messages = state.get("messages", [])
-    response = llm.invoke([user_story_prompt] + messages)
+    response = llm_for("Generate User Stories").invoke([user_story_prompt] + messages)
     messages.append(response)
     
     return {"messages": messages}
@@ -76,45 +94,59 @@ def revise_user_stories(state: State):
     """
     
     messages = state.get("messages", [])
-    revised_response = llm.invoke([revise_prompt] + messages)
+    revised_response = llm_for("Revise User Stories").invoke([revise_prompt] + messages)
     messages.append(revised_response)
     
     return {"messages": messages}
 
-# Create workflow graph
-builder = StateGraph(State)
-builder.add_node("Generate User Stories", generate_user_stories)
-builder.add_node("Product Owner Review", product_owner_review)
-builder.add_node("Revise User Stories", revise_user_stories)
+# Create workflow graph once, shared by all sessions
+@st.cache_resource
+def get_graph():
+    builder = StateGraph(State)
+
+    def add_node(name, node):
+        # Rerun the node after a shared backoff when its LLM call is rate limited
+        builder.add_node(name, with_backoff(node, node_rate_limiter(name, MODEL_PROFILE)))
 
-builder.add_edge(START, "Generate User Stories")
-builder.add_edge("Generate User Stories", "Product Owner Review")
-builder.add_edge("Revise User Stories", "Product Owner Review")
+    add_node("Generate User Stories", generate_user_stories)
+    add_node("Product Owner Review", product_owner_review)
+    add_node("Revise User Stories", revise_user_stories)
 
-builder.add_conditional_edges("Product Owner Review", route_product_decision, {"Revise User Stories": "Revise User Stories", END: END})
+    builder.add_edge(START, "Generate User Stories")
+    builder.add_edge("Generate User Stories", "Product Owner Review")
+    builder.add_edge("Revise User Stories", "Product Owner Review")
 
-graph = builder.compile()
+    builder.add_conditional_edges("Product Owner Review", route_product_decision, {"Revise User Stories": "Revise User Stories", END: END})
 
-# Streamlit UI
-st.title("Agile User Story Generator")
+    return builder.compile()
 
-project_name = st.text_input("Project Name")
-project_description = st.text_area("Project Description")
-features = st.text_area("List Features (comma-separated)")
+graph = get_graph()
 
-if st.button("Generate User Stories"):
-    feature_list = [f.strip() for f in features.split(",") if f.strip()]
-    test_state = {"project_name": project_name, "project_description": project_description, "features": feature_list, "messages": [], "product_decision": "", "feedback": ""}
-    response = graph.invoke(test_state)
+def main():
+    """Render the Streamlit UI."""
+    st.title("Agile User Story Generator")
+
+    project_name = st.text_input("Project Name")
+    project_description = st.text_area("Project Description")
+    features = st.text_area("List Features (comma-separated)")
+
+    if st.button("Generate User Stories"):
+        feature_list = [f.strip() for f in features.split(",") if f.strip()]
+        test_state = {"project_name": project_name, "project_description": project_description, "features": feature_list, "messages": [], "product_decision": "", "feedback": ""}
+        response = graph.invoke(test_state)
     
-    with st.expander("📌 Initial User Stories", expanded=True):
-        st.write(response["messages"][0].content)
+        with st.expander("📌 Initial User Stories", expanded=True):
+            st.write(response["messages"][0].content)
 
-    with st.expander("📢 Feedback", expanded=False):
-        st.write(response["feedback"])
+        with st.expander("📢 Feedback", expanded=False):
+            st.write(response["feedback"])
     
-    if response["product_decision"] == "Feedback":
-        with st.expander("✍️ Revised User Stories", expanded=True):
-            st.write(response["messages"][-1].content)
-    else:
-        st.success("✅ User stories approved!")
+        if response["product_decision"] == "Feedback":
+            with st.expander("✍️ Revised User Stories", expanded=True):
+                st.write(response["messages"][-1].content)
+        else:
+            st.success("✅ User stories approved!")
+
+
+if __name__ == "__main__":
+    main()
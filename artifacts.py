@@ -0,0 +1,128 @@
+"""Content-addressed on-disk store for downloadable artifacts.
+
+Artifacts such as the ZIP of the generated code are keyed by a hash of what they
+are built from, so each one is compressed and written once, however many reruns,
+sessions or API requests ask for it. Downloads are served from the stored file.
+The store is bounded: once it exceeds its size, the least recently used artifacts
+are deleted, and are rebuilt if they are asked for again.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import zipfile
+
+# SDLC_ARTIFACT_DIR overrides it when a store is created
+DEFAULT_ARTIFACT_DIR = "artifacts"
+DEFAULT_MAX_BYTES = int(os.environ.get("SDLC_ARTIFACT_MAX_MB", "256")) * 1024 * 1024
+
+# Documents in a run's project bundle, by file name and the state key holding them
+ARTIFACTS = {
+    "user_stories.md": "user_stories",
+    "functional_documentation.md": "functional_documentation",
+    "technical_documentation.md": "technical_documentation",
+    "combined_documentation.md": "combined_documentation",
+    "generated_code.md": "generated_code",
+    "test_cases.md": "write_test_cases_response",
+    "qa_feedback.md": "qa_testing_feedback",
+}
+
+
+def artifact_files(values):
+    """Map artifact names to their text for a run's state; code files go under code/."""
+    files = {name: values[key] for name, key in ARTIFACTS.items() if values.get(key)}
+    for path, content in (values.get("code_files") or {}).items():
+        files[f"code/{path}"] = content
+    return files
+
+
+def files_key(files):
+    """Hash a {name: text} map by its names and contents, independent of order."""
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(name.encode() + b"\0" + hashlib.sha256(files[name].encode()).digest())
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Directory of artifacts named by content hash, each built once while it stays in the store."""
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root = root or os.environ.get("SDLC_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"builds": 0, "hits": 0, "evictions": 0}
+
+    def get_or_build(self, key, suffix, build):
+        """Return the path of the artifact for key, calling build(file) to write it if it is missing."""
+        path = os.path.join(self.root, f"{key}{suffix}")
+        with self._lock:
+            if os.path.exists(path):
+                # The modification time doubles as the last use for LRU eviction
+                os.utime(path)
+                self._stats["hits"] += 1
+                return path
+            self._stats["builds"] += 1
+        # Write to a temporary name first so a reader never sees a half-written artifact
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                build(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep):
+        """Delete the least recently used artifacts until the store fits in max_bytes."""
+        with self._lock:
+            entries = sorted(
+                (entry for entry in os.scandir(self.root) if entry.is_file() and not entry.name.endswith(".tmp")),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            total = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                if entry.path == keep:
+                    continue
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                total -= entry.stat().st_size
+                self._stats["evictions"] += 1
+
+    def bundle(self, files):
+        """Return the path of a ZIP of a {name: text} map, compressing it only the first time."""
+
+        def build(f):
+            with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as zip_file:
+                for name, content in files.items():
+                    zip_file.writestr(name, content)
+
+        return self.get_or_build(files_key(files), ".zip", build)
+
+    @staticmethod
+    def read(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def bundle_bytes(self, files):
+        """Return the ZIP of a {name: text} map, building it only if it is not in the store."""
+        try:
+            return self.read(self.bundle(files))
+        except FileNotFoundError:
+            # Evicted by another session between the lookup and the read
+            return self.read(self.bundle(files))
+
+    def stats(self):
+        """Return build/hit counters and the store's size on disk."""
+        with self._lock:
+            stats = dict(self._stats)
+        entries = [entry for entry in os.scandir(self.root) if entry.is_file() and not entry.name.endswith(".tmp")]
+        stats.update(entries=len(entries), bytes=sum(entry.stat().st_size for entry in entries))
+        return stats
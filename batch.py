@@ -0,0 +1,208 @@
+"""Headless batch runner: run the SDLC pipelines for many projects from a JSONL file.
+
+Each input line is a project spec with project_name, project_description and
+features. Projects run concurrently up to --concurrency, and one JSONL result
+line per project (status, timings, token usage and the generated artifacts) is
+appended to --output as soon as it finishes.
+
+Run with:  python batch.py projects.jsonl --pipeline app --concurrency 8 --output results.jsonl
+
+The app pipeline checkpoints every step under a run id derived from the
+project spec, so rerunning an interrupted batch resumes unfinished projects
+and reports finished ones from their checkpoint without calling the LLM again.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import RunMetrics
+from rate_limiter import rate_limiters
+
+# State keys written to the results for each pipeline
+OUTPUT_KEYS = {
+    "app": [
+        "user_stories", "combined_documentation", "generated_code", "code_files",
+        "write_test_cases_response", "qa_testing_decision", "qa_testing_feedback",
+    ],
+    "app1": ["messages", "technical_documentation", "functional_documentation"],
+}
+REQUIRED_FIELDS = ("project_name", "project_description", "features")
+
+
+def read_projects(path):
+    """Yield (line number, project dict or None, error) for each non-empty line of a JSONL file."""
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                project = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"invalid JSON: {e}"
+                continue
+            missing = [field for field in REQUIRED_FIELDS if not project.get(field)]
+            if missing:
+                yield number, None, f"missing {', '.join(missing)}"
+            else:
+                if isinstance(project["features"], str):
+                    project["features"] = [f.strip() for f in project["features"].split("\n") if f.strip()]
+                yield number, project, None
+
+
+def project_run_id(pipeline, project, occurrence=0):
+    """Derive a stable run id from the spec so a rerun resumes the same checkpoint.
+
+    `occurrence` numbers repeats of the same spec in one file, so each repeat gets its own run.
+    """
+    spec = json.dumps({field: project[field] for field in REQUIRED_FIELDS}, sort_keys=True)
+    run_id = f"batch-{pipeline}-{hashlib.sha256(spec.encode()).hexdigest()[:16]}"
+    return f"{run_id}-{occurrence}" if occurrence else run_id
+
+
+def serialize_outputs(pipeline, values):
+    """Pick the pipeline's output keys from the final state, with messages as plain text."""
+    outputs = {}
+    for key in OUTPUT_KEYS[pipeline]:
+        if key not in values:
+            continue
+        value = values[key]
+        if key == "messages":
+            value = [getattr(message, "content", str(message)) for message in value]
+        outputs[key] = value
+    return outputs
+
+
+class BatchRunner:
+    """Run projects through one pipeline with at most `concurrency` in flight."""
+
+    def __init__(self, pipeline, concurrency, timeout=None):
+        self.pipeline = pipeline
+        self.concurrency = concurrency
+        self.timeout = timeout
+        if pipeline == "app":
+            import app
+            from fake_llm import fake_backend_enabled
+            from model_routing import API_KEY_ENV, env_api_keys, profile_providers
+
+            api_keys = "offline" if fake_backend_enabled() else env_api_keys(app.DEFAULT_PROFILE)
+            if not api_keys:
+                names = " and ".join(API_KEY_ENV[provider] for provider in profile_providers(app.DEFAULT_PROFILE))
+                sys.exit(f"{names} must be set for the {app.DEFAULT_PROFILE} profile (or use SDLC_LLM_BACKEND=fake)")
+            self.module = app
+            self.workflow = app.build_workflow(app.DEFAULT_PROFILE, api_keys)
+        else:
+            import app1
+
+            self.module = app1
+            self.workflow = app1.get_graph()
+            self.executor = ThreadPoolExecutor(concurrency, thread_name_prefix="batch")
+
+    async def run_app(self, project, run_id, metrics):
+        """Run or resume the checkpointed app.py pipeline; returns (final state, status)."""
+        config = self.module.run_config(run_id)
+        blobs = self.module.get_blob_store()
+        snapshot = await self.workflow.aget_state(config)
+        if snapshot.values and not snapshot.next:
+            return blobs.unpack(snapshot.values), "cached"
+        inputs = None if snapshot.values else {**project, "messages": []}
+        config["callbacks"] = [metrics]
+        async for _ in self.workflow.astream(inputs, config):
+            pass
+        return blobs.unpack((await self.workflow.aget_state(config)).values), "resumed" if inputs is None else "ok"
+
+    async def run_app1(self, project, metrics):
+        """Run the synchronous docs graph in a worker thread."""
+        values = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.workflow.invoke, {**project, "messages": []}, {"callbacks": [metrics]}
+        )
+        return values, "ok"
+
+    async def run_project(self, number, project, run_id, semaphore):
+        """Run one project under `run_id` and return its result record."""
+        async with semaphore:
+            metrics = RunMetrics(run_id)
+            record = {"line": number, "project_name": project["project_name"], "pipeline": self.pipeline, "run_id": run_id}
+            start = time.perf_counter()
+            try:
+                if self.pipeline == "app":
+                    run = self.run_app(project, run_id, metrics)
+                else:
+                    run = self.run_app1(project, metrics)
+                values, status = await asyncio.wait_for(run, self.timeout)
+                record.update(status=status, outputs=serialize_outputs(self.pipeline, values))
+                stops = {node: loop["stopped"] for node, loop in values.get("review_loops", {}).items() if loop.get("stopped")}
+                if stops:
+                    record["loop_stops"] = stops
+                if values.get("speculation_stats"):
+                    record["speculation"] = values["speculation_stats"]
+                if values.get("static_analysis_stats"):
+                    record["static_analysis"] = values["static_analysis_stats"]
+            except asyncio.TimeoutError:
+                record.update(status="timeout", error=f"did not finish within {self.timeout}s")
+            except Exception as e:
+                record.update(status="error", error=repr(e))
+            totals = metrics.totals()
+            record.update(
+                wall_time=round(time.perf_counter() - start, 3),
+                llm_calls=totals["calls"],
+                prompt_tokens=totals["prompt_tokens"],
+                completion_tokens=totals["completion_tokens"],
+                cost=round(totals["cost"], 6),
+            )
+            return record
+
+    async def run(self, input_path, output):
+        """Run every project in the input file, writing each result line as it completes."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks, counts, occurrences = [], {}, {}
+        for number, project, error in read_projects(input_path):
+            if error:
+                self.write(output, {"line": number, "pipeline": self.pipeline, "status": "invalid", "error": error}, counts)
+                continue
+            # Duplicate lines would otherwise share, and corrupt, one checkpoint
+            run_id = project_run_id(self.pipeline, project)
+            occurrence = occurrences[run_id] = occurrences.get(run_id, -1) + 1
+            run_id = project_run_id(self.pipeline, project, occurrence)
+            tasks.append(asyncio.ensure_future(self.run_project(number, project, run_id, semaphore)))
+        for task in asyncio.as_completed(tasks):
+            self.write(output, await task, counts)
+        return counts
+
+    def write(self, output, record, counts):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        print(f"[batch] line {record['line']}: {record['status']} {record.get('project_name', '')} "
+              f"{record.get('wall_time', 0):.1f}s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the SDLC pipelines headlessly for every project in a JSONL file.")
+    parser.add_argument("input", help="JSONL file with project_name, project_description and features per line")
+    parser.add_argument("--pipeline", choices=sorted(OUTPUT_KEYS), default="app", help="full SDLC pipeline or the app1 docs pipeline")
+    parser.add_argument("--concurrency", type=int, default=4, help="projects to run at the same time")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL file the results are appended to")
+    parser.add_argument("--timeout", type=float, help="seconds after which a project is reported as timed out")
+    args = parser.parse_args()
+
+    runner = BatchRunner(args.pipeline, args.concurrency, args.timeout)
+    start = time.perf_counter()
+    with open(args.output, "a") as output:
+        coroutine = runner.run(args.input, output)
+        if args.pipeline == "app":
+            # The app's checkpointer is bound to its shared event loop
+            counts = asyncio.run_coroutine_threadsafe(coroutine, runner.module.get_event_loop()).result()
+        else:
+            counts = asyncio.run(coroutine)
+    print(f"[batch] {sum(counts.values())} projects in {time.perf_counter() - start:.1f}s: {counts}", file=sys.stderr)
+    for limiter in rate_limiters():
+        print(f"[batch] rate limiter {limiter.provider}:{limiter.model}: {limiter.stats()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Microbenchmark: code-block parsing of multi-megabyte generated code.
+
+Compares the previous two-pass parse_code_blocks (kept here as legacy_parse_code_blocks)
+with the single-pass CodeBlockParser, on a whole response and fed token by token the
+way streamed output arrives, and reports how soon the first file is available.
+
+Run with:  python benchmarks/bench_code_blocks.py [--megabytes 4]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from code_blocks import CodeBlockParser, parse_code_blocks
+
+REPEATS = 3
+TOKEN_CHARS = 4
+
+
+def legacy_parse_code_blocks(code_content):
+    """The line scan plus re.findall fallback used before code_blocks.py."""
+    code_files = {}
+    current_file = None
+    current_content = []
+    for line in code_content.split('\n'):
+        if line.startswith("```") and "```" in line[:4]:
+            if current_file:
+                code_files[current_file] = '\n'.join(current_content)
+                current_file = None
+                current_content = []
+            elif len(line) > 3:
+                lang_or_filename = line[3:].strip()
+                if "." in lang_or_filename and not lang_or_filename.startswith("json") and not lang_or_filename.startswith("xml"):
+                    current_file = lang_or_filename
+                    current_content = []
+        elif current_file:
+            current_content.append(line)
+    if not code_files and code_content:
+        for idx, (lang, code) in enumerate(re.findall(r"```(\w+)(.*?)```", code_content, re.DOTALL)):
+            code_files[f"file_{idx}.{lang}"] = code.strip()
+    return code_files
+
+
+def make_output(megabytes, named, seed=0):
+    """Build a generated-code response of about `megabytes` MB with fenced files."""
+    rng = random.Random(seed)
+    parts, size, index = ["Here is the implementation, organised by module.\n"], 0, 0
+    while size < megabytes * 1024 * 1024:
+        body = "\n".join(
+            f"def function_{index}_{n}(value):\n    \"\"\"Return value scaled by {n}.\"\"\"\n    return value * {n}\n"
+            for n in range(rng.randint(5, 60))
+        )
+        header = f"```python app/module_{index}.py" if named else "```python"
+        block = f"\n{header}\n{body}\n```\n"
+        parts.append(block)
+        size += len(block)
+        index += 1
+    return "".join(parts)
+
+
+def best_time(fn):
+    """Best wall time of REPEATS calls of fn, and its last result."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def streamed(text):
+    """Feed text in token-sized chunks; return the files and seconds until the first one."""
+    parser, files, first = CodeBlockParser(), [], None
+    start = time.perf_counter()
+    for i in range(0, len(text), TOKEN_CHARS):
+        events = parser.feed(text[i:i + TOKEN_CHARS])
+        if events and first is None:
+            first = time.perf_counter() - start
+        files.extend(events)
+    files.extend(parser.close())
+    return dict(files), first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--megabytes", type=float, default=4.0, help="size of the generated output")
+    args = parser.parse_args()
+
+    for named in (True, False):
+        text = make_output(args.megabytes, named)
+        label = "named files" if named else "unnamed ```python blocks"
+        print(f"\n{label}: {len(text) / 1024 / 1024:.1f} MB")
+        legacy_time, legacy = best_time(lambda: legacy_parse_code_blocks(text))
+        whole_time, whole = best_time(lambda: parse_code_blocks(text))
+        stream_time, (stream, first) = best_time(lambda: streamed(text))
+        assert stream == whole
+        for name, elapsed, files in (("legacy two-pass", legacy_time, legacy), ("single pass", whole_time, whole),
+                                     (f"streamed, {TOKEN_CHARS}-char chunks", stream_time, stream)):
+            print(f"  {name:<28} {elapsed * 1000:8.1f} ms  {len(text) / 1024 / 1024 / elapsed:7.1f} MB/s  {len(files):5} files")
+        print(f"  first file available after {first * 1000:.2f} ms of streamed input")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""End-to-end pipeline benchmark replaying a recorded fixture through the fake LLM backend.
+
+Each pipeline (app.py, app1.py, app2.py) runs in its own subprocess against the
+fixture's scripted responses and latencies, and reports per-node wall time,
+total wall time, orchestration overhead (the same run with zero LLM latency),
+peak RSS and how many times each loop node ran. Results are written as JSON so
+they can be compared across commits.
+
+Run with:  python benchmarks/bench_pipelines.py [--time-scale 0.1] [--compare benchmarks/results/<old>.json]
+Add --speculative to run app.py's review gates speculatively and report the hit rate
+and time saved. No network access is needed. Record new fixtures with record_fixture.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+PIPELINES = ["app", "app1", "app2"]
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time and run count of every graph node."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.nodes = {}
+        self._started = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            node, start = started
+            totals = self.nodes.setdefault(node, {"runs": 0, "wall_time": 0.0})
+            totals["runs"] += 1
+            totals["wall_time"] += time.perf_counter() - start
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+def scaled_llm_config(llm_config, time_scale):
+    """Scale the fixture's latencies by time_scale; 0 removes all simulated LLM time."""
+    config = dict(llm_config, cache=False)
+    latency = dict(config.get("latency", {}))
+    latency["mean"] = latency.get("mean", 0.0) * time_scale
+    config["latency"] = latency
+    tps = config.get("tokens_per_second", 0.0)
+    config["tokens_per_second"] = tps / time_scale if tps and time_scale else 0.0
+    return config
+
+
+def run_pipeline(name, project):
+    """Run one pipeline to completion and return (wall time, NodeTimer, RunMetrics, final state)."""
+    from metrics import RunMetrics
+
+    module = __import__(name)
+    timer, metrics = NodeTimer(), RunMetrics(name)
+    start = time.perf_counter()
+    if name == "app":
+        workflow = module.build_workflow(module.DEFAULT_PROFILE, "offline")
+        config = module.run_config(uuid.uuid4().hex)
+        config["callbacks"] = [metrics, timer]
+
+        async def run():
+            async for _ in workflow.astream({**project, "messages": []}, config, stream_mode=["updates", "messages"]):
+                pass
+            return (await workflow.aget_state(config)).values
+
+        # The checkpointer is bound to the app's shared event loop
+        values = asyncio.run_coroutine_threadsafe(run(), module.get_event_loop()).result()
+    else:
+        values = module.get_graph().invoke({**project, "messages": []}, {"callbacks": [metrics, timer]})
+    return time.perf_counter() - start, timer, metrics, values
+
+
+def reset_fake_models(name, llm_config):
+    """Reset the cached fake models' call counters and timings for another run."""
+    from model_routing import node_model
+
+    module = sys.modules[name]
+    if name == "app":
+        nodes = module.build_workflow(module.DEFAULT_PROFILE, "offline").nodes
+        models = [module.get_llm(node_model(node, module.DEFAULT_PROFILE), "offline") for node in nodes if not node.startswith("__")]
+    else:
+        models = [module.llm_for(node) for node in module.get_graph().nodes if not node.startswith("__")]
+    for model in models:
+        model.calls.clear()
+        model.latency = llm_config["latency"]
+        model.tokens_per_second = llm_config["tokens_per_second"]
+
+
+def child(name, fixture_path, time_scale, speculative=False):
+    """Benchmark one pipeline in this process and print the result as JSON."""
+    with open(fixture_path) as f:
+        fixture = json.load(f)
+    tmp = tempfile.mkdtemp(prefix="sdlc-bench-")
+    llm_config = scaled_llm_config(fixture["llm"], time_scale)
+    config_path = os.path.join(tmp, "llm.json")
+    with open(config_path, "w") as f:
+        json.dump(llm_config, f)
+    os.environ.update({
+        "SDLC_LLM_BACKEND": "fake",
+        "SDLC_FAKE_LLM_CONFIG": config_path,
+        "SDLC_CHECKPOINT_DB": os.path.join(tmp, "checkpoints.sqlite"),
+        "SDLC_LLM_CACHE_DB": os.path.join(tmp, "llm_cache.sqlite"),
+        "SDLC_BLOB_DB": os.path.join(tmp, "blobs.sqlite"),
+        "SDLC_HISTORY_DB": os.path.join(tmp, "history.sqlite"),
+        # Provider quotas would otherwise throttle the replay and the zero-latency run
+        "SDLC_RATE_LIMIT_RPM": "1000000",
+        "SDLC_RATE_LIMIT_TPM": "1000000000",
+        "SDLC_SPECULATIVE": "1" if speculative else "",
+    })
+
+    wall_time, timer, metrics, values = run_pipeline(name, fixture["project"])
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    reset_fake_models(name, scaled_llm_config(fixture["llm"], 0))
+    overhead, _, _, _ = run_pipeline(name, fixture["project"])
+
+    llm_time = metrics.by_node()
+    nodes = {
+        node: {**totals, "llm_time": llm_time.get(node, {}).get("wall_time", 0.0)}
+        for node, totals in timer.nodes.items()
+    }
+    print(json.dumps({
+        "wall_time": wall_time,
+        "orchestration_overhead": overhead,
+        "peak_rss_mb": peak_rss,
+        "llm_calls": metrics.totals()["calls"],
+        "loop_iterations": {node: totals["runs"] for node, totals in nodes.items() if totals["runs"] > 1},
+        "nodes": nodes,
+        "speculation": values.get("speculation_stats", {}),
+        "static_analysis": values.get("static_analysis_stats", {}),
+    }))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results, baseline=None):
+    for name, result in results["pipelines"].items():
+        print(f"\n{name}: {result['wall_time']:.2f}s total, {result['orchestration_overhead'] * 1000:.1f} ms overhead, "
+              f"{result['peak_rss_mb']:.0f} MB peak RSS, {result['llm_calls']} LLM calls")
+        for node, totals in sorted(result["nodes"].items(), key=lambda item: -item[1]["wall_time"]):
+            print(f"  {node:<34} {totals['runs']:>3}x {totals['wall_time']:8.2f}s  (LLM {totals['llm_time']:.2f}s)")
+        if result["loop_iterations"]:
+            print("  loops: " + ", ".join(f"{node} x{runs}" for node, runs in result["loop_iterations"].items()))
+        if result.get("speculation"):
+            spec = result["speculation"]
+            print(f"  speculation: {spec.get('hits', 0)}/{spec.get('started', 0)} hits, "
+                  f"{spec.get('time_saved', 0.0):.2f}s saved, {spec.get('time_wasted', 0.0):.2f}s discarded")
+        if result.get("static_analysis"):
+            static = result["static_analysis"]
+            print(f"  static analysis: {static.get('failed', 0)}/{static.get('runs', 0)} runs failed, "
+                  f"{static.get('review_calls_saved', 0)} review calls saved")
+        old = (baseline or {}).get("pipelines", {}).get(name)
+        if old:
+            for key in ("wall_time", "orchestration_overhead", "peak_rss_mb", "llm_calls"):
+                change = (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                print(f"  vs {baseline['commit']}: {key:<24} {old[key]:10.3f} -> {result[key]:10.3f} ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--fixture", default="meetingmind", help="fixture name in benchmarks/fixtures or a path")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="comma-separated list of app, app1, app2")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply the recorded LLM latencies by this")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--speculative", action="store_true", help="run app.py's review gates speculatively")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    fixture_path = args.fixture if os.path.exists(args.fixture) else os.path.join(FIXTURES_DIR, f"{args.fixture}.json")
+    if args.child:
+        child(args.child, fixture_path, args.time_scale, args.speculative)
+        sys.exit(0)
+
+    results = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "fixture": os.path.basename(fixture_path),
+        "time_scale": args.time_scale,
+        "speculative": args.speculative,
+        "python": sys.version.split()[0],
+        "pipelines": {},
+    }
+    for name in args.pipelines.split(","):
+        print(f"Running {name}...", flush=True)
+        # A fresh interpreter per pipeline keeps peak RSS and cached resources independent
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", name, "--fixture", fixture_path,
+             "--time-scale", str(args.time_scale)] + (["--speculative"] if args.speculative else []),
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            sys.exit(f"{name} failed")
+        results["pipelines"][name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
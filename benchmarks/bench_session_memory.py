@@ -0,0 +1,154 @@
+"""Load test: memory held per session with long texts inline vs. in the blob store.
+
+Runs --sessions concurrent app.py runs of a fixture through the fake LLM backend
+(with zero latency) and keeps each one's session state the way the UI does, then
+reports the Python heap the sessions retain, the average deep size of one session's
+state and of its final graph state, and the size of the checkpoint and blob files.
+The fake model returns the same string objects to every session where a real one
+would not, so per-session sizes are measured for each session on its own.
+Each mode runs in a fresh interpreter; "inline" disables references by raising
+SDLC_BLOB_MIN_CHARS, which is how state was held before the blob store.
+
+Run with:  python benchmarks/bench_session_memory.py [--sessions 1,8,32]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_pipelines import FIXTURES_DIR, scaled_llm_config
+
+MODES = {"inline": "1000000000", "blobs": "1024"}
+
+
+def deep_size(value, seen):
+    """Bytes held by value and everything it references, counting shared objects once."""
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += deep_size(vars(value), seen)
+    return size
+
+
+def file_size(path):
+    """Size of a SQLite file together with its write-ahead log."""
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def child(mode, sessions, fixture_path):
+    """Run the sessions in this process and print the measurements as JSON."""
+    with open(fixture_path) as f:
+        fixture = json.load(f)
+    tmp = tempfile.mkdtemp(prefix="sdlc-memory-")
+    config_path = os.path.join(tmp, "llm.json")
+    with open(config_path, "w") as f:
+        json.dump(scaled_llm_config(fixture["llm"], 0), f)
+    os.environ.update({
+        "SDLC_LLM_BACKEND": "fake",
+        "SDLC_FAKE_LLM_CONFIG": config_path,
+        "SDLC_CHECKPOINT_DB": os.path.join(tmp, "checkpoints.sqlite"),
+        "SDLC_LLM_CACHE_DB": os.path.join(tmp, "llm_cache.sqlite"),
+        "SDLC_BLOB_DB": os.path.join(tmp, "blobs.sqlite"),
+        "SDLC_HISTORY_DB": os.path.join(tmp, "history.sqlite"),
+        "SDLC_BLOB_MIN_CHARS": MODES[mode],
+        "SDLC_RATE_LIMIT_RPM": "1000000",
+        "SDLC_RATE_LIMIT_TPM": "1000000000",
+    })
+    import app
+
+    workflow = app.build_workflow(app.DEFAULT_PROFILE, "offline")
+    blobs = app.get_blob_store()
+
+    async def run_session():
+        # The same mapping sync_session_state applies to each streamed update
+        session, config = {}, app.run_config(uuid.uuid4().hex)
+        async for event in workflow.astream({**fixture["project"], "messages": []}, config):
+            for update in event.values():
+                for state_key, session_key in app.SESSION_STATE_KEYS.items():
+                    if update and state_key in update:
+                        session[session_key] = blobs.pack(update[state_key])
+        return session, (await workflow.aget_state(config)).values
+
+    async def run_all():
+        return await asyncio.gather(*(run_session() for _ in range(sessions)))
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = asyncio.run_coroutine_threadsafe(run_all(), app.get_event_loop()).result()
+    session_states = [session for session, _ in held]
+    graph_states = [values for _, values in held]
+    del held
+    gc.collect()
+    retained = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    stats = blobs.stats()
+    print(json.dumps({
+        "sessions": sessions,
+        "retained_heap": retained,
+        "session_state": sum(deep_size(session, set()) for session in session_states) / sessions,
+        "graph_state": sum(deep_size(values, set()) for values in graph_states) / sessions,
+        "blob_cache": stats["cached_bytes"],
+        "messages": sum(len(values["messages"]) for values in graph_states),
+        "checkpoint_db": file_size(os.environ["SDLC_CHECKPOINT_DB"]),
+        "blob_db": file_size(os.environ["SDLC_BLOB_DB"]),
+        "blob_stats": stats,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--fixture", default="meetingmind", help="fixture name in benchmarks/fixtures or a path")
+    parser.add_argument("--sessions", default="1,8,32", help="comma-separated session counts")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    fixture_path = args.fixture if os.path.exists(args.fixture) else os.path.join(FIXTURES_DIR, f"{args.fixture}.json")
+    if args.child:
+        child(args.child, int(args.sessions), fixture_path)
+        return
+
+    mb = 1024 * 1024
+    for sessions in [int(n) for n in args.sessions.split(",")]:
+        results = {}
+        for mode in MODES:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, "--sessions", str(sessions),
+                 "--fixture", fixture_path],
+                cwd=ROOT, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                sys.exit(f"{mode} failed")
+            results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"\n{sessions} session(s), {results['inline']['messages'] / sessions:.0f} messages each")
+        for key, label in (("retained_heap", "retained Python heap"), ("session_state", "state per session"),
+                           ("graph_state", "graph state per session"), ("blob_cache", "shared blob cache"),
+                           ("checkpoint_db", "checkpoint file"), ("blob_db", "blob file")):
+            inline, blob = results["inline"][key], results["blobs"][key]
+            ratio = f"{inline / blob:6.1f}x" if blob and inline > blob else ""
+            print(f"  {label:<24} {inline / mb:9.2f} MB inline  {blob / mb:9.2f} MB with blobs  {ratio}")
+        stats = results["blobs"]["blob_stats"]
+        print(f"  blob store: {stats['entries']} blobs from {stats['puts']} puts, "
+              f"{stats['bytes_in'] / mb:.2f} MB of text stored as {stats['bytes_stored'] / mb:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Startup benchmark: cost of building the workflow on every rerun vs. the shared cache.
+
+Run with:  python benchmarks/bench_startup.py
+No network access is needed; the model clients are only constructed, never called.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+API_KEY = "benchmark-key"
+RERUNS = 20
+
+
+def measure(label, fn):
+    """Time and trace allocations for RERUNS calls of fn."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed / RERUNS * 1000:8.2f} ms/rerun   peak {peak / 1024:8.1f} KiB")
+
+
+def uncached():
+    app.get_llm.clear()
+    app.build_workflow.clear()
+    app.create_langgraph_workflow(API_KEY)
+
+
+def cached():
+    app.create_langgraph_workflow(API_KEY)
+
+
+if __name__ == "__main__":
+    measure("rebuild on every rerun", uncached)
+    app.create_langgraph_workflow(API_KEY)
+    measure("shared cached graph", cached)
@@ -0,0 +1,113 @@
+"""Record a benchmark fixture from a real run of the app.py pipeline.
+
+Every LLM response is captured per graph node, together with the review
+decisions and the observed latency and throughput, in the format
+bench_pipelines.py replays through the offline fake backend.
+
+Run with:  GOOGLE_API_KEY=... python benchmarks/record_fixture.py spec.json fixtures/name.json
+where spec.json holds project_name, project_description and features.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import app
+
+
+class FixtureRecorder(BaseCallbackHandler):
+    """Capture each node's responses, decisions and timings."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.script = {}
+        self.decisions = {}
+        self.first_token_times = []
+        self.throughputs = []
+        self._pending = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._pending[run_id] = {"node": (metadata or {}).get("langgraph_node", ""), "start": time.perf_counter(), "first": None}
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        call = self._pending.get(run_id)
+        if call and call["first"] is None:
+            call["first"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        call = self._pending.pop(run_id, None)
+        if call is None:
+            return
+        end = time.perf_counter()
+        message = response.generations[0][0].message
+        decision = self._decision(message)
+        if decision:
+            self.decisions.setdefault(call["node"], []).append(decision)
+        else:
+            self.script.setdefault(call["node"], []).append(app.message_text(message))
+        first = call["first"] or end
+        self.first_token_times.append(first - call["start"])
+        words = len(app.message_text(message).split())
+        if end > first and words > 1:
+            self.throughputs.append(words / (end - first))
+
+    @staticmethod
+    def _decision(message):
+        """Return the Approved/Feedback/Passed/Failed value of a structured router response."""
+        args = message.tool_calls[0]["args"] if getattr(message, "tool_calls", None) else None
+        if args is None:
+            try:
+                args = json.loads(app.message_text(message))
+            except (ValueError, TypeError):
+                return None
+        if isinstance(args, dict):
+            return args.get("step") or args.get("decision")
+        return None
+
+    def fixture(self, project, description):
+        mean = lambda values: sum(values) / len(values) if values else 0.0
+        return {
+            "description": description,
+            "project": project,
+            "llm": {
+                "script": self.script,
+                "decisions": self.decisions,
+                "latency": {"distribution": "lognormal", "mean": round(mean(self.first_token_times), 3), "sigma": 0.4},
+                "tokens_per_second": round(mean(self.throughputs), 1),
+                "seed": 7,
+            },
+        }
+
+
+async def record(project):
+    workflow = app.build_workflow(app.DEFAULT_PROFILE, os.environ["GOOGLE_API_KEY"])
+    recorder = FixtureRecorder()
+    config = app.run_config(uuid.uuid4().hex)
+    config["callbacks"] = [recorder]
+    inputs = {**project, "messages": []}
+    async for _ in workflow.astream(inputs, config, stream_mode=["updates", "messages"]):
+        pass
+    return recorder
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("spec", help="JSON file with project_name, project_description and features")
+    parser.add_argument("output", help="fixture file to write")
+    args = parser.parse_args()
+
+    with open(args.spec) as f:
+        project = json.load(f)
+    recorder = asyncio.run_coroutine_threadsafe(record(project), app.get_event_loop()).result()
+    with open(args.output, "w") as f:
+        json.dump(recorder.fixture(project, f"Recorded with the {app.DEFAULT_PROFILE} model profile on {time.strftime('%Y-%m-%d')}"), f, indent=1)
+    print(f"Recorded {sum(map(len, recorder.script.values()))} responses and "
+          f"{sum(map(len, recorder.decisions.values()))} decisions to {args.output}")
@@ -0,0 +1,288 @@
+"""Content-addressed blob store for the large texts a run carries in its state.
+
+Generated code, documents and review feedback appear in a run's state several
+times over: once in their own key, again in ``messages`` (which gains another full
+copy every loop), and in every session and checkpoint that holds them. Texts above
+a size threshold are stored once in a local SQLite file, compressed, under their
+SHA-256, and the state holds a short ``blob:sha256:<hex>`` reference instead.
+
+``pack`` and ``unpack`` convert nested state values (dicts, lists and messages)
+to references and back, ``BlobView`` resolves a state's references as a node reads
+them, and ``with_blobs`` wraps a graph node so it reads texts and writes references.
+
+Blobs are only written, so ``collect`` deletes the ones no live checkpoint
+references (after a grace period, as a run in progress or a session may hold a
+reference no checkpoint has yet), then the least recently used ones beyond a size
+cap. Reading a deleted blob raises BlobEvictedError, which says why it is gone.
+"""
+import functools
+import hashlib
+import inspect
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from langchain_core.messages import BaseMessage
+
+# SDLC_BLOB_DB overrides it; read when a store is created, so it can be set after import
+DEFAULT_BLOB_DB = "blobs.sqlite"
+# Shorter texts (decisions, names, short feedback) stay inline in the state
+DEFAULT_MIN_CHARS = int(os.environ.get("SDLC_BLOB_MIN_CHARS", "1024"))
+DEFAULT_COMPRESS = os.environ.get("SDLC_BLOB_COMPRESS", "1") == "1"
+# Recently used texts are kept decoded in memory, shared by every session
+DEFAULT_CACHE_BYTES = int(os.environ.get("SDLC_BLOB_CACHE_MB", "64")) * 1024 * 1024
+# Stored bytes kept on disk; collect() deletes the least recently used blobs beyond it
+DEFAULT_MAX_BYTES = int(os.environ.get("SDLC_BLOB_MAX_MB", "1024")) * 1024 * 1024
+# Unreferenced blobs used more recently than this are kept
+DEFAULT_GRACE = float(os.environ.get("SDLC_BLOB_GRACE_HOURS", "24")) * 60 * 60
+# Reads and cache hits are written back as a blob's last use at most this often (seconds)
+TOUCH_INTERVAL = 60
+# How long the keys of deleted blobs are remembered, to explain a later read
+EVICTED_MEMORY = 30 * 24 * 60 * 60
+
+BLOB_PREFIX = "blob:sha256:"
+REF_LENGTH = len(BLOB_PREFIX) + 64
+REF_PATTERN = re.compile(BLOB_PREFIX.encode() + rb"([0-9a-f]{64})")
+
+
+def is_ref(value):
+    """Return whether value is a blob reference."""
+    return isinstance(value, str) and len(value) == REF_LENGTH and value.startswith(BLOB_PREFIX)
+
+
+def find_refs(data):
+    """Return the keys of the blobs referenced anywhere in serialized data, such as a checkpoint."""
+    return {key.decode() for key in REF_PATTERN.findall(data)}
+
+
+class BlobEvictedError(KeyError):
+    """A reference to a blob that collect() has deleted."""
+
+
+class BlobStore:
+    """Deduplicated, compressed text blobs in a local SQLite file, keyed by content hash."""
+
+    def __init__(self, path=None, min_chars=DEFAULT_MIN_CHARS, compress=DEFAULT_COMPRESS,
+                 cache_bytes=DEFAULT_CACHE_BYTES, max_bytes=DEFAULT_MAX_BYTES, grace=DEFAULT_GRACE):
+        self.path = path = path or os.environ.get("SDLC_BLOB_DB", DEFAULT_BLOB_DB)
+        self.min_chars = min_chars
+        self.compress = compress
+        self.cache_bytes = cache_bytes
+        self.max_bytes = max_bytes
+        self.grace = grace
+        self._cache = OrderedDict()
+        self._cached = 0
+        self._touched = set()
+        self._flushed = time.time()
+        self._stats = {"puts": 0, "new": 0, "reads": 0, "cache_hits": 0, "bytes_in": 0, "bytes_stored": 0, "collected": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS blobs (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                compressed INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL DEFAULT 0
+            )"""
+        )
+        if "last_used" not in [row[1] for row in self._conn.execute("PRAGMA table_info(blobs)")]:
+            # Stores created before blobs were collected; their blobs count as unused since then
+            self._conn.execute("ALTER TABLE blobs ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS evicted (
+                key TEXT PRIMARY KEY,
+                evicted REAL NOT NULL,
+                reason TEXT NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def put(self, text):
+        """Store text once and return its reference."""
+        key = hashlib.sha256(text.encode()).hexdigest()
+        now = time.time()
+        with self._lock:
+            self._stats["puts"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._touch(key, now)
+                return BLOB_PREFIX + key
+        data = text.encode()
+        compressed = False
+        if self.compress:
+            packed = zlib.compress(data, 6)
+            if len(packed) < len(data):
+                data, compressed = packed, True
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (key, data, compressed, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, data, int(compressed), len(text), now),
+            )
+            self._conn.commit()
+            if cursor.rowcount:
+                self._stats["new"] += 1
+                self._stats["bytes_in"] += len(text)
+                self._stats["bytes_stored"] += len(data)
+            else:
+                self._touch(key, now)
+            self._remember(key, text)
+        return BLOB_PREFIX + key
+
+    def get(self, ref):
+        """Return the text behind a reference."""
+        key = ref[len(BLOB_PREFIX):]
+        now = time.time()
+        with self._lock:
+            self._stats["reads"] += 1
+            if key in self._cache:
+                self._stats["cache_hits"] += 1
+                self._cache.move_to_end(key)
+                self._touch(key, now)
+                return self._cache[key]
+            row = self._conn.execute("SELECT data, compressed FROM blobs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                evicted = self._conn.execute("SELECT evicted, reason FROM evicted WHERE key = ?", (key,)).fetchone()
+            else:
+                self._touch(key, now)
+        if row is None and evicted:
+            raise BlobEvictedError(
+                f"{ref} was deleted from {self.path} on {time.ctime(evicted[0])} ({evicted[1]}); "
+                "the run that referenced it has expired, so start it again"
+            )
+        if row is None:
+            raise KeyError(f"unknown blob {ref} (was {self.path} deleted?)")
+        data, compressed = row
+        text = (zlib.decompress(data) if compressed else data).decode()
+        with self._lock:
+            self._remember(key, text)
+        return text
+
+    def _remember(self, key, text):
+        """Keep text in the LRU cache of decoded blobs, evicting the oldest beyond cache_bytes."""
+        if key in self._cache or len(text) > self.cache_bytes:
+            return
+        self._cache[key] = text
+        self._cached += len(text)
+        while self._cached > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached -= len(evicted)
+
+    def _touch(self, key, now):
+        """Note a use of key; uses are written back every TOUCH_INTERVAL so collect() sees them."""
+        self._touched.add(key)
+        if now - self._flushed >= TOUCH_INTERVAL:
+            self._flush(now)
+
+    def _flush(self, now):
+        if self._touched:
+            self._conn.executemany("UPDATE blobs SET last_used = ? WHERE key = ?", [(now, key) for key in self._touched])
+            self._conn.commit()
+            self._touched.clear()
+        self._flushed = now
+
+    def collect(self, referenced):
+        """Delete the blobs not in referenced, then the least recently used ones beyond max_bytes.
+
+        referenced holds the keys live checkpoints refer to (see find_refs). Blobs used
+        within the grace period are kept even when unreferenced. Returns the number deleted.
+        """
+        now = time.time()
+        with self._lock:
+            self._flush(now)
+            unreferenced = [
+                key for (key,) in self._conn.execute("SELECT key FROM blobs WHERE last_used < ?", (now - self.grace,))
+                if key not in referenced
+            ]
+            deleted = self._delete(unreferenced, "no run referenced it", now)
+            total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()[0]
+            if total > self.max_bytes:
+                oldest = []
+                for key, size in self._conn.execute("SELECT key, LENGTH(data) FROM blobs ORDER BY last_used"):
+                    if total <= self.max_bytes:
+                        break
+                    oldest.append(key)
+                    total -= size
+                deleted += self._delete(oldest, f"over the {self.max_bytes // (1024 * 1024)} MB limit", now)
+            self._conn.execute("DELETE FROM evicted WHERE evicted < ?", (now - EVICTED_MEMORY,))
+            self._conn.commit()
+        return deleted
+
+    def _delete(self, keys, reason, now):
+        self._conn.executemany("DELETE FROM blobs WHERE key = ?", [(key,) for key in keys])
+        self._conn.executemany("INSERT OR REPLACE INTO evicted (key, evicted, reason) VALUES (?, ?, ?)",
+                               [(key, now, reason) for key in keys])
+        for key in keys:
+            if key in self._cache:
+                self._cached -= len(self._cache.pop(key))
+        self._stats["collected"] += len(keys)
+        return len(keys)
+
+    def pack(self, value):
+        """Replace the long texts in a (nested) state value with references."""
+        if isinstance(value, str):
+            return self.put(value) if len(value) >= self.min_chars and not is_ref(value) else value
+        if isinstance(value, dict):
+            return {key: self.pack(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.pack(item) for item in value]
+        if isinstance(value, BaseMessage) and isinstance(value.content, str):
+            content = self.pack(value.content)
+            return value if content is value.content else value.model_copy(update={"content": content})
+        return value
+
+    def unpack(self, value):
+        """Resolve the references in a (nested) state value back to their texts."""
+        if isinstance(value, str):
+            return self.get(value) if is_ref(value) else value
+        if isinstance(value, dict):
+            return {key: self.unpack(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.unpack(item) for item in value]
+        if isinstance(value, BaseMessage) and is_ref(value.content):
+            return value.model_copy(update={"content": self.get(value.content)})
+        return value
+
+    def stats(self):
+        """Return put/read counters, the decoded cache size and the store's size on disk."""
+        with self._lock:
+            stats = dict(self._stats, cached_bytes=self._cached)
+            stats["entries"], stats["disk_bytes"] = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+        return stats
+
+
+class BlobView(dict):
+    """A state dict whose values are resolved from the blob store as they are read."""
+
+    def __init__(self, state, store):
+        super().__init__(state)
+        self.store = store
+
+    def __getitem__(self, key):
+        return self.store.unpack(super().__getitem__(key))
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+def with_blobs(node, store):
+    """Wrap a graph node so it reads the texts behind the state's references and returns references."""
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def run(state):
+            return store.pack(await node(BlobView(state, store)))
+        return run
+
+    @functools.wraps(node)
+    def run(state):
+        return store.pack(node(BlobView(state, store)))
+    return run
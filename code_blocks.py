@@ -0,0 +1,237 @@
+"""Incremental parser for the fenced code blocks in generated code.
+
+CodeBlockParser takes the model's output a chunk at a time and returns a
+``(path, content)`` event as soon as each fence closes, so the files of a long
+generation can be shown (or checked) while the rest is still streaming. The text
+is scanned once, line by line. ``parse_code_blocks`` runs it over a finished
+response and returns the file map the fix nodes edit.
+
+File names are taken, in order of preference, from the fence's info string
+(```app/main.py, ```python app/main.py, ```python:app/main.py,
+```python title="app/main.py"), from a path alone on the line before the fence
+(**app/main.py**, ### `app/main.py`, File: app/main.py), or from a path comment
+on the block's first line (# app/main.py, // src/index.js). Other blocks get a
+name from their language (main_0.py, script_1.js, ...); shell, text and
+unlabelled snippets are only kept when the response has no other files.
+
+As in CommonMark, a closing fence carries no info string, so a fence with one
+inside a block opens a nested example (a README's snippets, a docstring or
+string literal holding markdown) that the next bare fence closes. A block left
+unterminated by the model is ended early only where a fence names a new file,
+in its info string or on the label line before it; otherwise it runs to the end
+of the output.
+"""
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})[ \t]*([^`\n]*?)[ \t\r]*$", re.MULTILINE)
+# Line breaks followed by a fence; searched in bulk so the lines between fences are never visited one by one
+FENCE_START = re.compile(r"\n(?= {0,3}(?:```|~~~))")
+PATH = re.compile(r"(?:[\w.\-]+/)*[\w.\-]*\w\.[A-Za-z0-9]{1,10}|(?:[\w.\-]+/)*(?:Dockerfile|Makefile|Procfile)")
+PATH_LINE = re.compile(
+    r"^(?:\d+[.)]\s*)?(?:(?:file(?:name)?|path)\s*:\s*)?`?(" + PATH.pattern + r")`?\s*:?$",
+    re.IGNORECASE,
+)
+PATH_COMMENT = re.compile(r"^\s*(?:#|//|--|/\*|<!--)\s*(?:(?:file(?:name)?|path)\s*:\s*)?(" + PATH.pattern + r")\s*(?:\*/|-->)?\s*$",
+                          re.IGNORECASE)
+PATH_ATTRIBUTE = re.compile(r"""(?:title|file(?:name)?|path)=["']?([^"'\s]+)""", re.IGNORECASE)
+LANGUAGE = re.compile(r"\w[\w+#-]*")
+
+# Fallback names for blocks without a path, as (stem, extension) by language
+LANGUAGE_FILES = {
+    "python": ("main", "py"), "py": ("main", "py"),
+    "javascript": ("script", "js"), "js": ("script", "js"), "jsx": ("script", "jsx"),
+    "typescript": ("script", "ts"), "ts": ("script", "ts"), "tsx": ("script", "tsx"),
+    "html": ("index", "html"), "css": ("style", "css"),
+    "json": ("file", "json"), "yaml": ("file", "yaml"), "yml": ("file", "yml"), "toml": ("file", "toml"),
+    "sql": ("file", "sql"), "java": ("Main", "java"), "go": ("main", "go"), "rust": ("main", "rs"),
+    "dockerfile": ("Dockerfile", ""),
+}
+# Blocks that show commands or output rather than a project file
+SNIPPET_LANGUAGES = {"", "bash", "sh", "shell", "console", "zsh", "powershell", "cmd", "text", "txt", "plaintext", "output"}
+MARKDOWN_LANGUAGES = {"markdown", "md"}
+
+
+def path_from_line(line):
+    """Return the file path a heading or label line names, or None."""
+    text = line.replace("**", "").strip().strip("#>").strip()
+    if text.startswith(("- ", "* ", "+ ")):
+        text = text[2:].strip()
+    match = PATH_LINE.match(text)
+    return match.group(1) if match else None
+
+
+def parse_info(info):
+    """Split a fence info string into (language, path or None)."""
+    if not info:
+        return "", None
+    tokens = info.split()
+    if not tokens:
+        return "", None
+    first = tokens[0]
+    language = first.lower() if LANGUAGE.fullmatch(first) else ""
+    attribute = PATH_ATTRIBUTE.search(info)
+    if attribute:
+        return language, attribute.group(1)
+    if ":" in first:
+        prefix, _, path = first.partition(":")
+        if PATH.fullmatch(path):
+            return prefix.lower(), path
+    if PATH.fullmatch(first) and first.lower() not in LANGUAGE_FILES:
+        return "", first
+    if len(tokens) > 1 and PATH.fullmatch(tokens[1]):
+        return language, tokens[1]
+    return language, None
+
+
+class CodeBlockParser:
+    """Single-pass parser that turns streamed markdown into (path, content) events."""
+
+    def __init__(self):
+        self._pending = ""
+        self._block = None
+        self._label = None
+        self._index = 0
+        self._emitted = 0
+        self._snippets = []
+        # Paths of the blocks the output left unterminated
+        self.unterminated = []
+
+    def feed(self, text):
+        """Consume a chunk of output; return the files whose fences closed in it."""
+        if "\n" not in text:
+            self._pending += text
+            return []
+        # Models may answer with CRLF line endings
+        text = self._pending + text
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        end = text.rfind("\n") + 1
+        self._pending = text[end:]
+        events = []
+        self._scan(text[:end], events)
+        return events
+
+    def close(self):
+        """Flush the end of the output; return the remaining files.
+
+        An unterminated block (a truncated response) is returned as it stands, and
+        held-back snippets are returned only when no other file was found.
+        """
+        events = []
+        if self._pending:
+            self._scan(self._pending.replace("\r\n", "\n"), events)
+            self._pending = ""
+        if self._block:
+            emitted = len(events)
+            self._finish(events)
+            # A snippet is held back rather than emitted
+            self.unterminated.append(events[-1][0] if len(events) > emitted else self._snippets[-1][0])
+            logger.warning("unterminated code block %r; keeping it as is", self.unterminated[-1])
+        if not self._emitted:
+            events.extend(self._snippets)
+            self._emitted += len(self._snippets)
+        self._snippets = []
+        return events
+
+    def _scan(self, text, events):
+        """Handle complete lines: the fence lines one at a time, the text between them in bulk."""
+        if "```" not in text and "~~~" not in text:
+            self._text(text)
+            return
+        position = 0
+        for start in [0, *(match.end() for match in FENCE_START.finditer(text))]:
+            fence = FENCE.match(text, start)
+            if not fence:
+                continue
+            self._text(text[position:start])
+            self._fence(fence, events)
+            position = fence.end() + 1
+        self._text(text[position:])
+
+    def _text(self, text):
+        if not text:
+            return
+        block = self._block
+        if block is None:
+            # Remember a path named on the last non-empty line before the next fence
+            last = text.rstrip().rpartition("\n")[2]
+            if last:
+                self._label = path_from_line(last) if len(last) < 200 else None
+            return
+        if not block["parts"] and not block["path"]:
+            comment = PATH_COMMENT.match(text.partition("\n")[0])
+            if comment:
+                block["path"] = comment.group(1)
+        block["parts"].append(text)
+        last = text.rstrip().rpartition("\n")[2]
+        if last:
+            block["label"] = path_from_line(last) if len(last) < 200 else None
+
+    def _fence(self, fence, events):
+        block = self._block
+        if block is None:
+            self._open(fence)
+            return
+        line = fence.group(0) + "\n"
+        if fence.group(1)[0] != block["fence"][0] or len(fence.group(1)) < len(block["fence"]):
+            block["parts"].append(line)
+            return
+        info = fence.group(2)
+        label, block["label"] = block["label"], None
+        if info:
+            if not block["depth"] and not block["markdown"] and (label or parse_info(info)[1]):
+                # The block was never closed; this fence starts the next file
+                content = "".join(block["parts"]).rstrip()
+                if label:
+                    # The label line names the next file, so it is not part of this one
+                    content = content.rpartition("\n")[0]
+                    self._label = label
+                block["parts"] = [content]
+                self._finish(events)
+                self._open(fence)
+                return
+            block["depth"] += 1
+            block["parts"].append(line)
+            return
+        if block["depth"]:
+            block["depth"] -= 1
+            block["parts"].append(line)
+            return
+        self._finish(events)
+
+    def _open(self, fence):
+        language, path = parse_info(fence.group(2))
+        path = path or self._label
+        self._label = None
+        markdown = language in MARKDOWN_LANGUAGES or bool(path and path.lower().endswith((".md", ".markdown")))
+        self._block = {"fence": fence.group(1), "language": language, "path": path,
+                       "markdown": markdown, "depth": 0, "label": None, "parts": []}
+
+    def _finish(self, events):
+        block, self._block = self._block, None
+        index, self._index = self._index, self._index + 1
+        content = "".join(block["parts"])
+        if content.endswith("\n"):
+            content = content[:-1]
+        if block["path"]:
+            path = block["path"]
+        elif block["language"] in SNIPPET_LANGUAGES:
+            self._snippets.append((f"file_{index}.{block['language'] or 'txt'}", content.strip()))
+            return
+        elif block["language"] in LANGUAGE_FILES:
+            stem, extension = LANGUAGE_FILES[block["language"]]
+            path = f"{stem}_{index}.{extension}" if extension else f"{stem}_{index}"
+        else:
+            path = f"file_{index}.{block['language']}"
+        events.append((path, content))
+        self._emitted += 1
+
+
+def parse_code_blocks(code_content):
+    """Parse generated code into a {path: content} map of its files."""
+    parser = CodeBlockParser()
+    events = parser.feed(code_content) + parser.close()
+    return dict(events)
@@ -0,0 +1,124 @@
+"""Search/replace edits for incremental code fixes.
+
+Fix nodes ask the LLM for edit blocks instead of a full rewrite of the
+generated code, then apply them locally to the file map produced by
+``parse_code_blocks``:
+
+    path/to/file.py
+    <<<<<<< SEARCH
+    exact lines currently in the file
+    =======
+    replacement lines
+    >>>>>>> REPLACE
+
+An empty SEARCH section creates a new file. Blocks without a path, and empty
+SEARCH sections for files that already exist, fail to apply.
+"""
+
+SEARCH_MARKER = "<<<<<<< SEARCH"
+DIVIDER_MARKER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+
+EDIT_FORMAT_INSTRUCTIONS = f"""
+Do NOT rewrite the whole project. Return only the changes, as search/replace blocks:
+
+path/to/file.ext
+{SEARCH_MARKER}
+exact lines currently in the file (enough to be unique)
+{DIVIDER_MARKER}
+replacement lines
+{REPLACE_MARKER}
+
+- Put the file path alone on the line before each block, exactly as in the file list.
+- The SEARCH section must match the current file content exactly, including indentation.
+- Use one block per change; several blocks may target the same file.
+- To create a new file, leave the SEARCH section empty. Never use an empty SEARCH section for an existing file.
+"""
+
+
+def _clean_path(line):
+    """Strip the markdown decoration LLMs like to put around file paths."""
+    path = line.strip().strip("`*#:").strip()
+    for prefix in ("File:", "file:", "Filename:", "filename:"):
+        if path.startswith(prefix):
+            path = path[len(prefix):].strip()
+    return path.strip("`*").strip()
+
+
+def parse_edits(text):
+    """Parse search/replace blocks into a list of (path, search, replace) tuples."""
+    edits = []
+    lines = text.split("\n")
+    i = 0
+    while i < len(lines):
+        if lines[i].strip() != SEARCH_MARKER:
+            i += 1
+            continue
+        # The path is the closest non-empty, non-fence line above the block, unless that ends another block
+        path = ""
+        for previous in reversed(lines[:i]):
+            if previous.strip() and not previous.strip().startswith("```"):
+                if previous.strip() not in (SEARCH_MARKER, DIVIDER_MARKER, REPLACE_MARKER):
+                    path = _clean_path(previous)
+                break
+        search, replace = [], []
+        section = search
+        i += 1
+        while i < len(lines) and lines[i].strip() != REPLACE_MARKER:
+            if lines[i].strip() == DIVIDER_MARKER and section is search:
+                section = replace
+            else:
+                section.append(lines[i])
+            i += 1
+        edits.append((path, "\n".join(search), "\n".join(replace)))
+        i += 1
+    return edits
+
+
+def _find_loose(content, search):
+    """Locate search in content ignoring trailing whitespace; return (start, end) or None."""
+    content_lines = content.split("\n")
+    search_lines = [line.rstrip() for line in search.strip("\n").split("\n")]
+    for start in range(len(content_lines) - len(search_lines) + 1):
+        window = content_lines[start:start + len(search_lines)]
+        if [line.rstrip() for line in window] == search_lines:
+            offset = sum(len(line) + 1 for line in content_lines[:start])
+            return offset, offset + len("\n".join(window))
+    return None
+
+
+def apply_edits(code_files, edits):
+    """Apply edits to a copy of the file map.
+
+    Returns (files, changed_paths, failed_edits); failed edits are those with no
+    path, whose file is unknown, whose SEARCH text is not found, or whose empty
+    SEARCH would overwrite an existing file.
+    """
+    files = dict(code_files)
+    changed, failed = [], []
+    for path, search, replace in edits:
+        if not path or (not search.strip() and path in files):
+            failed.append((path, search, replace))
+            continue
+        if not search.strip():
+            files[path] = replace
+        elif path not in files:
+            failed.append((path, search, replace))
+            continue
+        elif search in files[path]:
+            files[path] = files[path].replace(search, replace, 1)
+        else:
+            span = _find_loose(files[path], search)
+            if span is None:
+                failed.append((path, search, replace))
+                continue
+            files[path] = files[path][:span[0]] + replace + files[path][span[1]:]
+        if path not in changed:
+            changed.append(path)
+    return files, changed, failed
+
+
+def render_code_files(code_files, paths=None):
+    """Render a file map back into fenced markdown blocks that parse_code_blocks understands."""
+    selected = paths if paths is not None else list(code_files)
+    return "\n\n".join(f"```{path}\n{code_files[path]}\n```" for path in selected if path in code_files)
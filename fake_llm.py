@@ -0,0 +1,190 @@
+"""Deterministic offline chat model for benchmarks and load tests.
+
+FakeChatModel is a drop-in replacement for ChatGoogleGenerativeAI / ChatOpenAI:
+it supports invoke/ainvoke/stream, ``with_structured_output`` for the *Route
+schemas, scripted or templated responses per graph node, simulated latency,
+token throughput and 429 rate-limit errors. No network access is needed.
+
+Enable it in any of the apps with ``SDLC_LLM_BACKEND=fake``; point
+``SDLC_FAKE_LLM_CONFIG`` at a JSON file to override the script and timings.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda, ensure_config
+
+# Default responses per node; "{node}" and "{call}" are filled in for each call
+DEFAULT_SCRIPT = {
+    "Generate Code": ["Here is the implementation.\n\n```main.py\ndef main():\n    return \"hello\"\n\n\nif __name__ == \"__main__\":\n    print(main())\n```\n"],
+    "Fix Code After Review": ["- Minor: add a module docstring\n- Minor: validate input\n\nmain.py\n<<<<<<< SEARCH\ndef main():\n=======\n\"\"\"Entry point.\"\"\"\n\n\ndef main():\n>>>>>>> REPLACE\n\nsecurity.py\n<<<<<<< SEARCH\n=======\ndef validate(value):\n    return str(value)\n>>>>>>> REPLACE\n"],
+    "Fix Code After QA": ["- Fix: cover the failing case\n\nqa_fix.py\n<<<<<<< SEARCH\n=======\nFIXED = True\n>>>>>>> REPLACE\n"],
+}
+DEFAULT_RESPONSE = "# {node}\n\nSimulated response #{call} for {node}.\n"
+
+
+class FakeRateLimitError(Exception):
+    """Simulated provider 429 error, carrying the Retry-After delay like real clients do."""
+
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__(f"429 Resource exhausted (simulated); retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+def sample_latency(spec, rng):
+    """Draw a delay in seconds from a latency spec such as {"distribution": "lognormal", "mean": 1.5}."""
+    distribution = spec.get("distribution", "fixed")
+    mean = spec.get("mean", 0.0)
+    if distribution == "uniform":
+        return rng.uniform(spec.get("low", 0.0), spec.get("high", 2 * mean))
+    if distribution == "normal":
+        return max(0.0, rng.gauss(mean, spec.get("stddev", mean / 4)))
+    if distribution == "lognormal":
+        sigma = spec.get("sigma", 0.5)
+        # Parameterized so the distribution's mean is `mean`
+        return rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean else 0.0
+    return mean
+
+
+class FakeChatModel(BaseChatModel):
+    """Scripted chat model with configurable latency, throughput and error injection."""
+
+    model_name: str = "fake-chat-model"
+    script: dict = {}
+    decisions: dict = {}
+    default_response: str = DEFAULT_RESPONSE
+    latency: dict = {"distribution": "fixed", "mean": 0.0}
+    tokens_per_second: float = 0.0
+    error_rate: float = 0.0
+    retry_after: float = 1.0
+    seed: int = 0
+    calls: dict = {}
+
+    @property
+    def _llm_type(self):
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": self.model_name, "seed": self.seed}
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_model_name"] = self.model_name
+        return params
+
+    def _next_call(self, node, messages):
+        """Count the call and return (call index, deterministic RNG for it)."""
+        call = self.calls.get(node, 0)
+        self.calls[node] = call + 1
+        digest = hashlib.sha256(f"{self.seed}:{node}:{call}:{messages[-1].content if messages else ''}".encode())
+        return call, random.Random(digest.hexdigest())
+
+    def _respond(self, messages, run_manager, structured_schema=None):
+        """Pick the response text and first-token delay, or raise a simulated 429."""
+        # Streaming calls get no run manager; the node's config is still in context
+        metadata = run_manager.metadata if run_manager else ensure_config().get("metadata", {})
+        node = metadata.get("langgraph_node", "")
+        call, rng = self._next_call(node, messages)
+        if rng.random() < self.error_rate:
+            raise FakeRateLimitError(self.retry_after)
+        if structured_schema:
+            steps = self.decisions.get(node) or self.decisions.get(structured_schema) or []
+            step = steps[min(call, len(steps) - 1)] if steps else None
+            text = json.dumps(self._structured_payload(structured_schema, step, node))
+        else:
+            responses = self.script.get(node) or DEFAULT_SCRIPT.get(node) or [self.default_response]
+            text = responses[min(call, len(responses) - 1)].replace("{node}", node or "model").replace("{call}", str(call + 1))
+        first_token = sample_latency(self.latency, rng)
+        return text, first_token
+
+    def _structured_payload(self, schema_name, step, node):
+        if schema_name == "QATestingResult":
+            return {"decision": step or "Passed", "feedback": f"Simulated QA result for {node}."}
+        return {"step": step or "Approved", "feedback": f"Simulated review from {node}." if step == "Feedback" else ""}
+
+    def _usage(self, messages, text):
+        input_tokens = sum(len(str(m.content)) for m in messages) // 4
+        output_tokens = len(text.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _token_delay(self):
+        return 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, structured_schema=None, **kwargs):
+        text, first_token = self._respond(messages, run_manager, structured_schema)
+        time.sleep(first_token + self._token_delay() * len(text.split()))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, structured_schema=None, **kwargs):
+        text, first_token = self._respond(messages, run_manager, structured_schema)
+        await asyncio.sleep(first_token + self._token_delay() * len(text.split()))
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, messages, text):
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            content = word if last else word + " "
+            usage = self._usage(messages, text) if last else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content, usage_metadata=usage))
+
+    def _stream(self, messages, stop=None, run_manager=None, structured_schema=None, **kwargs):
+        text, first_token = self._respond(messages, run_manager, structured_schema)
+        time.sleep(first_token)
+        # Pace tokens against a deadline so per-sleep overshoot does not accumulate
+        deadline = time.perf_counter()
+        for chunk in self._chunks(messages, text):
+            deadline += self._token_delay()
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, structured_schema=None, **kwargs):
+        text, first_token = self._respond(messages, run_manager, structured_schema)
+        await asyncio.sleep(first_token)
+        deadline = time.perf_counter()
+        for chunk in self._chunks(messages, text):
+            deadline += self._token_delay()
+            await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs):
+        """Return a runnable that answers with an instance of the pydantic schema."""
+        return self.bind(structured_schema=schema.__name__) | RunnableLambda(
+            lambda message: schema(**json.loads(message.content))
+        )
+
+
+def load_fake_config(path=None):
+    """Load FakeChatModel settings from a JSON file (SDLC_FAKE_LLM_CONFIG by default)."""
+    path = path or os.environ.get("SDLC_FAKE_LLM_CONFIG")
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def fake_backend_enabled():
+    """Return True when the apps should use the offline fake model instead of a provider."""
+    return os.environ.get("SDLC_LLM_BACKEND", "").lower() == "fake"
+
+
+def get_fake_llm(model, **overrides):
+    """Build a FakeChatModel standing in for `model`, configured from SDLC_FAKE_LLM_CONFIG."""
+    config = {**load_fake_config(), **overrides}
+    return FakeChatModel(model_name=model, calls={}, **config)
@@ -0,0 +1,163 @@
+"""Version history of a run's artifacts, stored as line deltas.
+
+Review loops overwrite the user stories, documentation and code in the state, so
+every text a node writes to one of them is recorded here as the artifact's next
+version, per run. A version is stored as a zlib-compressed list of line operations
+against the previous one (copy a range of its lines, or insert new text), with a
+full snapshot every SNAPSHOT_EVERY versions so rebuilding any version applies only
+a few deltas. Each generated code file is versioned on its own, so comparing two
+iterations of a large multi-file output only touches the files that changed.
+"""
+import difflib
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# SDLC_HISTORY_DB overrides it when a store is created
+DEFAULT_HISTORY_DB = "history.sqlite"
+SNAPSHOT_EVERY = 8
+# Rebuilt versions kept in memory, so stepping through a diff view does not replay deltas
+CACHE_ENTRIES = 64
+MAX_DIFF_LINES = 2000
+
+
+def make_delta(old_lines, new_lines):
+    """Encode new_lines as [start, end] copies of old_lines and inserted strings."""
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old_lines, ops):
+    """Rebuild the text a make_delta op list describes."""
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def diff_versions(old, new, old_label, new_label, context=3, max_lines=MAX_DIFF_LINES):
+    """Unified diff of two texts, cut off after max_lines lines; returns (diff, truncated)."""
+    diff = difflib.unified_diff(old.splitlines(True), new.splitlines(True), old_label, new_label, n=context)
+    lines = list(itertools.islice(diff, max_lines + 1))
+    truncated = len(lines) > max_lines
+    return "".join(line if line.endswith("\n") else line + "\n" for line in lines[:max_lines]), truncated
+
+
+class HistoryStore:
+    """Per-run artifact versions in a local SQLite file, stored as deltas against the previous version."""
+
+    def __init__(self, path=None):
+        self.path = path = path or os.environ.get("SDLC_HISTORY_DB", DEFAULT_HISTORY_DB)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS versions (
+                run_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                node TEXT NOT NULL,
+                created REAL NOT NULL,
+                snapshot INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (run_id, key, version)
+            )"""
+        )
+        self._conn.commit()
+
+    def record(self, run_id, key, node, text):
+        """Store text as the next version of key in the run; returns its number, or None if it is unchanged."""
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        with self._lock:
+            latest = self._conn.execute(
+                "SELECT version, digest FROM versions WHERE run_id = ? AND key = ? ORDER BY version DESC LIMIT 1",
+                (run_id, key),
+            ).fetchone()
+        if latest and latest[1] == digest:
+            return None
+        version = latest[0] + 1 if latest else 0
+        snapshot = version % SNAPSHOT_EVERY == 0
+        if snapshot:
+            payload = text
+        else:
+            previous = self.text(run_id, key, version - 1)
+            payload = json.dumps(make_delta(previous.splitlines(True), text.splitlines(True)))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO versions (run_id, key, version, node, created, snapshot, data, size, digest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, key, version, node, time.time(), int(snapshot), zlib.compress(payload.encode(), 6), len(text), digest),
+            )
+            self._conn.commit()
+            self._remember((run_id, key, version), text)
+        return version
+
+    def text(self, run_id, key, version):
+        """Rebuild one version from the nearest snapshot at or before it."""
+        with self._lock:
+            if (run_id, key, version) in self._cache:
+                self._cache.move_to_end((run_id, key, version))
+                return self._cache[(run_id, key, version)]
+            rows = self._conn.execute(
+                "SELECT snapshot, data FROM versions WHERE run_id = ? AND key = ? AND version BETWEEN ? AND ? ORDER BY version",
+                (run_id, key, version - version % SNAPSHOT_EVERY, version),
+            ).fetchall()
+        if not rows or not rows[0][0]:
+            raise KeyError(f"no version {version} of {key} in run {run_id}")
+        text = ""
+        for snapshot, data in rows:
+            payload = zlib.decompress(data).decode()
+            text = payload if snapshot else apply_delta(text.splitlines(True), json.loads(payload))
+        with self._lock:
+            self._remember((run_id, key, version), text)
+        return text
+
+    def _remember(self, cache_key, text):
+        self._cache[cache_key] = text
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > CACHE_ENTRIES:
+            self._cache.popitem(last=False)
+
+    def delete_run(self, run_id):
+        """Delete every version recorded for a run."""
+        with self._lock:
+            self._conn.execute("DELETE FROM versions WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+            for cache_key in [cache_key for cache_key in self._cache if cache_key[0] == run_id]:
+                del self._cache[cache_key]
+
+    def versions(self, run_id):
+        """Return {key: [{"version", "node", "created", "size"}, ...]} for a run, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, version, node, created, size FROM versions WHERE run_id = ? ORDER BY key, version", (run_id,)
+            ).fetchall()
+        versions = {}
+        for key, version, node, created, size in rows:
+            versions.setdefault(key, []).append({"version": version, "node": node, "created": created, "size": size})
+        return versions
+
+    def stats(self, run_id=None):
+        """Return the number of versions, the text they hold and the bytes stored for them."""
+        query = "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM versions"
+        with self._lock:
+            row = self._conn.execute(query + " WHERE run_id = ?" if run_id else query, (run_id,) if run_id else ()).fetchone()
+        return {"versions": row[0], "text_bytes": row[1], "stored_bytes": row[2]}
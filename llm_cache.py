@@ -0,0 +1,138 @@
+"""Content-addressed on-disk cache for LLM responses.
+
+Every chat model call (plain generations and structured-output routers alike)
+goes through LangChain's global LLM cache, so registering this cache with
+``set_llm_cache`` puts it in front of every ``invoke`` / ``ainvoke`` in the apps.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+# SDLC_LLM_CACHE_DB overrides it when a cache is created
+DEFAULT_CACHE_DB = "llm_cache.sqlite"
+DEFAULT_MAX_BYTES = int(os.environ.get("SDLC_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+DEFAULT_MAX_AGE = float(os.environ.get("SDLC_LLM_CACHE_MAX_AGE_DAYS", "7")) * 24 * 60 * 60
+
+
+def cache_key(prompt, llm_string):
+    """Hash the model, its parameters and the serialized message list into a cache key."""
+    return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+
+def _dump_generations(generations):
+    """Serialize generations to JSON without pickling arbitrary objects."""
+    records = []
+    for generation in generations:
+        if isinstance(generation, ChatGeneration):
+            records.append({"message": message_to_dict(generation.message),
+                            "generation_info": generation.generation_info})
+        else:
+            records.append({"text": generation.text, "generation_info": generation.generation_info})
+    return json.dumps(records)
+
+
+def _load_generations(payload):
+    """Rebuild generations serialized by _dump_generations."""
+    generations = []
+    for record in json.loads(payload):
+        # Marked so usage accounting (e.g. the rate limiter) can tell cache hits apart
+        generation_info = {**(record["generation_info"] or {}), "cached": True}
+        if "message" in record:
+            message = messages_from_dict([record["message"]])[0]
+            generations.append(ChatGeneration(message=message, generation_info=generation_info))
+        else:
+            generations.append(Generation(text=record["text"], generation_info=generation_info))
+    return generations
+
+
+class SQLiteLLMCache(BaseCache):
+    """LLM response cache in a local SQLite file with size- and age-based LRU eviction."""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.path = path = path or os.environ.get("SDLC_LLM_CACHE_DB", DEFAULT_CACHE_DB)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+        self._conn.commit()
+
+    def lookup(self, prompt, llm_string):
+        """Return cached generations for the prompt, or None on a miss."""
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND created >= ?", (key, now - self.max_age)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return _load_generations(row[0])
+
+    def update(self, prompt, llm_string, return_val):
+        """Store generations for the prompt and evict entries over the size or age limit."""
+        key = cache_key(prompt, llm_string)
+        value = _dump_generations(return_val)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode()), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        self._conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.max_age,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self, **kwargs):
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current size of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+def enable_llm_cache(path=None, **kwargs):
+    """Create the on-disk cache and register it for every LangChain model call."""
+    cache = SQLiteLLMCache(path, **kwargs)
+    set_llm_cache(cache)
+    return cache
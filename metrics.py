@@ -0,0 +1,168 @@
+"""Per-node token, latency and cost instrumentation for workflow runs.
+
+RunMetrics is a LangChain callback handler: passing it in the graph config's
+``callbacks`` makes every chat model and structured router call inside the
+graph report to it, tagged with the LangGraph node that made the call. Node
+reruns by ``rate_limiter.with_backoff`` are counted as that node's retries.
+"""
+import json
+import os
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from rate_limiter import RETRY_EVENT
+
+# SDLC_METRICS_DIR overrides it when metrics are written
+METRICS_DIR = "metrics"
+
+# Estimated USD price per million (input, output) tokens
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimate the USD cost of a call from the model's token prices."""
+    for name, (input_price, output_price) in sorted(MODEL_PRICES.items(), key=lambda item: -len(item[0])):
+        if model and name in model:
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+class RunMetrics(BaseCallbackHandler):
+    """Collect one record per LLM call (node, loop iteration, tokens, timings and cost) and each node's retries."""
+
+    # Run on the event loop thread so token timestamps are not delayed by an executor
+    run_inline = True
+
+    def __init__(self, run_id=""):
+        self.run_id = run_id
+        self.calls = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._nodes = {}
+        self._steps = {}
+        self._retries = {}
+
+    def _node_for(self, run_id, parent_run_id):
+        return self._nodes.get(run_id) or self._nodes.get(parent_run_id, "")
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node") or self._nodes.get(parent_run_id)
+        if node:
+            self._nodes[run_id] = node
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node") or self._node_for(run_id, parent_run_id)
+        with self._lock:
+            # Each new graph step a node runs in is one more iteration of that node
+            steps = self._steps.setdefault(node, [])
+            step = metadata.get("langgraph_step")
+            if step not in steps:
+                steps.append(step)
+            self._pending[run_id] = {
+                "node": node,
+                "iteration": len(steps),
+                "model": metadata.get("ls_model_name", ""),
+                "start": time.perf_counter(),
+                "first_token": None,
+            }
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        call = self._pending.get(run_id)
+        if call and call["first_token"] is None:
+            call["first_token"] = time.perf_counter()
+
+    def on_custom_event(self, name, data, *, run_id, **kwargs):
+        if name != RETRY_EVENT:
+            return
+        node = self._nodes.get(run_id, "")
+        with self._lock:
+            self._retries[node] = self._retries.get(node, 0) + 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+        self._finish(run_id, prompt_tokens, completion_tokens, None)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, 0, 0, repr(error))
+
+    def _finish(self, run_id, prompt_tokens, completion_tokens, error):
+        with self._lock:
+            call = self._pending.pop(run_id, None)
+            if call is None:
+                return
+            end = time.perf_counter()
+            self.calls.append({
+                "node": call["node"],
+                "iteration": call["iteration"],
+                "model": call["model"],
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "wall_time": end - call["start"],
+                "time_to_first_token": call["first_token"] - call["start"] if call["first_token"] else None,
+                "cost": estimate_cost(call["model"], prompt_tokens, completion_tokens),
+                "error": error,
+            })
+
+    def by_node(self):
+        """Aggregate the recorded calls per node."""
+        nodes = {}
+        with self._lock:
+            calls = list(self.calls)
+            retries = dict(self._retries)
+
+        def totals_for(node):
+            return nodes.setdefault(node, {
+                "calls": 0, "iterations": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "wall_time": 0.0, "time_to_first_token": None, "retries": 0, "cost": 0.0,
+            })
+
+        for call in calls:
+            totals = totals_for(call["node"])
+            totals["calls"] += 1
+            totals["iterations"] = max(totals["iterations"], call["iteration"])
+            for key in ("prompt_tokens", "completion_tokens", "wall_time", "cost"):
+                totals[key] += call[key]
+            if totals["time_to_first_token"] is None:
+                totals["time_to_first_token"] = call["time_to_first_token"]
+        for node, count in retries.items():
+            totals_for(node)["retries"] += count
+        return nodes
+
+    def totals(self):
+        """Return totals across every node."""
+        nodes = self.by_node().values()
+        return {
+            "calls": sum(n["calls"] for n in nodes),
+            "prompt_tokens": sum(n["prompt_tokens"] for n in nodes),
+            "completion_tokens": sum(n["completion_tokens"] for n in nodes),
+            "llm_time": sum(n["wall_time"] for n in nodes),
+            "elapsed": time.time() - self.started,
+            "retries": sum(n["retries"] for n in nodes),
+            "cost": sum(n["cost"] for n in nodes),
+        }
+
+    def to_dict(self):
+        return {"run_id": self.run_id, "totals": self.totals(), "nodes": self.by_node(), "calls": list(self.calls)}
+
+    def write_json(self, directory=None):
+        """Write the run's metrics to <directory>/<run_id>.json and return the path."""
+        directory = directory or os.environ.get("SDLC_METRICS_DIR", METRICS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id or int(self.started)}.json")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
@@ -0,0 +1,99 @@
+"""Per-node model selection for the SDLC graphs.
+
+Review nodes only classify their input as Approved/Feedback (or Passed/Failed)
+with a short note, so they run on a cheap, fast model, while the nodes that
+write stories, documents, code and tests keep the strong one. Models are named
+"provider:model", e.g. "google:gemini-2.0-flash" or "openai:gpt-4o".
+
+Pick a profile with SDLC_MODEL_PROFILE and override single nodes with
+SDLC_NODE_MODELS, a JSON object such as {"Code Review": "google:gemini-2.0-flash"}.
+"""
+import json
+import os
+
+from fake_llm import fake_backend_enabled, get_fake_llm
+from rate_limiter import get_rate_limiter, rate_limit_kwargs
+
+MODEL_PROFILES = {
+    "gemini": {"generator": "google:gemini-2.0-flash", "reviewer": "google:gemini-2.0-flash-lite"},
+    "gemini-single": {"generator": "google:gemini-2.0-flash", "reviewer": "google:gemini-2.0-flash"},
+    "openai": {"generator": "openai:gpt-4o", "reviewer": "openai:gpt-4o-mini"},
+    "openai-single": {"generator": "openai:gpt-4o", "reviewer": "openai:gpt-4o"},
+}
+
+# Environment variable holding each provider's API key
+API_KEY_ENV = {"google": "GOOGLE_API_KEY", "openai": "OPENAI_API_KEY"}
+
+# Nodes that only route the graph; every other node is a generator
+REVIEWER_NODES = {
+    "Product Owner Review",
+    "Design Review",
+    "Code Review",
+    "Security Review",
+    "Test Cases Review",
+    "QA Testing",
+}
+
+
+def node_overrides():
+    """Return the per-node model overrides from SDLC_NODE_MODELS."""
+    return json.loads(os.environ.get("SDLC_NODE_MODELS") or "{}")
+
+
+def node_model(node, profile):
+    """Return the "provider:model" a node runs on under a profile."""
+    overrides = node_overrides()
+    if node in overrides:
+        return overrides[node]
+    role = "reviewer" if node in REVIEWER_NODES else "generator"
+    return MODEL_PROFILES[profile][role]
+
+
+def profile_providers(profile):
+    """Return the providers a profile's nodes call, SDLC_NODE_MODELS overrides included."""
+    specs = [*MODEL_PROFILES[profile].values(), *node_overrides().values()]
+    return sorted({split_model(spec)[0] for spec in specs})
+
+
+def env_api_keys(profile):
+    """Return the profile's API keys from the environment as (provider, key) pairs, or None if one is unset."""
+    keys = tuple((provider, os.environ.get(API_KEY_ENV[provider])) for provider in profile_providers(profile))
+    return keys if all(key for _, key in keys) else None
+
+
+def split_model(spec):
+    """Split "provider:model" into (provider, model)."""
+    provider, _, model = spec.partition(":")
+    if not model:
+        raise ValueError(f"Model {spec!r} must be given as provider:model")
+    return provider, model
+
+
+def node_rate_limiter(node, profile):
+    """Return the shared rate limiter of the model a node runs on."""
+    return get_rate_limiter(*split_model(node_model(node, profile)))
+
+
+def create_chat_model(spec, api_keys=None):
+    """Build the chat model client for "provider:model", rate limited and honoring the fake backend.
+
+    Keys missing from api_keys ({"google": ..., "openai": ...}) are read from the environment.
+    """
+    provider, model = split_model(spec)
+    api_keys = api_keys or {}
+    limits = rate_limit_kwargs(provider, model)
+    if fake_backend_enabled():
+        return get_fake_llm(model, **limits)
+    # with_backoff is the only retry layer; the clients' own retries would multiply its attempts
+    if provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        # A single attempt is max_retries=1 here
+        return ChatGoogleGenerativeAI(
+            model=model, google_api_key=api_keys.get("google") or os.environ.get("GOOGLE_API_KEY"), max_retries=1, **limits
+        )
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(model=model, api_key=api_keys.get("openai") or os.environ.get("OPENAI_API_KEY"), max_retries=0, **limits)
+    raise ValueError(f"Unknown model provider {provider!r}")
@@ -0,0 +1,266 @@
+"""Process-wide request and token rate limiting for LLM calls.
+
+One SharedRateLimiter exists per (provider, model) and is shared by every
+session, batch job and graph in the process. It plugs into the chat models'
+``rate_limiter`` field, which LangChain consults after the LLM cache lookup, so
+every node and structured router is paced and cache hits are not. Token usage
+is charged from the model's callbacks once a response arrives.
+
+Provider 429s are retried per node by ``with_backoff``: jittered exponential
+backoff that never waits less than the provider's Retry-After, and that pauses
+every caller of the same limiter rather than only the one that was rejected.
+Each retry is reported to the run's callbacks as a RETRY_EVENT custom event.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import random
+import re
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.callbacks.manager import adispatch_custom_event, dispatch_custom_event
+from langchain_core.rate_limiters import BaseRateLimiter
+
+# Requests and tokens per minute, per (provider, model); set below the account's quota
+RATE_LIMITS = {
+    ("google", "gemini-2.0-flash"): {"rpm": 2000, "tpm": 4_000_000},
+    ("google", "gemini-2.0-flash-lite"): {"rpm": 4000, "tpm": 4_000_000},
+    ("openai", "gpt-4o"): {"rpm": 500, "tpm": 30_000},
+    ("openai", "gpt-4o-mini"): {"rpm": 500, "tpm": 200_000},
+}
+DEFAULT_RATE_LIMIT = {"rpm": 60, "tpm": 100_000}
+
+MAX_ATTEMPTS = int(os.environ.get("SDLC_RATE_LIMIT_MAX_ATTEMPTS", "6"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+RETRY_EVENT = "rate_limit_retry"
+# How providers phrase a 429 when the error carries no status; a bare "429" may be a count, port or id
+RATE_LIMIT_MESSAGE = re.compile(
+    r"error code: 429|\b429 (?:too many requests|resource)|resource_exhausted|resource (?:has been )?exhausted"
+    r"|rate[ _-]?limit|too many requests",
+    re.IGNORECASE,
+)
+
+
+class TokenBucket:
+    """A bucket refilled continuously at per_minute / 60 units per second."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now):
+        self._refill(now)
+        return self.level
+
+    def wait(self, now):
+        """Seconds until the bucket is out of debt."""
+        return max(0.0, -self.available(now) / self.rate)
+
+    def take(self, amount, now):
+        """Take amount, going into debt if needed; return the seconds until that debt is repaid."""
+        self._refill(now)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+
+class SharedRateLimiter(BaseRateLimiter):
+    """Requests/min and tokens/min limiter for one provider and model, with queueing metrics."""
+
+    def __init__(self, provider, model, rpm=None, tpm=None):
+        self.provider = provider
+        self.model = model
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0, "queued": 0, "queue_time": 0.0, "max_queue_time": 0.0,
+            "tokens": 0, "rate_limit_errors": 0, "backoff_time": 0.0,
+        }
+
+    def _reserve(self, blocking):
+        """Reserve one request and return how long the caller must wait, or None if it may not."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.blocked_until - now, self.tokens.wait(now) if self.tokens else 0.0)
+            if not blocking and (wait > 0 or (self.requests and self.requests.available(now) < 1)):
+                return None
+            if self.requests:
+                wait = max(wait, self.requests.take(1, now))
+            self._stats["requests"] += 1
+            if wait > 0:
+                self._stats["queued"] += 1
+                self._stats["queue_time"] += wait
+                self._stats["max_queue_time"] = max(self._stats["max_queue_time"], wait)
+            return wait
+
+    def acquire(self, *, blocking=True):
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking=True):
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def record_usage(self, tokens):
+        """Charge the tokens a response actually used against the tokens/min budget."""
+        with self._lock:
+            self._stats["tokens"] += tokens
+            if self.tokens:
+                self.tokens.take(tokens, time.monotonic())
+
+    def penalize(self, delay):
+        """Pause every caller of this limiter for delay seconds after a provider 429."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self._stats["rate_limit_errors"] += 1
+            self._stats["backoff_time"] += delay
+
+    def stats(self):
+        """Return request, queueing-delay and 429 counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_queue_time"] = stats["queue_time"] / stats["queued"] if stats["queued"] else 0.0
+        return stats
+
+
+class RateLimitUsage(BaseCallbackHandler):
+    """Charge each response's token usage to a limiter; cached responses are free."""
+
+    # Cheap and thread-safe, so skip the executor hop async callback managers make per streamed token
+    run_inline = True
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response, **kwargs):
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                if (generation.generation_info or {}).get("cached"):
+                    return
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                tokens += usage.get("total_tokens", 0)
+        if tokens:
+            self.limiter.record_usage(tokens)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider, model):
+    """Return the process-wide limiter for a provider and model.
+
+    SDLC_RATE_LIMIT_RPM / SDLC_RATE_LIMIT_TPM override the configured limits.
+    """
+    with _limiters_lock:
+        if (provider, model) not in _limiters:
+            limits = RATE_LIMITS.get((provider, model), DEFAULT_RATE_LIMIT)
+            rpm = int(os.environ.get("SDLC_RATE_LIMIT_RPM", limits["rpm"]))
+            tpm = int(os.environ.get("SDLC_RATE_LIMIT_TPM", limits["tpm"]))
+            _limiters[(provider, model)] = SharedRateLimiter(provider, model, rpm, tpm)
+        return _limiters[(provider, model)]
+
+
+def rate_limiters():
+    """Return every limiter created so far in this process."""
+    with _limiters_lock:
+        return list(_limiters.values())
+
+
+def rate_limit_kwargs(provider, model):
+    """Keyword arguments that attach the shared limiter to a chat model client."""
+    limiter = get_rate_limiter(provider, model)
+    return {"rate_limiter": limiter, "callbacks": [RateLimitUsage(limiter)]}
+
+
+def is_rate_limit_error(error):
+    """Return True for provider 429 / quota-exhausted errors, including ones wrapped by LangChain."""
+    while error is not None:
+        response = getattr(error, "response", None)
+        for status in (getattr(error, "status_code", None), getattr(error, "code", None), getattr(response, "status_code", None)):
+            if status in (429, "429"):
+                return True
+        if RATE_LIMIT_MESSAGE.search(str(error)):
+            return True
+        error = error.__cause__
+    return False
+
+
+def retry_after(error):
+    """Return the Retry-After delay in seconds carried by a provider error, if any."""
+    if getattr(error, "retry_after", None) is not None:
+        return float(error.retry_after)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt, error):
+    """Full-jitter exponential backoff, but never shorter than the provider's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after(error) or 0.0)
+
+
+def with_backoff(node, limiter, max_attempts=MAX_ATTEMPTS):
+    """Wrap a graph node so a rate-limited LLM call reruns it after a backoff delay."""
+
+    def delay_for(attempt, error):
+        if not is_rate_limit_error(error) or attempt == max_attempts - 1:
+            raise error
+        delay = backoff_delay(attempt, error)
+        limiter.penalize(delay)
+        print(f"[rate limit] {node.__name__}: {error}; retrying in {delay:.1f}s (attempt {attempt + 2}/{max_attempts})")
+        return delay
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def retrying(state):
+            for attempt in range(max_attempts):
+                try:
+                    return await node(state)
+                except Exception as e:
+                    delay = delay_for(attempt, e)
+                    try:
+                        await adispatch_custom_event(RETRY_EVENT, {"attempt": attempt + 2, "delay": delay})
+                    except RuntimeError:
+                        pass  # not running inside a graph, so there are no callbacks to tell
+                    await asyncio.sleep(delay)
+        return retrying
+
+    @functools.wraps(node)
+    def retrying(state):
+        for attempt in range(max_attempts):
+            try:
+                return node(state)
+            except Exception as e:
+                delay = delay_for(attempt, e)
+                try:
+                    dispatch_custom_event(RETRY_EVENT, {"attempt": attempt + 2, "delay": delay})
+                except RuntimeError:
+                    pass
+                time.sleep(delay)
+    return retrying
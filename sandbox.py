@@ -0,0 +1,198 @@
+"""Sandboxed execution of generated test suites.
+
+The generated code files and test files are written to a fresh temporary
+workspace and pytest runs there in a subprocess, with limits on CPU time, address
+space, file size and wall-clock time, a minimal environment (no API keys or
+credentials) and its own process group, which is killed when it overruns. A pool
+of SDLC_TEST_WORKERS threads each drives one such subprocess at a time, so test
+runs from every session share a fixed budget. Pass/fail counts and the tracebacks
+of failing tests are read from pytest's JUnit report.
+
+This is process isolation, not a security boundary: tests run as the current
+user and can reach the network. Run the app in a container to contain untrusted code.
+"""
+import asyncio
+import os
+import posixpath
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+
+DEFAULT_WORKERS = int(os.environ.get("SDLC_TEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_TIMEOUT = float(os.environ.get("SDLC_TEST_TIMEOUT", "60"))
+DEFAULT_CPU_SECONDS = int(os.environ.get("SDLC_TEST_CPU_SECONDS", "30"))
+DEFAULT_MEMORY_MB = int(os.environ.get("SDLC_TEST_MEMORY_MB", "1024"))
+MAX_FILE_MB = 64
+# Environment variables passed through to the tests; everything else (API keys included) is dropped
+ENV_PASSTHROUGH = ("PATH", "LANG", "LC_ALL", "TZ", "SYSTEMROOT")
+
+# Applies the limits in the child, then runs pytest (preexec_fn is not safe with threads)
+LAUNCHER = """\
+import resource, runpy, sys
+cpu, memory, file_size = map(int, sys.argv[1:4])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+sys.argv = ["pytest", *sys.argv[4:]]
+runpy.run_module("pytest", run_name="__main__", alter_sys=True)
+"""
+MISSING_MODULE = re.compile(r"No module named '([\w.]+)'")
+
+
+def safe_path(path):
+    """Normalize a generated file path; None if it is absolute or leaves the workspace."""
+    path = posixpath.normpath(path.replace("\\", "/"))
+    if path.startswith(("/", "../")) or path in (".", "..") or ":" in path:
+        return None
+    return path
+
+
+def is_test_file(path):
+    name = posixpath.basename(path)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def workspace_files(code_files, test_files):
+    """Merge code and tests into one {path: content} map; Python tests get a name pytest collects."""
+    files = {}
+    for path, content in code_files.items():
+        path = safe_path(path)
+        if path:
+            files[path] = content
+    tests = []
+    for path, content in test_files.items():
+        path = safe_path(path)
+        if not path or not path.endswith(".py"):
+            continue
+        if not is_test_file(path):
+            directory, name = posixpath.split(path)
+            path = posixpath.join(directory, f"test_{name}")
+        files[path] = content
+        tests.append(path)
+    return files, tests
+
+
+def read_report(path, local_modules):
+    """Count outcomes in a JUnit report; failures importing a module the project does not contain are 'unavailable'."""
+    result = {"passed": 0, "failed": 0, "errors": 0, "skipped": 0, "unavailable": 0, "failures": [], "missing_modules": []}
+    for case in ET.parse(path).getroot().iter("testcase"):
+        name = "::".join(part for part in (case.get("classname"), case.get("name")) if part)
+        problem = next((child for child in case if child.tag in ("failure", "error")), None)
+        if problem is None:
+            outcome = "skipped" if case.find("skipped") is not None else "passed"
+            result[outcome] += 1
+            continue
+        details = problem.text or problem.get("message") or ""
+        missing = MISSING_MODULE.search(details)
+        if missing and missing.group(1).split(".")[0] not in local_modules:
+            result["unavailable"] += 1
+            if missing.group(1) not in result["missing_modules"]:
+                result["missing_modules"].append(missing.group(1))
+            continue
+        result["failed" if problem.tag == "failure" else "errors"] += 1
+        result["failures"].append({"test": name, "message": problem.get("message", ""), "details": details})
+    return result
+
+
+class SandboxPool:
+    """Runs generated test suites in resource-limited subprocesses, at most `workers` at once."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, cpu_seconds=DEFAULT_CPU_SECONDS,
+                 memory_mb=DEFAULT_MEMORY_MB):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 1024 * 1024
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="sandbox")
+
+    async def arun(self, code_files, test_files):
+        """Run the tests on the pool without blocking the event loop; see run."""
+        return await asyncio.wrap_future(self._pool.submit(self.run, code_files, test_files))
+
+    def run(self, code_files, test_files):
+        """Write code and tests to a temporary workspace and run pytest there.
+
+        Returns None when there is nothing to run (no Python tests, or pytest is
+        not installed), otherwise the outcome counts, failures and timing.
+        """
+        files, tests = workspace_files(code_files, test_files)
+        if not tests or find_spec("pytest") is None:
+            return None
+        with tempfile.TemporaryDirectory(prefix="sdlc-tests-") as workspace:
+            for path, content in files.items():
+                full_path = os.path.join(workspace, path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                with open(full_path, "w") as f:
+                    f.write(content)
+            report = os.path.join(workspace, ".report.xml")
+            env = {key: os.environ[key] for key in ENV_PASSTHROUGH if key in os.environ}
+            # The app's own pytest plugins are not the project's, and loading them costs over a second
+            env.update(HOME=workspace, TMPDIR=workspace, PYTHONPATH=workspace, PYTHONDONTWRITEBYTECODE="1",
+                       PYTEST_DISABLE_PLUGIN_AUTOLOAD="1")
+            limits = [str(self.cpu_seconds), str(self.memory_bytes), str(MAX_FILE_MB * 1024 * 1024)]
+            command = [sys.executable, "-c", LAUNCHER, *limits, "-q", "-p", "no:cacheprovider",
+                       "--continue-on-collection-errors", f"--junitxml={report}", *tests]
+            start = time.perf_counter()
+            process = subprocess.Popen(
+                command, cwd=workspace, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, text=True, start_new_session=True,
+            )
+            timed_out = False
+            try:
+                output, _ = process.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                os.killpg(process.pid, signal.SIGKILL)
+                output, _ = process.communicate()
+            duration = time.perf_counter() - start
+            local_modules = {path.split("/")[0].removesuffix(".py") for path in files}
+            if os.path.exists(report):
+                result = read_report(report, local_modules)
+            else:
+                # Killed before pytest wrote its report (timeout, CPU or memory limit)
+                result = {"passed": 0, "failed": 0, "errors": 1, "skipped": 0, "unavailable": 0, "missing_modules": [],
+                          "failures": [{"test": "test run", "message": "no report", "details": output[-4000:]}]}
+        if timed_out:
+            result["failures"].insert(0, {"test": "test run", "message": f"timed out after {self.timeout:.0f}s", "details": ""})
+        elif process.returncode < 0:
+            reason = "CPU time limit" if -process.returncode == signal.SIGXCPU else signal.Signals(-process.returncode).name
+            result["failures"].insert(0, {"test": "test run", "message": f"killed ({reason})", "details": ""})
+        result.update(runner="pytest", tests=tests, duration=duration, timed_out=timed_out, returncode=process.returncode)
+        print(f"[sandbox] {len(tests)} test files: {result['passed']} passed, {result['failed']} failed, "
+              f"{result['errors']} errors, {result['unavailable']} unavailable in {duration:.1f}s")
+        return result
+
+
+def tests_ran(result):
+    """Whether a run produced a verdict on the code, i.e. some test ran or the run itself failed."""
+    return bool(result) and (result["passed"] + result["failed"] + result["errors"] > 0 or result["timed_out"])
+
+
+def run_decision(result):
+    """QA decision for a run that produced a verdict."""
+    return "Failed" if result["failed"] or result["errors"] or result["timed_out"] else "Passed"
+
+
+def format_report(result, max_chars=8000):
+    """Summarize a test run as markdown feedback: the counts, then each failure's traceback."""
+    lines = [
+        f"**Test run (pytest, sandboxed):** {result['passed']} passed, {result['failed']} failed, "
+        f"{result['errors']} errors, {result['skipped']} skipped in {result['duration']:.1f}s"
+    ]
+    if result["unavailable"]:
+        lines.append(f"{result['unavailable']} tests could not run here: missing {', '.join(result['missing_modules'])}")
+    budget = max_chars
+    for failure in result["failures"]:
+        block = f"\n### {failure['test']}: {failure['message']}\n```\n{failure['details'].strip()[-3000:]}\n```"
+        if len(block) > budget:
+            lines.append(f"\n... {len(result['failures'])} failures in total; the rest are omitted")
+            break
+        lines.append(block)
+        budget -= len(block)
+    return "\n".join(lines)
@@ -0,0 +1,346 @@
+"""Local HTTP job API for the SDLC pipeline in app.py.
+
+Project specs are queued as jobs and run by a pool of workers on the app's
+shared event loop, so throughput scales with --workers instead of open browser
+tabs. Every job is checkpointed under its job id, which is also the run id the
+Streamlit UI uses.
+
+    POST /jobs                          queue {project_name, project_description, features[, job_id]}
+    GET  /jobs                          list jobs
+    GET  /jobs/<id>                     status, current node, completed nodes and metrics
+    GET  /jobs/<id>/state               the job's last checkpointed state
+    GET  /jobs/<id>/events              server-sent events: status, node, token and end
+    GET  /jobs/<id>/artifacts           list downloadable artifacts
+    GET  /jobs/<id>/artifacts/<name>    download one artifact
+    GET  /jobs/<id>/bundle.zip          download every artifact as one ZIP
+
+Run with:  python server.py --port 8000 --workers 4
+and point the UI at it with SDLC_API_URL=http://127.0.0.1:8000 streamlit run app.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import app
+from artifacts import ArtifactStore, artifact_files
+from fake_llm import fake_backend_enabled
+from metrics import RunMetrics
+from model_routing import API_KEY_ENV, env_api_keys, profile_providers
+
+PROJECT_FIELDS = ("project_name", "project_description", "features")
+KEEPALIVE_INTERVAL = 15
+# Finished jobs are forgotten after this long, or once more than this many have finished;
+# resubmitting one replays it from its checkpoint
+JOB_TTL = float(os.environ.get("SDLC_JOB_TTL_HOURS", 24)) * 3600
+MAX_FINISHED_JOBS = int(os.environ.get("SDLC_MAX_FINISHED_JOBS", 500))
+# Job ids name checkpoint threads, metrics files and download file names
+JOB_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def public_state(values, resolve=True):
+    """Return the JSON-safe part of a state or update that the UI renders, with blob references resolved unless `resolve` is false."""
+    public = {key: values[key] for key in (*PROJECT_FIELDS, *app.SESSION_STATE_KEYS) if key in values}
+    if resolve:
+        public = app.get_blob_store().unpack(public)
+    for key in ("context_savings", "speculation_stats", "static_analysis_stats"):
+        if key in values:
+            public[key] = values[key]
+    if "review_loops" in values:
+        public["review_loops"] = {
+            node: {"iterations": loop["iterations"], "stopped": loop["stopped"]}
+            for node, loop in values["review_loops"].items()
+        }
+    return public
+
+
+class Job:
+    """One queued pipeline run and the progress events recorded for it."""
+
+    def __init__(self, job_id, spec):
+        self.id = job_id
+        self.spec = spec
+        self.created = time.time()
+        self._changed = threading.Condition()
+        self.events = []
+        self.reset()
+
+    def reset(self):
+        """Clear the status of a previous attempt, so the job can be queued again.
+
+        Events keep accumulating across attempts; `first_event` is where the current one starts.
+        """
+        self.status = "queued"
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.current_node = ""
+        self.completed_nodes = []
+        self.metrics = {}
+        with self._changed:
+            self.first_event = len(self.events)
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed")
+
+    def emit(self, kind, data):
+        with self._changed:
+            self.events.append((kind, data))
+            self._changed.notify_all()
+
+    def set_status(self, status, error=None):
+        self.status = status
+        self.error = error
+        if status == "running":
+            self.started = time.time()
+        elif self.done:
+            self.finished = time.time()
+            self.drop_tokens()
+        self.emit("end" if self.done else "status", {"status": status, "error": error})
+
+    def drop_tokens(self):
+        """Blank out the token events, which only matter while a run is streaming; event ids stay stable."""
+        with self._changed:
+            for i, event in enumerate(self.events):
+                if event and event[0] == "token":
+                    self.events[i] = None
+
+    def wait_events(self, start, timeout):
+        """Block until there are events after `start` or the job is done; return them and whether it is."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > start or self.done, timeout)
+            return self.events[start:], self.done
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "project_name": self.spec.get("project_name", ""),
+            "status": self.status,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "wall_time": (self.finished or time.time()) - self.started if self.started else None,
+            "current_node": self.current_node,
+            "completed_nodes": self.completed_nodes,
+            "metrics": self.metrics,
+        }
+
+
+class JobManager:
+    """Queue of jobs served by `workers` concurrent runs of the compiled workflow."""
+
+    def __init__(self, workers, profile=app.DEFAULT_PROFILE, api_keys=None):
+        self.workflow = app.build_workflow(profile, api_keys)
+        self.loop = app.get_event_loop()
+        self.jobs = {}
+        self._lock = threading.Lock()
+        asyncio.run_coroutine_threadsafe(self._start(workers), self.loop).result()
+
+    async def _start(self, workers):
+        self.queue = asyncio.Queue()
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    def submit(self, spec, job_id=None):
+        """Queue a job, or return the existing one with that id.
+
+        An unknown id, or a job that failed, is (re)queued and resumes from its checkpoint.
+        """
+        with self._lock:
+            job_id = job_id or uuid.uuid4().hex
+            job = self.jobs.get(job_id)
+            if job and job.status != "failed":
+                return job, False
+            if job:
+                job.reset()
+            else:
+                self._evict()
+                job = self.jobs[job_id] = Job(job_id, spec)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, job)
+        return job, True
+
+    def _evict(self):
+        """Forget finished jobs older than JOB_TTL, and the oldest beyond MAX_FINISHED_JOBS."""
+        finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.finished)
+        expired = time.time() - JOB_TTL
+        for i, job in enumerate(finished):
+            if job.finished < expired or len(finished) - i > MAX_FINISHED_JOBS:
+                del self.jobs[job.id]
+
+    def state(self, job_id):
+        """Return the job's last checkpointed state, with blob references resolved, and the nodes it would run next."""
+        config = app.run_config(job_id)
+        snapshot = asyncio.run_coroutine_threadsafe(self.workflow.aget_state(config), self.loop).result()
+        return app.get_blob_store().unpack(snapshot.values), list(snapshot.next)
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job):
+        metrics = RunMetrics(job.id)
+        config = app.run_config(job.id)
+        job.set_status("running")
+        try:
+            # A job with a checkpoint continues where it stopped; a finished one is only replayed
+            snapshot = await self.workflow.aget_state(config)
+            if snapshot.values and not snapshot.next:
+                job.emit("node", {"node": "", "update": public_state(snapshot.values, resolve=False)})
+                job.set_status("completed")
+                return
+            inputs = None if snapshot.values else {**{k: job.spec[k] for k in PROJECT_FIELDS}, "messages": []}
+            config["callbacks"] = [metrics]
+            async for mode, event in self.workflow.astream(inputs, config, stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    chunk, chunk_metadata = event
+                    job.current_node = chunk_metadata.get("langgraph_node", "")
+                    job.emit("token", {"node": job.current_node, "text": app.message_text(chunk)})
+                    continue
+                for node, update in event.items():
+                    job.completed_nodes.append({"node": node, "time": time.time()})
+                    # Kept as blob references; send_events resolves them for each reader
+                    job.emit("node", {"node": node, "update": public_state(update or {}, resolve=False)})
+            job.set_status("completed")
+        except Exception as e:
+            job.set_status("failed", repr(e))
+        finally:
+            job.metrics = metrics.totals()
+            metrics.write_json()
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    """Routes the job API's requests to the JobManager in `manager`."""
+
+    manager = None
+    store = None
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self.send_json(404, {"error": "not found"})
+        try:
+            spec = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            return self.send_json(400, {"error": "invalid JSON"})
+        missing = [field for field in PROJECT_FIELDS if not spec.get(field)]
+        if missing:
+            return self.send_json(400, {"error": f"missing {', '.join(missing)}"})
+        if spec.get("job_id") is not None and not (isinstance(spec["job_id"], str) and JOB_ID.fullmatch(spec["job_id"])):
+            return self.send_json(400, {"error": "job_id must be 1-64 letters, digits, '_' or '-'"})
+        job, created = self.manager.submit(spec, spec.get("job_id"))
+        self.send_json(202 if created else 200, job.summary())
+
+    def do_GET(self):
+        parts = [unquote(part) for part in self.path.split("?")[0].strip("/").split("/")]
+        if parts == ["jobs"]:
+            return self.send_json(200, [job.summary() for job in list(self.manager.jobs.values())])
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self.send_json(404, {"error": "not found"})
+        if not JOB_ID.fullmatch(parts[1]):
+            return self.send_json(400, {"error": "invalid job id"})
+        job = self.manager.jobs.get(parts[1])
+        if len(parts) == 3 and parts[2] == "state":
+            values, next_nodes = self.manager.state(parts[1])
+            return self.send_json(200, {"values": public_state(values), "next": next_nodes})
+        if job is None:
+            return self.send_json(404, {"error": "unknown job"})
+        if len(parts) == 2:
+            return self.send_json(200, job.summary())
+        if parts[2] == "events":
+            return self.send_events(job)
+        if parts[2] == "bundle.zip":
+            return self.send_file(f"{job.id}.zip", self.store.bundle_bytes(artifact_files(self.manager.state(job.id)[0])))
+        if parts[2] == "artifacts":
+            files = artifact_files(self.manager.state(job.id)[0])
+            if len(parts) == 3:
+                return self.send_json(200, sorted(files))
+            name = "/".join(parts[3:])
+            if name not in files:
+                return self.send_json(404, {"error": "unknown artifact"})
+            return self.send_file(name, files[name])
+        self.send_json(404, {"error": "not found"})
+
+    def send_file(self, name, content):
+        payload = content if isinstance(content, bytes) else content.encode()
+        if name.endswith(".zip"):
+            content_type = "application/zip"
+        elif name.endswith(".md"):
+            content_type = "text/markdown; charset=utf-8"
+        else:
+            content_type = "text/plain; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(name)}"')
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_events(self, job):
+        """Stream the job's events as server-sent events, from Last-Event-ID or the start of its current attempt."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        last_id = self.headers.get("Last-Event-ID")
+        index = int(last_id) + 1 if last_id is not None else job.first_event
+        blobs = app.get_blob_store()
+        try:
+            while True:
+                events, done = job.wait_events(index, KEEPALIVE_INTERVAL)
+                if not events and not done:
+                    self.wfile.write(b": keep-alive\n\n")
+                for event in events:
+                    if event is None:
+                        index += 1
+                        continue
+                    kind, data = event
+                    if kind == "node":
+                        data = {**data, "update": blobs.unpack(data["update"])}
+                    self.wfile.write(f"id: {index}\nevent: {kind}\ndata: {json.dumps(data)}\n\n".encode())
+                    index += 1
+                self.wfile.flush()
+                if done and index >= len(job.events):
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the SDLC pipeline as a local HTTP job API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="jobs run concurrently")
+    args = parser.parse_args()
+
+    api_keys = "offline" if fake_backend_enabled() else env_api_keys(app.DEFAULT_PROFILE)
+    if not api_keys:
+        names = " and ".join(API_KEY_ENV[provider] for provider in profile_providers(app.DEFAULT_PROFILE))
+        raise SystemExit(f"{names} must be set for the {app.DEFAULT_PROFILE} profile (or use SDLC_LLM_BACKEND=fake)")
+    JobHandler.manager = JobManager(args.workers, api_keys=api_keys)
+    JobHandler.store = ArtifactStore()
+    app.start_cleanup()
+    server = ThreadingHTTPServer((args.host, args.port), JobHandler)
+    print(f"SDLC job API listening on http://{args.host}:{args.port} with {args.workers} workers")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""Local static analysis of generated code, run before the LLM reviews.
+
+Each Python file is parsed and compiled (syntax errors, ``return`` outside a
+function, ...), its names are resolved through its scopes, its imports are
+resolved against the project's own files, the standard library and the installed
+packages, and a few lint rules are applied. JSON files are parsed. Files are
+analysed in parallel in a process pool; imports between project files are then
+checked against the names each file defines.
+
+Findings are errors (the code cannot run as written) or warnings. Errors send the
+code straight back to the fixer without spending the review LLM calls; warnings
+are summarised for the reviewers. A file this interpreter is too old to parse is
+a warning, not an error.
+"""
+import asyncio
+import ast
+import builtins
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+
+DEFAULT_WORKERS = int(os.environ.get("SDLC_ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Errors
+SYNTAX_ERROR = "E1"
+UNDEFINED_NAME = "E2"
+MISSING_MODULE = "E3"
+MISSING_NAME = "E4"
+# Warnings
+UNUSED_IMPORT = "W1"
+BARE_EXCEPT = "W2"
+MUTABLE_DEFAULT = "W3"
+EVAL_CALL = "W4"
+NONE_COMPARISON = "W5"
+NOT_INSTALLED = "W6"
+NEWER_SYNTAX = "W7"
+
+# Syntax added after some interpreters we may run on, by the version that added it. A parse
+# error on a line using it may only mean the code targets a newer Python, so it is a warning.
+NEWER_GRAMMAR = [
+    ((3, 12), re.compile(r"^\s*(?:async\s+)?(?:def|class)\s+\w+\s*\[")),  # PEP 695 type parameters
+    ((3, 12), re.compile(r"^\s*type\s+\w+\s*(?:\[.*\])?\s*=")),  # PEP 695 type aliases
+    ((3, 12), re.compile(r"""(?<![\w'"])r?fr?(['"]).*\{[^}]*\1""", re.IGNORECASE)),  # PEP 701 quotes reused in f-strings
+    ((3, 14), re.compile(r"^\s*except\*?\s+[\w.]+\s*,[^:]*:")),  # PEP 758 unparenthesized except
+    ((3, 14), re.compile(r"""(?<![\w'"])r?tr?['"]""", re.IGNORECASE)),  # PEP 750 template strings
+]
+
+MODULE_NAMES = set(dir(builtins)) | {
+    "__file__", "__name__", "__doc__", "__spec__", "__loader__", "__package__", "__builtins__", "__path__",
+    "__annotations__", "__dict__", "__class__",
+}
+CLASS_NAMES = {"__module__", "__qualname__"}
+MUTABLE_CALLS = {"list", "dict", "set", "defaultdict", "OrderedDict"}
+
+
+def finding(path, line, code, message):
+    return {"path": path, "line": line, "code": code, "severity": "error" if code[0] == "E" else "warning",
+            "message": message}
+
+
+def newer_syntax(source, error):
+    """Return the newer Python version a syntax error's line may be written for, or None."""
+    lines = source.splitlines()
+    line = lines[error.lineno - 1] if error.lineno and error.lineno <= len(lines) else ""
+    for version, pattern in NEWER_GRAMMAR:
+        if version > sys.version_info[:2] and pattern.search(line):
+            return version
+    return None
+
+
+def module_name(path):
+    """Dotted module name of a project file: app/routes/main.py -> app.routes.main, app/__init__.py -> app."""
+    parts = path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+class Scope:
+    def __init__(self, kind, parent):
+        self.kind = kind
+        self.parent = parent
+        self.bindings = set()
+        self.loads = []
+
+
+class ScopeVisitor(ast.NodeVisitor):
+    """Collects each scope's bindings and name loads (flow-insensitively), imports and lint findings."""
+
+    def __init__(self, path):
+        self.path = path
+        self.module = Scope("module", None)
+        self.scope = self.module
+        self.scopes = [self.module]
+        self.star_import = False
+        self.imports = []
+        self.imported = {}
+        self.used = set()
+        self.findings = []
+
+    def push(self, kind):
+        self.scope = Scope(kind, self.scope)
+        self.scopes.append(self.scope)
+
+    def pop(self):
+        self.scope = self.scope.parent
+
+    def bind(self, name):
+        self.scope.bindings.add(name)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.scope.loads.append((node.id, node.lineno))
+            self.used.add(node.id)
+        else:
+            self.bind(node.id)
+
+    def visit_NamedExpr(self, node):
+        # An assignment expression in a comprehension binds in the enclosing function
+        scope = self.scope
+        while scope.kind == "comprehension":
+            scope = scope.parent
+        scope.bindings.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.module.bindings.update(node.names)
+        self.scope.bindings.update(node.names)
+
+    def visit_Nonlocal(self, node):
+        self.scope.bindings.update(node.names)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            name = alias.asname or alias.name.split(".")[0]
+            self.bind(name)
+            self.imported.setdefault(name, node.lineno)
+            self.imports.append({"line": node.lineno, "module": alias.name, "names": [], "level": 0})
+
+    def visit_ImportFrom(self, node):
+        names = []
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_import = True
+                continue
+            name = alias.asname or alias.name
+            self.bind(name)
+            if node.module != "__future__":
+                self.imported.setdefault(name, node.lineno)
+            names.append(alias.name)
+        self.imports.append({"line": node.lineno, "module": node.module or "", "names": names, "level": node.level})
+
+    def visit_function(self, node, name=None):
+        if name:
+            self.bind(name)
+        for decorator in getattr(node, "decorator_list", []):
+            self.visit(decorator)
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d]:
+            self.visit(default)
+            if isinstance(default, (ast.List, ast.Dict, ast.Set)) or (
+                isinstance(default, ast.Call) and isinstance(default.func, ast.Name) and default.func.id in MUTABLE_CALLS
+            ):
+                self.findings.append(finding(self.path, default.lineno, MUTABLE_DEFAULT,
+                                             f"mutable default argument in {name or 'lambda'}()"))
+        arguments = node.args.posonlyargs + node.args.args + node.args.kwonlyargs + [a for a in (node.args.vararg, node.args.kwarg) if a]
+        for argument in arguments:
+            if argument.annotation:
+                self.visit(argument.annotation)
+        if getattr(node, "returns", None):
+            self.visit(node.returns)
+        self.push("function")
+        self.scope.bindings.update(argument.arg for argument in arguments)
+        for statement in node.body if isinstance(node.body, list) else [node.body]:
+            self.visit(statement)
+        self.pop()
+
+    def visit_FunctionDef(self, node):
+        self.visit_function(node, node.name)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self.visit_function(node)
+
+    def visit_ClassDef(self, node):
+        self.bind(node.name)
+        for child in node.decorator_list + node.bases + node.keywords:
+            self.visit(child)
+        self.push("class")
+        self.scope.bindings.update(CLASS_NAMES)
+        for statement in node.body:
+            self.visit(statement)
+        self.pop()
+
+    def visit_comprehension_node(self, node):
+        # The first iterable is evaluated in the enclosing scope (so it can read a class body's names)
+        first = node.generators[0]
+        self.visit(first.iter)
+        self.push("comprehension")
+        self.visit(first.target)
+        for condition in first.ifs:
+            self.visit(condition)
+        for generator in node.generators[1:]:
+            self.visit(generator)
+        for field in ("elt", "key", "value"):
+            if hasattr(node, field):
+                self.visit(getattr(node, field))
+        self.pop()
+
+    visit_ListComp = visit_SetComp = visit_GeneratorExp = visit_DictComp = visit_comprehension_node
+
+    def visit_ExceptHandler(self, node):
+        if node.type is None:
+            self.findings.append(finding(self.path, node.lineno, BARE_EXCEPT, "bare except: also catches KeyboardInterrupt and SystemExit"))
+        if node.name:
+            self.bind(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchAs(self, node):
+        if node.name:
+            self.bind(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self.bind(node.name)
+
+    def visit_MatchMapping(self, node):
+        if node.rest:
+            self.bind(node.rest)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id in ("eval", "exec"):
+            self.findings.append(finding(self.path, node.lineno, EVAL_CALL, f"{node.func.id}() runs arbitrary code"))
+        self.generic_visit(node)
+
+    def visit_Compare(self, node):
+        operands = [node.left] + node.comparators
+        for op, left, right in zip(node.ops, operands, operands[1:]):
+            if isinstance(op, (ast.Eq, ast.NotEq)) and any(
+                isinstance(side, ast.Constant) and side.value is None for side in (left, right)
+            ):
+                self.findings.append(finding(self.path, node.lineno, NONE_COMPARISON, "comparison to None should use 'is' / 'is not'"))
+        self.generic_visit(node)
+
+    def undefined_names(self):
+        """Report each name loaded in some scope that no visible scope binds."""
+        reported = set()
+        for scope in self.scopes:
+            for name, line in scope.loads:
+                if name in reported or self.resolves(scope, name):
+                    continue
+                reported.add(name)
+                self.findings.append(finding(self.path, line, UNDEFINED_NAME, f"undefined name '{name}'"))
+
+    def resolves(self, scope, name):
+        if name in scope.bindings or name in MODULE_NAMES:
+            return True
+        scope = scope.parent
+        while scope:
+            # Class bodies are not visible from the functions defined in them
+            if scope.kind != "class" and name in scope.bindings:
+                return True
+            scope = scope.parent
+        return False
+
+
+def analyze_source(path, source, local_packages):
+    """Analyse one file in a worker process.
+
+    Returns its findings, and for Python files the top-level names it defines
+    (None when a star import makes them unknowable) and the imports of other
+    project modules, which analyze_project checks once every file is done.
+    """
+    result = {"path": path, "findings": [], "names": None, "imports": []}
+    if path.endswith(".json"):
+        try:
+            json.loads(source)
+        except ValueError as e:
+            result["findings"].append(finding(path, getattr(e, "lineno", 1), SYNTAX_ERROR, f"invalid JSON: {e}"))
+        return result
+    try:
+        tree = ast.parse(source, path)
+        # Compiling catches what the parser accepts but Python rejects: return outside a function, ...
+        compile(tree, path, "exec")
+    except (SyntaxError, ValueError) as e:
+        version = newer_syntax(source, e) if isinstance(e, SyntaxError) else None
+        if version:
+            result["findings"].append(finding(
+                path, e.lineno, NEWER_SYNTAX,
+                f"not analysed: Python {version[0]}.{version[1]} syntax that Python {sys.version_info[0]}.{sys.version_info[1]} cannot parse ({e.msg})",
+            ))
+        else:
+            result["findings"].append(finding(path, getattr(e, "lineno", None) or 1, SYNTAX_ERROR, f"syntax error: {e.msg if isinstance(e, SyntaxError) else e}"))
+        return result
+    visitor = ScopeVisitor(path)
+    visitor.visit(tree)
+    if not visitor.star_import:
+        visitor.undefined_names()
+        result["names"] = sorted(visitor.module.bindings)
+    exported = set()
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            exported = {element.value for element in getattr(node.value, "elts", []) if isinstance(element, ast.Constant)}
+    if not path.endswith("__init__.py"):
+        for name, line in visitor.imported.items():
+            if name not in visitor.used and name not in exported:
+                visitor.findings.append(finding(path, line, UNUSED_IMPORT, f"'{name}' imported but unused"))
+    package = module_name(path).split(".")[:-1] if not path.endswith("__init__.py") else module_name(path).split(".")
+    for entry in visitor.imports:
+        if entry["level"]:
+            base = package[:len(package) - entry["level"] + 1] if entry["level"] > 1 else package
+            entry["module"] = ".".join(base + ([entry["module"]] if entry["module"] else []))
+        top = entry["module"].split(".")[0]
+        if entry["level"] or top in local_packages:
+            result["imports"].append(entry)
+        elif top and top not in sys.stdlib_module_names and find_spec(top) is None:
+            result["findings"].append(finding(path, entry["line"], NOT_INSTALLED, f"'{top}' is not installed here"))
+    result["findings"].extend(visitor.findings)
+    return result
+
+
+def check_imports(analyses):
+    """Check imports between project files against the modules and names the files define."""
+    modules = {module_name(a["path"]): a for a in analyses if a["path"].endswith(".py")}
+    # Directories holding project modules are (namespace) packages
+    packages = {".".join(name.split(".")[:i]) for name in modules for i in range(1, name.count(".") + 1)}
+    findings = []
+    for analysis in analyses:
+        for entry in analysis["imports"]:
+            module = entry["module"]
+            if module not in modules and module not in packages:
+                findings.append(finding(analysis["path"], entry["line"], MISSING_MODULE, f"no module '{module}' in the project"))
+                continue
+            names = (modules.get(module) or {}).get("names")
+            for name in entry["names"]:
+                if f"{module}.{name}" in modules or f"{module}.{name}" in packages:
+                    continue
+                if module in modules and names is not None and name not in names and "__getattr__" not in names:
+                    findings.append(finding(analysis["path"], entry["line"], MISSING_NAME, f"'{module}' does not define '{name}'"))
+                elif module not in modules:
+                    findings.append(finding(analysis["path"], entry["line"], MISSING_MODULE, f"no module '{module}.{name}' in the project"))
+    return findings
+
+
+def create_pool(workers=DEFAULT_WORKERS):
+    """Return a process pool for analyze_project; workers are spawned, since the app forks badly with its threads."""
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+async def analyze_project(files, executor):
+    """Analyse a {path: content} map of generated files on the executor; returns the report."""
+    files = {path: content for path, content in files.items() if path.endswith((".py", ".json"))}
+    local_packages = {path.split("/")[0].removesuffix(".py") for path in files}
+    loop = asyncio.get_running_loop()
+    analyses = await asyncio.gather(*(
+        loop.run_in_executor(executor, analyze_source, path, content, local_packages) for path, content in files.items()
+    ))
+    findings = [f for analysis in analyses for f in analysis["findings"]] + check_imports(analyses)
+    findings.sort(key=lambda f: (f["severity"] != "error", f["path"], f["line"]))
+    errors = sum(f["severity"] == "error" for f in findings)
+    return {"files": len(files), "errors": errors, "warnings": len(findings) - errors, "findings": findings}
+
+
+def format_findings(report, max_items=40):
+    """List the findings as markdown, errors first, one line each."""
+    lines = [f"{report['errors']} errors and {report['warnings']} warnings in {report['files']} files (local static analysis):"]
+    for f in report["findings"][:max_items]:
+        lines.append(f"- `{f['path']}:{f['line']}` {f['code']} {f['severity']}: {f['message']}")
+    if len(report["findings"]) > max_items:
+        lines.append(f"- ... and {len(report['findings']) - max_items} more")
+    return "\n".join(lines)
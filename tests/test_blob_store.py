@@ -0,0 +1,41 @@
+import pytest
+
+from blob_store import BlobEvictedError, BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs.sqlite"), min_chars=10, compress=False, grace=0)
+
+
+def test_collect_keeps_referenced_blobs(store):
+    kept, dropped = store.put("kept " * 100), store.put("dropped " * 100)
+    assert store.collect({kept.split(":")[-1]}) == 1
+    store._cache.clear()
+    assert store.get(kept) == "kept " * 100
+    with pytest.raises(BlobEvictedError, match="no run referenced it"):
+        store.get(dropped)
+
+
+def test_collect_keeps_recent_unreferenced_blobs(store):
+    store.grace = 3600
+    store.put("recent " * 100)
+    assert store.collect(set()) == 0
+
+
+def test_size_cap_deletes_least_recently_used(store):
+    refs = [store.put(f"{i} " * 1000) for i in range(3)]
+    store.max_bytes = 4500
+    assert store.collect({ref.split(":")[-1] for ref in refs}) == 1
+    store._cache.clear()
+    with pytest.raises(BlobEvictedError, match="MB limit"):
+        store.get(refs[0])
+    assert store.get(refs[2]) == "2 " * 1000
+
+
+def test_put_after_collect_restores_the_blob(store):
+    ref = store.put("again " * 100)
+    store.collect(set())
+    assert store.put("again " * 100) == ref
+    store._cache.clear()
+    assert store.get(ref) == "again " * 100
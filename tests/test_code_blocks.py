@@ -0,0 +1,52 @@
+from code_blocks import CodeBlockParser, parse_code_blocks
+
+FENCE = "```"
+
+
+def stream(text, size=7):
+    parser = CodeBlockParser()
+    events = []
+    for start in range(0, len(text), size):
+        events += parser.feed(text[start:start + size])
+    return dict(events + parser.close())
+
+
+def test_fence_with_info_string_inside_code_is_content():
+    source = f"s='''\n{FENCE}python\nx\n{FENCE}\n'''"
+    text = f"{FENCE}main.py\n{source}\n{FENCE}\n"
+    assert parse_code_blocks(text) == {"main.py": source}
+    assert stream(text) == {"main.py": source}
+
+
+def test_markdown_file_keeps_nested_examples():
+    readme = f"# App\n\n{FENCE}bash\npip install app\n{FENCE}"
+    text = f"{FENCE}markdown README.md\n{readme}\n{FENCE}\n\n{FENCE}app.py\nprint(1)\n{FENCE}\n"
+    assert parse_code_blocks(text) == {"README.md": readme, "app.py": "print(1)"}
+
+
+def test_unterminated_block_ends_at_a_fence_naming_a_file():
+    text = f"{FENCE}python app/a.py\na = 1\n\n{FENCE}python app/b.py\nb = 2\n{FENCE}\n"
+    assert parse_code_blocks(text) == {"app/a.py": "a = 1", "app/b.py": "b = 2"}
+
+
+def test_unterminated_block_ends_at_a_labelled_fence():
+    text = f"**app/a.py**\n{FENCE}python\na = 1\n\n**app/b.py**\n{FENCE}python\nb = 2\n{FENCE}\n"
+    assert parse_code_blocks(text) == {"app/a.py": "a = 1", "app/b.py": "b = 2"}
+    assert stream(text) == {"app/a.py": "a = 1", "app/b.py": "b = 2"}
+
+
+def test_unterminated_block_is_kept_at_the_end():
+    assert parse_code_blocks(f"{FENCE}app.py\nprint(1)\n") == {"app.py": "print(1)"}
+
+
+def test_crlf_output():
+    text = f"{FENCE}app.py\r\nprint(1)\r\n{FENCE}\r\n\r\n{FENCE}python\r\nx = 2\r\n{FENCE}\r\n"
+    assert parse_code_blocks(text) == {"app.py": "print(1)", "main_1.py": "x = 2"}
+    assert stream(text, size=3) == {"app.py": "print(1)", "main_1.py": "x = 2"}
+
+
+def test_unterminated_blocks_are_reported():
+    parser = CodeBlockParser()
+    parser.feed(f"{FENCE}app.py\nprint(1)\n")
+    assert parser.close() == [("app.py", "print(1)")]
+    assert parser.unterminated == ["app.py"]
@@ -0,0 +1,39 @@
+from code_patches import apply_edits, parse_edits
+
+FILES = {"app.py": "def main():\n    print('hi')\n", "util.py": "X = 1\n"}
+
+
+def test_edits_apply_to_their_files():
+    text = (
+        "```\napp.py\n<<<<<<< SEARCH\n    print('hi')\n=======\n    print('hello')\n>>>>>>> REPLACE\n```\n"
+        "**`util.py`**\n<<<<<<< SEARCH\nX = 1   \n=======\nX = 2\n>>>>>>> REPLACE\n"
+        "new.py\n<<<<<<< SEARCH\n=======\nY = 3\n>>>>>>> REPLACE\n"
+    )
+    edits = parse_edits(text)
+    assert [path for path, _, _ in edits] == ["app.py", "util.py", "new.py"]
+    files, changed, failed = apply_edits(FILES, edits)
+    assert failed == [] and changed == ["app.py", "util.py", "new.py"]
+    assert files == {"app.py": "def main():\n    print('hello')\n", "util.py": "X = 2\n", "new.py": "Y = 3"}
+
+
+def test_missing_search_text_fails():
+    edits = parse_edits("app.py\n<<<<<<< SEARCH\n    print('bye')\n=======\n    pass\n>>>>>>> REPLACE\n")
+    files, changed, failed = apply_edits(FILES, edits)
+    assert files == FILES and changed == [] and len(failed) == 1
+
+
+def test_empty_search_does_not_replace_an_existing_file():
+    edits = parse_edits("app.py\n<<<<<<< SEARCH\n=======\nprint('replaced')\n>>>>>>> REPLACE\n")
+    files, changed, failed = apply_edits(FILES, edits)
+    assert files == FILES and failed == edits
+
+
+def test_block_without_a_path_fails():
+    text = (
+        "app.py\n<<<<<<< SEARCH\n    print('hi')\n=======\n    print('hello')\n>>>>>>> REPLACE\n"
+        "<<<<<<< SEARCH\nX = 1\n=======\nX = 2\n>>>>>>> REPLACE\n"
+    )
+    edits = parse_edits(text)
+    assert edits[1][0] == ""
+    files, changed, failed = apply_edits(FILES, edits)
+    assert changed == ["app.py"] and failed == [edits[1]]
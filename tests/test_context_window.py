@@ -0,0 +1,30 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app import CONTEXT_POLICIES, approx_tokens, context_window, summarize_history
+
+HISTORY = [HumanMessage(content=f"step {i}\n" + "detail\n" * 50) for i in range(6)]
+
+
+def test_default_policy_sends_no_history():
+    history, update = context_window("Design Review", {"messages": HISTORY})
+    assert history == [] and update == {"context_savings": {"Design Review": approx_tokens(HISTORY)}}
+
+
+def test_last_n_keeps_the_newest_messages():
+    n = CONTEXT_POLICIES["Generate Code"]["n"]
+    history, update = context_window("Generate Code", {"messages": HISTORY})
+    assert history == HISTORY[-n:]
+    assert update["context_savings"]["Generate Code"] == approx_tokens(HISTORY) - approx_tokens(HISTORY[-n:])
+
+
+def test_summary_keeps_the_opening_lines_within_budget():
+    digest = summarize_history(HISTORY, lines=1, max_chars=20)
+    # Newest first until the budget runs out, then in their original order
+    assert digest.endswith("step 3\n\n---\n\nstep 4\n\n---\n\nstep 5")
+    history, _ = context_window("Fix Code After QA", {"messages": HISTORY + [AIMessage(content="QA failed")]})
+    assert len(history) == 1 and "QA failed" in history[0] and approx_tokens(history) < approx_tokens(HISTORY)
+
+
+def test_empty_history():
+    assert context_window("Fix Code After QA", {"messages": []})[0] == []
+    assert context_window("Generate Code", {"messages": []})[0] == []
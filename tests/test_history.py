@@ -0,0 +1,60 @@
+import pytest
+
+from history import SNAPSHOT_EVERY, HistoryStore, diff_versions
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.sqlite"))
+
+
+def texts(count):
+    lines = [f"line {i}\n" for i in range(40)]
+    versions = []
+    for i in range(count):
+        lines[i % len(lines)] = f"changed {i}\n"
+        if i % 3 == 0:
+            lines.insert(i, f"inserted {i}\n")
+        versions.append("".join(lines) + ("no trailing newline" if i % 2 else ""))
+    return versions
+
+
+def test_every_version_round_trips(store):
+    versions = texts(2 * SNAPSHOT_EVERY + 3)
+    for i, text in enumerate(versions):
+        assert store.record("run", "code", "Generate Code", text) == i
+    store._cache.clear()
+    assert [store.text("run", "code", i) for i in range(len(versions))] == versions
+    assert len(store.versions("run")["code"]) == len(versions)
+
+
+def test_unchanged_text_is_not_a_new_version(store):
+    assert store.record("run", "stories", "Auto Generate User Stories", "a\nb\n") == 0
+    assert store.record("run", "stories", "Auto Generate User Stories", "a\nb\n") is None
+    assert store.record("run", "stories", "Auto Generate User Stories", "a\nc\n") == 1
+
+
+def test_deltas_store_less_than_the_text(store):
+    for text in texts(SNAPSHOT_EVERY):
+        store.record("run", "code", "Generate Code", text)
+    stats = store.stats("run")
+    assert stats["versions"] == SNAPSHOT_EVERY
+    assert stats["stored_bytes"] < stats["text_bytes"] / 4
+
+
+def test_runs_are_kept_apart(store):
+    store.record("one", "code", "Generate Code", "one\n")
+    store.record("two", "code", "Generate Code", "two\n")
+    store.delete_run("one")
+    assert store.versions("one") == {}
+    with pytest.raises(KeyError):
+        store.text("one", "code", 0)
+    assert store.text("two", "code", 0) == "two\n"
+
+
+def test_diff_is_truncated():
+    old = "".join(f"{i}\n" for i in range(100))
+    new = "".join(f"{i}!\n" for i in range(100))
+    diff, truncated = diff_versions(old, new, "v0", "v1", max_lines=10)
+    assert truncated and len(diff.splitlines()) == 10
+    assert diff_versions(old, old, "v0", "v1") == ("", False)
@@ -0,0 +1,74 @@
+"""The functional and technical documents are generated concurrently after product owner approval."""
+import asyncio
+import importlib
+import json
+import time
+import uuid
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+
+LATENCY = 0.5
+DOCUMENT_NODES = ("Generate Functional Documentation", "Generate Technical Documentation")
+
+
+class NodeSpans(BaseCallbackHandler):
+    """Start and end time of every graph node run."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.spans = {}
+        self._started = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self._started:
+            node, start = self._started.pop(run_id)
+            self.spans[node] = (start, time.perf_counter())
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    """The app on the fake LLM backend, where every call takes LATENCY seconds."""
+    tmp = tmp_path_factory.mktemp("app")
+    config_path = tmp / "llm.json"
+    config_path.write_text(json.dumps({"latency": {"distribution": "fixed", "mean": LATENCY}, "cache": False}))
+    with pytest.MonkeyPatch.context() as patch:
+        for key, value in {
+            "SDLC_LLM_BACKEND": "fake",
+            "SDLC_FAKE_LLM_CONFIG": str(config_path),
+            "SDLC_CHECKPOINT_DB": str(tmp / "checkpoints.sqlite"),
+            "SDLC_LLM_CACHE_DB": str(tmp / "llm_cache.sqlite"),
+            "SDLC_BLOB_DB": str(tmp / "blobs.sqlite"),
+            "SDLC_HISTORY_DB": str(tmp / "history.sqlite"),
+            "SDLC_RATE_LIMIT_RPM": "1000000",
+            "SDLC_RATE_LIMIT_TPM": "1000000000",
+        }.items():
+            patch.setenv(key, value)
+        yield importlib.import_module("app")
+
+
+def test_documentation_nodes_overlap(app):
+    workflow = app.build_workflow(app.DEFAULT_PROFILE, "offline")
+    spans = NodeSpans()
+    config = app.run_config(uuid.uuid4().hex)
+    config["callbacks"] = [spans]
+    inputs = {"project_name": "Notes", "project_description": "A notes app", "features": ["Search"], "messages": []}
+
+    async def run_documentation_phase():
+        async for event in workflow.astream(inputs, config):
+            if "Generate Combined Documentation" in event:
+                break
+
+    asyncio.run_coroutine_threadsafe(run_documentation_phase(), app.get_event_loop()).result(timeout=60)
+
+    (functional_start, functional_end), (technical_start, technical_end) = (spans.spans[node] for node in DOCUMENT_NODES)
+    assert functional_start < technical_end and technical_start < functional_end
+    # One call's latency for both documents, not one after the other
+    phase = max(functional_end, technical_end) - min(functional_start, technical_start)
+    assert LATENCY <= phase < 1.5 * LATENCY
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from fake_llm import FakeRateLimitError
+from rate_limiter import is_rate_limit_error
+
+
+@pytest.mark.parametrize("message", [
+    "Error code: 429 - {'error': {'message': 'Rate limit reached for gpt-4o'}}",
+    "429 Resource has been exhausted (e.g. check quota).",
+    "RESOURCE_EXHAUSTED: quota exceeded",
+    "Too Many Requests",
+])
+def test_rate_limit_messages(message):
+    assert is_rate_limit_error(RuntimeError(message))
+
+
+@pytest.mark.parametrize("message", [
+    "prompt has 4290 tokens, more than the 4096 allowed",
+    "connection refused on localhost:14290",
+    "invalid syntax at line 429",
+    "run 429af1 not found",
+])
+def test_other_errors_mentioning_429(message):
+    assert not is_rate_limit_error(RuntimeError(message))
+
+
+def test_status_codes_and_wrapped_errors():
+    assert is_rate_limit_error(FakeRateLimitError(1.0))
+    error = ValueError("structured output failed")
+    error.__cause__ = FakeRateLimitError(1.0)
+    assert is_rate_limit_error(error)
+
+
+def test_retries_are_reported_to_run_metrics(monkeypatch):
+    from typing import TypedDict
+
+    from langgraph.graph import END, START, StateGraph
+
+    import rate_limiter
+    from metrics import RunMetrics
+
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE", 0.01)
+    failures = [FakeRateLimitError(0.0)]
+
+    async def flaky(state):
+        if failures:
+            raise failures.pop()
+        return {"value": "done"}
+
+    class State(TypedDict):
+        value: str
+
+    builder = StateGraph(State)
+    builder.add_node("Flaky", rate_limiter.with_backoff(flaky, rate_limiter.SharedRateLimiter("fake", "model")))
+    builder.add_edge(START, "Flaky")
+    builder.add_edge("Flaky", END)
+    metrics = RunMetrics()
+    result = asyncio.run(builder.compile().ainvoke({"value": ""}, {"callbacks": [metrics]}))
+    assert result["value"] == "done"
+    assert metrics.by_node()["Flaky"]["retries"] == 1
+    assert metrics.totals()["retries"] == 1
@@ -0,0 +1,42 @@
+from app import DEFAULT_LOOP_POLICY, LOOP_POLICIES, review_round
+
+
+def run_loop(node, versions, step="Feedback"):
+    """Feed successive versions through review_round; return the steps and the last loop record."""
+    state, steps = {"review_loops": {}}, []
+    for version in versions:
+        decided, update = review_round(node, state, version, step)
+        steps.append(decided)
+        state["review_loops"].update(update["review_loops"])
+    return steps, state["review_loops"][node]
+
+
+def lines(count, changed=()):
+    return "".join(f"line {i}{'!' if i in changed else ''}\n" for i in range(count))
+
+
+def test_loop_stops_at_its_iteration_cap():
+    cap = LOOP_POLICIES["QA Testing"]["max_iterations"]
+    steps, loop = run_loop("QA Testing", [lines(10, {i}) for i in range(cap + 1)])
+    assert steps[:cap - 1] == ["Feedback"] * (cap - 1) and steps[cap - 1] == "Approved"
+    assert loop["stopped"].startswith("reached the limit")
+
+
+def test_loop_stops_once_versions_converge():
+    # One line in 200 is below the default 2% bar, ten are not
+    assert 1 / 200 < DEFAULT_LOOP_POLICY["min_change"] < 10 / 200
+    steps, loop = run_loop("Design Review", [lines(200), lines(200, set(range(10)))])
+    assert steps == ["Feedback", "Feedback"] and not loop["stopped"]
+    steps, loop = run_loop("Design Review", [lines(200), lines(200, {0})])
+    assert steps == ["Feedback", "Approved"] and loop["stopped"].startswith("converged")
+
+
+def test_loop_stops_when_versions_oscillate():
+    a, b = lines(10, {1}), lines(10, {2})
+    steps, loop = run_loop("Code Review", [a, b, a])
+    assert steps == ["Feedback", "Feedback", "Approved"] and loop["stopped"].startswith("oscillating")
+
+
+def test_approval_is_not_overridden():
+    steps, loop = run_loop("Code Review", [lines(10)] * 4, step="Approved")
+    assert steps == ["Approved"] * 4 and loop["iterations"] == 4 and not loop["stopped"]
@@ -0,0 +1,62 @@
+import pytest
+
+from sandbox import SandboxPool, read_report, run_decision, safe_path, workspace_files
+
+REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest">
+  <testcase classname="test_app" name="test_ok"/>
+  <testcase classname="test_app" name="test_skip"><skipped message="later"/></testcase>
+  <testcase classname="test_app" name="test_wrong"><failure message="assert 1 == 2">assert 1 == 2</failure></testcase>
+  <testcase classname="test_app" name="test_db"><error message="collection failure">ModuleNotFoundError: No module named 'psycopg2'</error></testcase>
+  <testcase classname="test_app" name="test_local"><error message="collection failure">ModuleNotFoundError: No module named 'app.models'</error></testcase>
+</testsuite></testsuites>
+"""
+
+
+@pytest.fixture(scope="module")
+def pool():
+    return SandboxPool(workers=2, timeout=5, cpu_seconds=2)
+
+
+def test_read_report(tmp_path):
+    path = tmp_path / "report.xml"
+    path.write_text(REPORT)
+    result = read_report(str(path), {"app"})
+    assert {key: result[key] for key in ("passed", "failed", "errors", "skipped", "unavailable")} == {
+        "passed": 1, "failed": 1, "errors": 1, "skipped": 1, "unavailable": 1,
+    }
+    assert result["missing_modules"] == ["psycopg2"]
+    assert [failure["test"] for failure in result["failures"]] == ["test_app::test_wrong", "test_app::test_local"]
+
+
+def test_paths_stay_in_the_workspace():
+    assert safe_path("pkg\\mod.py") == "pkg/mod.py"
+    assert [safe_path(path) for path in ("/etc/passwd", "../x.py", "a/../../x.py", "C:/x.py")] == [None] * 4
+    files, tests = workspace_files({"calc.py": "", "../evil.py": ""}, {"tests/calc.py": "", "notes.md": ""})
+    assert sorted(files) == ["calc.py", "tests/test_calc.py"] and tests == ["tests/test_calc.py"]
+
+
+def test_run_counts_outcomes_without_credentials(pool, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "secret")
+    code = {"calc.py": "def add(a, b):\n    return a + b\n"}
+    tests = {"test_calc.py": (
+        "import os\nfrom calc import add\n\n"
+        "def test_add():\n    assert add(1, 2) == 3\n\n"
+        "def test_no_keys():\n    assert 'GOOGLE_API_KEY' not in os.environ\n\n"
+        "def test_wrong():\n    assert add(1, 1) == 3\n"
+    )}
+    result = pool.run(code, tests)
+    assert (result["passed"], result["failed"], result["timed_out"]) == (2, 1, False)
+    assert run_decision(result) == "Failed"
+
+
+def test_run_is_killed_after_the_timeout(pool):
+    result = pool.run({}, {"test_slow.py": "import time\n\ndef test_slow():\n    time.sleep(60)\n"})
+    assert result["timed_out"] and result["duration"] < 10
+    assert result["failures"][0]["message"] == "timed out after 5s"
+
+
+def test_run_is_killed_at_the_cpu_limit(pool):
+    result = pool.run({}, {"test_spin.py": "def test_spin():\n    while True:\n        pass\n"})
+    assert not result["timed_out"] and result["returncode"] < 0
+    assert result["failures"][0]["message"] == "killed (CPU time limit)"
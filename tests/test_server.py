@@ -0,0 +1,30 @@
+import time
+
+import server
+from server import Job, JobManager
+
+
+def test_resubmitted_job_keeps_its_event_ids():
+    job = Job("job", {})
+    job.emit("token", {"node": "n", "text": "x"})
+    job.set_status("failed", "boom")
+    assert job.events[0] is None
+    job.reset()
+    assert job.first_event == 2 and not job.done
+    job.emit("status", {"status": "running", "error": None})
+    events, done = job.wait_events(job.first_event, 0)
+    assert events == [("status", {"status": "running", "error": None})] and not done
+
+
+def test_finished_jobs_are_evicted(monkeypatch):
+    manager = JobManager.__new__(JobManager)
+    manager.jobs = {}
+    for i, age in enumerate((10, 5, 1)):
+        job = manager.jobs[str(i)] = Job(str(i), {})
+        job.set_status("completed")
+        job.finished = time.time() - age * 3600
+    manager.jobs["running"] = Job("running", {})
+    monkeypatch.setattr(server, "JOB_TTL", 8 * 3600)
+    monkeypatch.setattr(server, "MAX_FINISHED_JOBS", 1)
+    manager._evict()
+    assert sorted(manager.jobs) == ["2", "running"]
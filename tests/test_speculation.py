@@ -0,0 +1,43 @@
+import asyncio
+
+from app import speculative_gate, use_speculation
+
+GATE, TARGET = "Design Review", "Generate Code"
+
+
+def nodes_for(decision, calls):
+    async def review(state):
+        await asyncio.sleep(0.05)
+        return {"design_decision": decision}
+
+    async def generate(state):
+        calls.append(state["design"])
+        await asyncio.sleep(0.01)
+        return {"generated_code": f"code for {state['design']}"}
+
+    return review, {TARGET: generate}
+
+
+def test_approved_review_hands_over_the_result():
+    calls = []
+    review, nodes = nodes_for("Approved", calls)
+    state = {"design": "v1"}
+    update = asyncio.run(speculative_gate(GATE, review, nodes)(state))
+    kept = update["speculation"][TARGET]
+    assert update["speculation_stats"] == {"started": 1} and kept["saved"] > 0
+    # The successor returns the kept result instead of running again
+    result = asyncio.run(use_speculation(TARGET, nodes[TARGET])({**state, **update}))
+    assert calls == ["v1"]
+    assert result["generated_code"] == "code for v1" and result["speculation"] == {TARGET: None}
+    assert result["speculation_stats"]["hits"] == 1
+
+
+def test_feedback_discards_the_result():
+    calls = []
+    review, nodes = nodes_for("Feedback", calls)
+    update = asyncio.run(speculative_gate(GATE, review, nodes)({"design": "v1"}))
+    assert update["speculation"] == {TARGET: None}
+    assert update["speculation_stats"]["misses"] == 1 and update["speculation_stats"]["time_wasted"] > 0
+    # Without a kept result the successor runs on the revised state
+    result = asyncio.run(use_speculation(TARGET, nodes[TARGET])({"design": "v2", **update}))
+    assert result == {"generated_code": "code for v2"}
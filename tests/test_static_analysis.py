@@ -0,0 +1,51 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from static_analysis import NEWER_SYNTAX, SYNTAX_ERROR, UNDEFINED_NAME, analyze_project, analyze_source
+
+
+def codes(source, path="main.py"):
+    return [(f["code"], f["message"]) for f in analyze_source(path, source, {"main"})["findings"]]
+
+
+def test_class_body_comprehension_reads_class_names():
+    source = "class Config:\n    FIELDS = ['a']\n    UPPER = [f.upper() for f in FIELDS]\n    LOOKUP = {f: 1 for f in FIELDS if f}\n"
+    assert codes(source) == []
+
+
+def test_class_names_are_not_visible_past_the_first_iterable():
+    # Only the first iterable is evaluated in the class body; the rest runs in the comprehension's scope
+    source = "class Config:\n    FIELDS = ['a']\n    PAIRS = [(f, g) for f in FIELDS for g in FIELDS]\n"
+    assert codes(source) == [(UNDEFINED_NAME, "undefined name 'FIELDS'")]
+
+
+def test_methods_do_not_see_class_names():
+    source = "class Config:\n    LIMIT = 3\n    def limit(self):\n        return LIMIT\n"
+    assert codes(source) == [(UNDEFINED_NAME, "undefined name 'LIMIT'")]
+
+
+def test_comprehension_variables_stay_local():
+    source = "values = [item for item in range(3)]\nprint(item)\n"
+    assert codes(source) == [(UNDEFINED_NAME, "undefined name 'item'")]
+
+
+def test_project_imports_are_resolved_across_files():
+    files = {
+        "calc/__init__.py": "",
+        "calc/ops.py": "def add(a, b):\n    return a + b\n",
+        "main.py": "from calc.ops import add, sub\nfrom calc import missing\nprint(add(1, 2))\n",
+    }
+    with ThreadPoolExecutor(2) as pool:
+        report = asyncio.run(analyze_project(files, pool))
+    errors = [f["message"] for f in report["findings"] if f["severity"] == "error"]
+    assert errors == ["'calc.ops' does not define 'sub'", "'calc' does not define 'missing'"]
+
+
+def test_newer_syntax_is_a_warning():
+    source = "def first[T](xs: list[T]) -> T:\n    return xs[0]\n"
+    if sys.version_info >= (3, 12):
+        assert codes(source) == []
+    else:
+        assert [code for code, _ in codes(source)] == [NEWER_SYNTAX]
+    assert [code for code, _ in codes("def first(xs:\n    return xs[0]\n")] == [SYNTAX_ERROR]